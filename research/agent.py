@@ -14,6 +14,7 @@ from research.phases.phase2_finalize import Phase2Finalize
 from research.phases.phase3_execute import Phase3Execute
 from research.phases.phase4_synthesize import Phase4Synthesize
 from research.ui.console_interface import ConsoleInterface
+from research.utils.segmentation import default_segmenter
 from pathlib import Path
 
 
@@ -152,7 +153,7 @@ class DeepResearchAgent:
         for data in batch_data.values():
             transcript = data.get("transcript", "")
             if transcript:
-                word_count = len(transcript.split())
+                word_count = default_segmenter().count(transcript)
                 transcript_sizes.append(word_count)
 
         transcript_size_analysis = {}
@@ -10,17 +10,21 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 from loguru import logger
 
+from research.utils.segmentation import Segmenter, default_segmenter
+
 
 class ResearchDataLoader:
     """Load and normalize scraped data from batch results."""
     
-    def __init__(self, results_base_path: Optional[Path] = None):
+    def __init__(self, results_base_path: Optional[Path] = None, segmenter: Optional[Segmenter] = None):
         """
         Initialize data loader.
         
         Args:
             results_base_path: Base path for test results (defaults to tests/results/)
+            segmenter: Defines a "word" for word counts and samples (defaults to research.segmentation)
         """
+        self.segmenter = segmenter or default_segmenter()
         if results_base_path is None:
             # Default to project root/tests/results/
             # Path(__file__) = research/data_loader.py
@@ -140,7 +144,7 @@ class ResearchDataLoader:
                     link_data[link_id]["transcript"] = transcript_content
                     
                     # Update availability metadata
-                    word_count = len(transcript_content.split()) if transcript_content else 0
+                    word_count = self.segmenter.count(transcript_content) if transcript_content else 0
                     link_data[link_id]["data_availability"]["has_transcript"] = bool(transcript_content)
                     link_data[link_id]["data_availability"]["transcript_word_count"] = word_count
                     
@@ -169,6 +173,10 @@ class ResearchDataLoader:
                         if "comments" in data:
                             link_data[link_id]["comments"] = comments
                     
+                    # Identifies this load of the comments (keys the shared Phase 3 comment index)
+                    stat = file_path.stat()
+                    link_data[link_id]["comments_version"] = f"{file_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
                     # Update availability metadata
                     link_data[link_id]["data_availability"]["has_comments"] = bool(comments)
                     link_data[link_id]["data_availability"]["comment_count"] = len(comments)
@@ -205,7 +213,7 @@ class ResearchDataLoader:
         # Add transcript/article sample (enhancement #3: multi-point sampling)
         transcript = data.get("transcript", "")
         if transcript:
-            words = transcript.split()
+            words = self.segmenter.segment(transcript)
             total_words = len(words)
             
             if use_intelligent_sampling and total_words > transcript_sample_words * 1.5:
@@ -215,28 +223,28 @@ class ResearchDataLoader:
                 samples = []
                 # Beginning
                 if words_per_sample > 0:
-                    samples.append(("开头", " ".join(words[:words_per_sample])))
+                    samples.append(("开头", words.slice(0, words_per_sample), words_per_sample))
                 
                 # Middle
                 if total_words > words_per_sample * 2:
                     mid_start = (total_words - words_per_sample) // 2
                     mid_end = mid_start + words_per_sample
-                    samples.append(("中间", " ".join(words[mid_start:mid_end])))
+                    samples.append(("中间", words.slice(mid_start, mid_end), words_per_sample))
                 
                 # End
                 if total_words > words_per_sample:
-                    samples.append(("结尾", " ".join(words[-words_per_sample:])))
+                    samples.append(("结尾", words.slice(total_words - words_per_sample, total_words), words_per_sample))
                 
-                sample_parts = [f"{label}（{len(s.split())}词）:\n{s}" for label, s in samples]
+                sample_parts = [f"{label}（{count}词）:\n{s}" for label, s, count in samples]
                 abstract_parts.append(
                     f"**转录本/文章摘要**（多点采样，共{transcript_sample_words}词）:\n\n" + 
                     "\n\n---\n\n".join(sample_parts)
                 )
             else:
                 # Traditional: first N words
-                sample_words = words[:transcript_sample_words]
-                sample = " ".join(sample_words)
-                abstract_parts.append(f"**转录本/文章摘要**（前{len(sample_words)}词）:\n{sample}")
+                sample_count = min(total_words, transcript_sample_words)
+                sample = words.slice(0, sample_count)
+                abstract_parts.append(f"**转录本/文章摘要**（前{sample_count}词）:\n{sample}")
         
         # Add comments sample (enhancement #3: engagement-based sampling)
         comments = data.get("comments", [])
@@ -472,16 +480,15 @@ class ResearchDataLoader:
                 chunks.append(data)
                 return chunks
             
-            words = transcript.split()
+            words = self.segmenter.segment(transcript)
             num_chunks = (len(words) + chunk_size - 1) // chunk_size
             
             for i in range(num_chunks):
                 start_idx = i * chunk_size
                 end_idx = min((i + 1) * chunk_size, len(words))
-                chunk_words = words[start_idx:end_idx]
                 
                 chunk_data_copy = data.copy()
-                chunk_data_copy["transcript"] = " ".join(chunk_words)
+                chunk_data_copy["transcript"] = words.slice(start_idx, end_idx)
                 chunk_data_copy["chunk_info"] = {
                     "chunk_index": i + 1,
                     "total_chunks": num_chunks,
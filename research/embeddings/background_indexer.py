@@ -0,0 +1,131 @@
+"""Background Phase 0 vector indexing with a per-batch readiness signal.
+
+Transcript and comment chunks do not depend on summaries, so Phase 0 starts
+embedding them on a worker thread as soon as the batch is loaded. Once the
+summaries are ready the same worker runs a full ``index_batch`` pass, which
+adds the document chunks and refreshes marker metadata while reusing every
+unchanged chunk by hash. Readers (Phase 3) wait on :func:`wait_for_batch`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from research.embeddings.vector_indexer import VectorIndexer
+
+_readiness_lock = threading.Lock()
+_readiness: Dict[str, threading.Event] = {}
+_errors: Dict[str, str] = {}
+
+
+def mark_pending(batch_id: str) -> None:
+    with _readiness_lock:
+        event = _readiness.get(batch_id)
+        if event is None or event.is_set():
+            _readiness[batch_id] = threading.Event()
+        _errors.pop(batch_id, None)
+
+
+def mark_ready(batch_id: str, error: Optional[str] = None) -> None:
+    with _readiness_lock:
+        event = _readiness.setdefault(batch_id, threading.Event())
+        if error:
+            _errors[batch_id] = error
+    event.set()
+
+
+def is_ready(batch_id: str) -> bool:
+    """True unless an indexing job for ``batch_id`` is still running in this process."""
+
+    with _readiness_lock:
+        event = _readiness.get(batch_id)
+    return event is None or event.is_set()
+
+
+def indexing_error(batch_id: str) -> Optional[str]:
+    with _readiness_lock:
+        return _errors.get(batch_id)
+
+
+def pending_batches() -> List[str]:
+    with _readiness_lock:
+        return [batch_id for batch_id, event in _readiness.items() if not event.is_set()]
+
+
+def wait_for_batch(batch_ids: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> bool:
+    """Block until indexing of ``batch_ids`` (default: every pending batch) finishes.
+
+    Batches never indexed in this process count as ready. Returns False if
+    ``timeout`` seconds pass first.
+    """
+
+    if batch_ids is None:
+        batch_ids = pending_batches()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for batch_id in batch_ids:
+        with _readiness_lock:
+            event = _readiness.get(batch_id)
+        if event is None:
+            continue
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not event.wait(remaining):
+            return False
+    return True
+
+
+class BackgroundIndexJob:
+    """Index one batch on a worker thread while Phase 0 summarizes it."""
+
+    def __init__(self, indexer: VectorIndexer, batch_id: str, batch_data: Dict[str, Dict[str, Any]]) -> None:
+        self.indexer = indexer
+        self.batch_id = batch_id
+        # Phase 0 writes summaries into the live item dicts while the worker
+        # iterates them, so snapshot each item (minus its summary) here.
+        self._content_data = {
+            link_id: {key: value for key, value in data.items() if key != "summary"}
+            for link_id, data in batch_data.items()
+        }
+        self._full_data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._summaries_ready = threading.Event()
+        self.error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name=f"phase0-index-{batch_id}", daemon=True)
+
+    def start(self) -> "BackgroundIndexJob":
+        mark_pending(self.batch_id)
+        self._thread.start()
+        return self
+
+    def submit_summaries(self, batch_data: Dict[str, Dict[str, Any]]) -> None:
+        """Hand over the summarized batch; the worker runs the full pass next."""
+
+        self._full_data = batch_data
+        self._summaries_ready.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self) -> None:
+        t0 = time.time()
+        try:
+            self.indexer.index_batch(self.batch_id, self._content_data, content_only=True)
+            logger.info(
+                "[PHASE0-INDEX] Content chunks for batch %s indexed in %.2fs; waiting for summaries",
+                self.batch_id,
+                time.time() - t0,
+            )
+        except Exception as exc:
+            # The full pass below indexes everything again; only its failure counts.
+            logger.warning("[PHASE0-INDEX] Content pass failed for batch %s: %s", self.batch_id, exc)
+        try:
+            self._summaries_ready.wait()
+            self.indexer.index_batch(self.batch_id, self._full_data or self._content_data)
+        except Exception as exc:
+            self.error = str(exc)
+            logger.error("[PHASE0-INDEX] Background indexing failed for batch %s: %s", self.batch_id, exc)
+        finally:
+            mark_ready(self.batch_id, self.error)
@@ -0,0 +1,211 @@
+"""Persistent content-addressed cache for embedding vectors.
+
+Vectors are keyed by ``(provider, model, dimension, sha256(text))`` so an
+unchanged chunk, a repeated Phase 3 query or the same video scraped into a
+different batch is only ever embedded once per model.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from loguru import logger
+
+_LOOKUP_CHUNK = 500
+
+
+def cache_settings(config: Any) -> Dict[str, Any]:
+    """Return the ``EmbeddingConfig`` cache fields for ``research.embeddings.cache``."""
+
+    cache_cfg = config.get("research.embeddings.cache", {}) or {}
+    if not bool(cache_cfg.get("enable", True)):
+        return {"cache_path": None}
+    path = cache_cfg.get("path")
+    if not path:
+        store_dir = config.get("research.embeddings.store.path", "data/vector_store")
+        path = str(Path(store_dir) / "embedding_cache.sqlite")
+    return {"cache_path": str(path), "cache_max_mb": int(cache_cfg.get("max_mb", 512))}
+
+
+class EmbeddingCache:
+    """SQLite table of embedding vectors with LRU-by-last-use eviction."""
+
+    _shared: Dict[str, "EmbeddingCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: Path, *, max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max(0, int(max_bytes))
+
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL;")
+        self.connection.execute("PRAGMA synchronous=NORMAL;")
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    dimension INTEGER NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (provider, model, dimension, text_hash)
+                )
+                """
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used);"
+            )
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._total_bytes = self._stored_bytes()
+
+    @classmethod
+    def shared(cls, db_path: Path, *, max_bytes: int = 512 * 1024 * 1024) -> "EmbeddingCache":
+        """Process-wide instance per cache file, shared by every EmbeddingClient."""
+
+        key = str(Path(db_path).resolve())
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls(Path(db_path), max_bytes=max_bytes)
+                cls._shared[key] = cache
+            return cache
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    def get_many(
+        self,
+        *,
+        provider: str,
+        model: str,
+        dimension: int,
+        texts: Sequence[str],
+    ) -> Dict[int, List[float]]:
+        """Return ``{input_index: vector}`` for the texts already cached."""
+
+        keys = [self.text_key(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique_keys), _LOOKUP_CHUNK):
+                chunk = unique_keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self.connection.execute(
+                    "SELECT text_hash, vector FROM embedding_cache "
+                    f"WHERE provider = ? AND model = ? AND dimension = ? AND text_hash IN ({placeholders})",
+                    [provider, model, dimension, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                with self.connection:
+                    self.connection.executemany(
+                        "UPDATE embedding_cache SET last_used = ? "
+                        "WHERE provider = ? AND model = ? AND dimension = ? AND text_hash = ?",
+                        [(now, provider, model, dimension, key) for key in found],
+                    )
+
+            result = {idx: found[key] for idx, key in enumerate(keys) if key in found}
+            self.hits += len(result)
+            self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(
+        self,
+        *,
+        provider: str,
+        model: str,
+        dimension: int,
+        texts: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        if not texts:
+            return
+        now = time.time()
+        rows = [
+            (provider, model, dimension, self.text_key(text), array("f", vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            with self.connection:
+                before = self.connection.total_changes
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO embedding_cache(provider, model, dimension, text_hash, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                inserted = self.connection.total_changes - before
+            if inserted:
+                self._total_bytes += inserted * len(rows[0][4])
+            self._evict_if_needed()
+
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            entries = self.connection.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": int(entries),
+                "bytes": self._total_bytes,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+        with self._shared_lock:
+            for key, cache in list(self._shared.items()):
+                if cache is self:
+                    del self._shared[key]
+
+    # ------------------------------------------------------------------
+    def _stored_bytes(self) -> int:
+        row = self.connection.execute("SELECT COALESCE(SUM(length(vector)), 0) FROM embedding_cache").fetchone()
+        return int(row[0])
+
+    def _evict_if_needed(self) -> None:
+        """Drop least-recently-used rows until the cache fits in ``max_bytes``.
+
+        Must be called with ``self._lock`` held.
+        """
+
+        if not self.max_bytes or self._total_bytes <= self.max_bytes:
+            return
+        # Other processes may have written to the same file; re-sync first.
+        self._total_bytes = self._stored_bytes()
+        excess = self._total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        row = self.connection.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        average = self._total_bytes / max(1, int(row[0]))
+        # Evict a little extra so steady inserts don't trigger eviction every call.
+        count = int(excess / average) + 1 + int(row[0]) // 20
+        with self.connection:
+            deleted = self.connection.execute(
+                "DELETE FROM embedding_cache WHERE rowid IN "
+                "(SELECT rowid FROM embedding_cache ORDER BY last_used LIMIT ?)",
+                (count,),
+            ).rowcount
+        self._total_bytes = self._stored_bytes()
+        self.evictions += deleted
+        logger.debug("[EMBED-CACHE] Evicted %s entries from %s", deleted, self.db_path)
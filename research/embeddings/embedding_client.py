@@ -2,14 +2,22 @@
 
 from __future__ import annotations
 
-import hashlib
 import json
 import os
+import re
+import threading
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from research.embeddings.embedding_cache import EmbeddingCache
+from research.utils.segmentation import CJK_CHARS as _CJK_CHARS
 
 try:  # Optional dependency for numerical ops
     import numpy as np
@@ -17,6 +25,37 @@ except Exception:  # pragma: no cover - fallback if numpy unavailable
     np = None  # type: ignore
 
 
+# Changing the hash embedding output (including the shared CJK_CHARS ranges)
+# requires bumping research.embeddings.version so stores indexed with the old
+# vectors are rebuilt.
+# CJK runs become character n-grams; everything else is split into words.
+_HASH_TOKEN_RE = re.compile(rf"[{_CJK_CHARS}]+|[^\W_{_CJK_CHARS}]+")
+_CJK_RUN_RE = re.compile(f"[{_CJK_CHARS}]")
+
+_MASK64 = (1 << 64) - 1
+_POLY_BASE = 1099511628211  # FNV-64 prime, used as the polynomial base
+# Per-feature-kind salts so a word and a CJK n-gram never share a hash
+_SALT_WORD = 0x9E3779B97F4A7C15
+_SALT_CJK_UNIGRAM = 0xC2B2AE3D27D4EB4F
+_SALT_CJK_BIGRAM = 0x165667B19E3779F9
+
+
+def _mix64(value: int) -> int:
+    """splitmix64 finalizer (pure Python twin of ``_mix64_array``)."""
+
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _mix64_array(values: "np.ndarray") -> "np.ndarray":
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
 @dataclass
 class EmbeddingConfig:
     provider: str = "hash"
@@ -25,6 +64,15 @@ class EmbeddingConfig:
     batch_size: int = 16
     timeout: int = 45
     base_url: Optional[str] = None
+    # Sub-batches of ``batch_size`` texts are sent over at most this many
+    # concurrent keep-alive connections.
+    max_concurrency: int = 4
+    # Attempts per sub-batch after the first before it falls back to hash embeddings
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    # Persistent content-addressed cache of provider vectors; None disables it
+    cache_path: Optional[str] = None
+    cache_max_mb: int = 512
 
 
 class EmbeddingClient:
@@ -34,7 +82,13 @@ class EmbeddingClient:
     are unavailable to keep the pipeline functional in offline environments.
     """
 
-    def __init__(self, config: Optional[EmbeddingConfig] = None, *, api_key: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        config: Optional[EmbeddingConfig] = None,
+        *,
+        api_key: Optional[str] = None,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> None:
         self.config = config or EmbeddingConfig()
         self.provider = (self.config.provider or "hash").lower()
         self.model = self.config.model
@@ -42,6 +96,14 @@ class EmbeddingClient:
         self.batch_size = max(1, int(self.config.batch_size or 16))
         self.timeout = int(self.config.timeout or 45)
         self.base_url = self.config.base_url
+        self.max_concurrency = max(1, int(self.config.max_concurrency or 1))
+        self.max_retries = max(0, int(self.config.max_retries or 0))
+        self.retry_backoff = max(0.0, float(self.config.retry_backoff or 0.0))
+
+        # Pooled keep-alive session shared by all worker threads; created lazily
+        # so offline (hash) clients never open one.
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
 
         # Resolve API key from env/config when needed
         self.api_key = api_key or os.getenv("DASHSCOPE_API_KEY") or os.getenv("QWEN_API_KEY") or os.getenv("OPENAI_API_KEY")
@@ -53,6 +115,20 @@ class EmbeddingClient:
             )
             self.provider = "hash"
 
+        # Hash embeddings are computed locally, so only remote providers use the cache.
+        self.cache: Optional[EmbeddingCache] = None
+        if self.provider != "hash":
+            if cache is not None:
+                self.cache = cache
+            elif self.config.cache_path:
+                try:
+                    self.cache = EmbeddingCache.shared(
+                        Path(self.config.cache_path),
+                        max_bytes=int(self.config.cache_max_mb) * 1024 * 1024,
+                    )
+                except Exception as exc:  # pragma: no cover - cache is best effort
+                    logger.warning("Embedding cache unavailable at %s: %s", self.config.cache_path, exc)
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -67,23 +143,159 @@ class EmbeddingClient:
             return []
 
         if self.provider == "dashscope":
-            try:
-                return self._embed_dashscope(texts_list)
-            except Exception as exc:  # pragma: no cover - network fallback
-                logger.error("DashScope embedding call failed: %s", exc)
-                logger.warning("Falling back to hash embeddings for this batch.")
-                return [self._hash_embed(text) for text in texts_list]
+            return self._embed_cached(texts_list, self._embed_dashscope, "DashScope")
 
         if self.provider == "openai":
-            try:
-                return self._embed_openai(texts_list)
-            except Exception as exc:  # pragma: no cover - network fallback
-                logger.error("OpenAI embedding call failed: %s", exc)
-                logger.warning("Falling back to hash embeddings for this batch.")
-                return [self._hash_embed(text) for text in texts_list]
+            return self._embed_cached(texts_list, self._embed_openai, "OpenAI")
 
         # Default deterministic hash embedding (offline friendly)
-        return [self._hash_embed(text) for text in texts_list]
+        return self._hash_embed_batch(texts_list)
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit/miss counters of the persistent cache (empty when disabled)."""
+
+        return self.cache.stats() if self.cache is not None else {}
+
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    # ------------------------------------------------------------------
+    # Caching and batching
+    # ------------------------------------------------------------------
+    def _embed_cached(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        provider_label: str,
+    ) -> List[List[float]]:
+        """Serve cached vectors and send only the remaining distinct texts to the provider."""
+
+        cached: Dict[int, List[float]] = {}
+        if self.cache is not None:
+            try:
+                cached = self.cache.get_many(
+                    provider=self.provider, model=self.model, dimension=self.dimension, texts=texts
+                )
+            except Exception as exc:  # pragma: no cover - cache is best effort
+                logger.warning("Embedding cache lookup failed: %s", exc)
+
+        missing = list(dict.fromkeys(text for idx, text in enumerate(texts) if idx not in cached))
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            vectors, from_provider = self._embed_batched(missing, embed_fn, provider_label)
+            fresh = dict(zip(missing, vectors))
+            if self.cache is not None:
+                # Hash fallbacks stand in for failed calls and must not be cached.
+                keep = [i for i, ok in enumerate(from_provider) if ok]
+                try:
+                    self.cache.put_many(
+                        provider=self.provider,
+                        model=self.model,
+                        dimension=self.dimension,
+                        texts=[missing[i] for i in keep],
+                        vectors=[vectors[i] for i in keep],
+                    )
+                except Exception as exc:  # pragma: no cover - cache is best effort
+                    logger.warning("Embedding cache write failed: %s", exc)
+
+        return [cached[idx] if idx in cached else fresh[text] for idx, text in enumerate(texts)]
+
+    def _embed_batched(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        provider_label: str,
+    ) -> Tuple[List[List[float]], List[bool]]:
+        """Split ``texts`` into ``batch_size`` sub-batches and embed them concurrently.
+
+        Results are returned in input order, together with a per-text flag
+        that is False where the vector is a hash fallback. Each sub-batch is
+        retried on its own and only a sub-batch that exhausts its retries
+        falls back to hash embeddings.
+        """
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        def run(batch: List[str]) -> Optional[List[List[float]]]:
+            return self._embed_with_retry(batch, embed_fn, provider_label)
+
+        workers = min(self.max_concurrency, len(batches))
+        if workers <= 1:
+            results = [run(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+                results = list(pool.map(run, batches))
+
+        vectors: List[List[float]] = []
+        from_provider: List[bool] = []
+        for batch, batch_vectors in zip(batches, results):
+            if batch_vectors is None:
+                vectors.extend(self._hash_embed_batch(batch))
+                from_provider.extend([False] * len(batch))
+            else:
+                vectors.extend(batch_vectors)
+                from_provider.extend([True] * len(batch))
+        return vectors, from_provider
+
+    def _embed_with_retry(
+        self,
+        batch: List[str],
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        provider_label: str,
+    ) -> Optional[List[List[float]]]:
+        """Embed one sub-batch, or return None once its retries are exhausted."""
+
+        attempts = self.max_retries + 1
+        for attempt in range(attempts):
+            try:
+                embeddings = embed_fn(batch)
+                if len(embeddings) != len(batch):
+                    raise ValueError(
+                        f"{provider_label} returned {len(embeddings)} vectors for {len(batch)} inputs"
+                    )
+                return embeddings
+            except Exception as exc:  # pragma: no cover - network fallback
+                retryable = self._is_retryable(exc)
+                if attempt + 1 < attempts and retryable:
+                    delay = self.retry_backoff * (2 ** attempt)
+                    logger.warning(
+                        "%s embedding call failed (attempt %s/%s): %s; retrying in %.1fs",
+                        provider_label,
+                        attempt + 1,
+                        attempts,
+                        exc,
+                        delay,
+                    )
+                    time.sleep(delay)
+                    continue
+                logger.error("%s embedding call failed: %s", provider_label, exc)
+                logger.warning("Falling back to hash embeddings for this batch (%s texts).", len(batch))
+                return None
+        return None  # pragma: no cover - loop always returns
+
+    @staticmethod
+    def _is_retryable(exc: Exception) -> bool:
+        """Client errors other than rate limiting will not succeed on retry."""
+
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            status = exc.response.status_code
+            return status == 429 or status >= 500
+        return True
+
+    def _get_session(self) -> requests.Session:
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
 
     # ------------------------------------------------------------------
     # Provider implementations
@@ -92,32 +304,17 @@ class EmbeddingClient:
         """Call DashScope compatible embedding endpoint (OpenAI style)."""
 
         base_url = self.base_url or "https://dashscope.aliyuncs.com/compatible-mode/v1"
-        url = base_url.rstrip("/") + "/embeddings"
-
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-
-        payload = {"model": self.model, "input": texts}
-        response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
-        response.raise_for_status()
-        data = response.json()
-
-        embeddings = []
-        for item in data.get("data", []):
-            vec = item.get("embedding") or []
-            embeddings.append(self._normalize(vec))
-
-        if not embeddings:
-            raise ValueError("DashScope embedding response contained no vectors")
-
-        return embeddings
+        return self._post_embeddings(base_url, texts, "DashScope")
 
     def _embed_openai(self, texts: List[str]) -> List[List[float]]:
         """Call OpenAI embeddings API (used for Azure/OpenAI compatible providers)."""
 
         base_url = self.base_url or "https://api.openai.com/v1"
+        return self._post_embeddings(base_url, texts, "OpenAI")
+
+    def _post_embeddings(self, base_url: str, texts: List[str], provider_label: str) -> List[List[float]]:
+        """POST one sub-batch to an OpenAI-style ``/embeddings`` endpoint over the pooled session."""
+
         url = base_url.rstrip("/") + "/embeddings"
 
         headers = {
@@ -126,17 +323,19 @@ class EmbeddingClient:
         }
 
         payload = {"model": self.model, "input": texts}
-        response = requests.post(url, headers=headers, json=payload, timeout=self.timeout)
+        response = self._get_session().post(url, headers=headers, json=payload, timeout=self.timeout)
         response.raise_for_status()
         data = response.json()
 
+        # Responses carry an ``index`` per item; don't rely on list order.
+        items = sorted(data.get("data", []), key=lambda item: item.get("index", 0))
         embeddings = []
-        for item in data.get("data", []):
+        for item in items:
             vec = item.get("embedding") or []
             embeddings.append(self._normalize(vec))
 
         if not embeddings:
-            raise ValueError("OpenAI embedding response contained no vectors")
+            raise ValueError(f"{provider_label} embedding response contained no vectors")
 
         return embeddings
 
@@ -146,16 +345,106 @@ class EmbeddingClient:
     def _hash_embed(self, text: str) -> List[float]:
         """Generate deterministic hash-based embedding as an offline fallback."""
 
-        tokens = text.split()
-        dim = self.dimension
-        vector = [0.0] * dim
+        return self._hash_embed_batch([text])[0]
+
+    def _hash_embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Signed feature hashing over words and CJK character uni/bigrams.
+
+        Latin-script text contributes lower-cased words; CJK runs (which
+        ``str.split`` would leave as one giant token) contribute every
+        character and every adjacent character pair. Each feature is hashed
+        with a 64-bit polynomial hash plus a splitmix64 finalizer into a
+        bucket and a sign, so the output is identical with and without NumPy.
+        """
 
-        for token in tokens:
-            digest = hashlib.sha256(token.encode("utf-8")).digest()
-            for i in range(0, len(digest), 4):
-                idx = (digest[i] << 24 | digest[i + 1] << 16 | digest[i + 2] << 8 | digest[i + 3]) % dim
-                vector[idx] += 1.0
+        if not texts:
+            return []
+        if np is None:  # pragma: no cover - exercised only without numpy
+            return [self._hash_embed_python(text) for text in texts]
 
+        dim = self.dimension
+        word_cps: List[str] = []
+        word_docs: List[int] = []
+        cjk_runs: List[str] = []
+        cjk_docs: List[int] = []
+        for doc, text in enumerate(texts):
+            for token in _HASH_TOKEN_RE.findall((text or "").lower()):
+                if _CJK_RUN_RE.match(token):
+                    cjk_runs.append(token)
+                    cjk_docs.append(doc)
+                else:
+                    word_cps.append(token)
+                    word_docs.append(doc)
+
+        feature_hashes: List["np.ndarray"] = []
+        feature_docs: List["np.ndarray"] = []
+
+        if word_cps:
+            feature_hashes.append(_mix64_array(self._segment_hashes(word_cps) ^ np.uint64(_SALT_WORD)))
+            feature_docs.append(np.asarray(word_docs, dtype="int64"))
+
+        if cjk_runs:
+            lengths = np.fromiter((len(run) for run in cjk_runs), dtype="int64", count=len(cjk_runs))
+            cps = np.frombuffer("".join(cjk_runs).encode("utf-32-le"), dtype="<u4").astype("uint64")
+            docs = np.repeat(np.asarray(cjk_docs, dtype="int64"), lengths)
+            feature_hashes.append(_mix64_array(cps ^ np.uint64(_SALT_CJK_UNIGRAM)))
+            feature_docs.append(docs)
+
+            # Bigrams never straddle two runs: drop pairs starting at a run's last char.
+            run_ends = np.cumsum(lengths) - 1
+            pair_mask = np.ones(len(cps) - 1, dtype=bool) if len(cps) > 1 else np.zeros(0, dtype=bool)
+            pair_mask[run_ends[:-1]] = False
+            if pair_mask.any():
+                bigrams = cps[:-1][pair_mask] * np.uint64(_POLY_BASE) + cps[1:][pair_mask]
+                feature_hashes.append(_mix64_array(bigrams ^ np.uint64(_SALT_CJK_BIGRAM)))
+                feature_docs.append(docs[:-1][pair_mask])
+
+        if not feature_hashes:
+            return [[0.0] * dim for _ in texts]
+
+        hashes = np.concatenate(feature_hashes)
+        docs = np.concatenate(feature_docs)
+        buckets = (hashes % np.uint64(dim)).astype("int64")
+        signs = np.where((hashes >> np.uint64(63)) == 1, -1.0, 1.0)
+        matrix = np.bincount(docs * dim + buckets, weights=signs, minlength=len(texts) * dim).reshape(len(texts), dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+    @staticmethod
+    def _segment_hashes(tokens: List[str]) -> "np.ndarray":
+        """Polynomial hash (mod 2**64) of each token's code points, vectorized over all tokens."""
+
+        lengths = np.fromiter((len(token) for token in tokens), dtype="int64", count=len(tokens))
+        cps = np.frombuffer("".join(tokens).encode("utf-32-le"), dtype="<u4").astype("uint64")
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        # Horner's rule unrolled: sum(cp[j] * B**(len-1-j)) with wrap-around uint64 arithmetic.
+        exponents = np.repeat(starts + lengths - 1, lengths) - np.arange(len(cps))
+        powers = np.full(int(lengths.max()), _POLY_BASE, dtype="uint64")
+        powers[0] = 1
+        powers = np.cumprod(powers, dtype="uint64")
+        return np.add.reduceat(cps * powers[exponents], starts)
+
+    def _hash_embed_python(self, text: str) -> List[float]:
+        """Pure-Python twin of ``_hash_embed_batch`` used when NumPy is unavailable."""
+
+        features: List[int] = []
+        for token in _HASH_TOKEN_RE.findall((text or "").lower()):
+            if _CJK_RUN_RE.match(token):
+                cps = [ord(ch) for ch in token]
+                features.extend(_mix64(cp ^ _SALT_CJK_UNIGRAM) for cp in cps)
+                features.extend(
+                    _mix64(((a * _POLY_BASE + b) & _MASK64) ^ _SALT_CJK_BIGRAM) for a, b in zip(cps, cps[1:])
+                )
+            else:
+                value = 0
+                for ch in token:
+                    value = (value * _POLY_BASE + ord(ch)) & _MASK64
+                features.append(_mix64(value ^ _SALT_WORD))
+
+        vector = [0.0] * self.dimension
+        for feature in features:
+            vector[feature % self.dimension] += -1.0 if feature >> 63 else 1.0
         return self._normalize(vector)
 
     # ------------------------------------------------------------------
@@ -8,13 +8,15 @@ import time
 from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from loguru import logger
 
 from core.config import Config
+from research.embeddings.embedding_cache import cache_settings
 from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
-from research.vector_store.sqlite_vector_store import SQLiteVectorStore, VectorRecord
+from research.utils.segmentation import segmenter_from_config
+from research.vector_store.sqlite_vector_store import ContentUpdate, SQLiteVectorStore, VectorRecord
 
 
 def _default_config() -> Dict[str, int]:
@@ -23,12 +25,14 @@ def _default_config() -> Dict[str, int]:
         "chunk_min_tokens": 400,
         "chunk_overlap_tokens": 150,
         "document_chunk_tokens": 1200,
+        "comment_group_chars": 1500,
+        "comment_group_max": 25,
     }
 
 
 @dataclass
 class IndexerSettings:
-    embedding_version: int = 1
+    embedding_version: int = 2
     chunk_default_tokens: int = 750
     chunk_min_tokens: int = 400
     chunk_overlap_tokens: int = 150
@@ -37,6 +41,10 @@ class IndexerSettings:
     max_preview_chars: int = 320
     max_text_chars: int = 12000
     embedding_batch_size: int = 16
+    # Comments are indexed in groups of consecutive comments: a group closes
+    # once it reaches comment_group_chars or comment_group_max comments.
+    comment_group_chars: int = 1500
+    comment_group_max: int = 25
 
 
 @dataclass
@@ -51,6 +59,10 @@ class ChunkCandidate:
     text_preview: str = ""
     embedding: Optional[List[float]] = None
 
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
 
 class VectorIndexer:
     """Prepare chunked embeddings and persist them into the vector store."""
@@ -64,6 +76,8 @@ class VectorIndexer:
     ) -> None:
         self.config = config or Config()
         self.settings = self._load_settings()
+        # Chunk sizes and token spans count units of this segmenter
+        self.segmenter = segmenter_from_config(self.config)
 
         embedding_cfg = self._load_embedding_config()
         self.embedding_client = embedding_client or EmbeddingClient(embedding_cfg)
@@ -71,6 +85,9 @@ class VectorIndexer:
         self.vector_store = vector_store or SQLiteVectorStore(
             db_path=self._resolve_store_path(),
             embedding_dimension=embedding_cfg.dimension,
+            quantization=str(self.config.get("research.embeddings.store.quantization", "float32")),
+            segments=bool(self.config.get("research.embeddings.store.segments", True)),
+            readers=int(self.config.get("research.embeddings.store.readers", 4)),
         )
 
     # ------------------------------------------------------------------
@@ -81,7 +98,7 @@ class VectorIndexer:
         defaults = _default_config()
 
         return IndexerSettings(
-            embedding_version=int(embeddings_cfg.get("version", 1)),
+            embedding_version=int(embeddings_cfg.get("version", 2)),
             chunk_default_tokens=int(embeddings_cfg.get("chunk", {}).get("default_tokens", defaults["chunk_default_tokens"])),
             chunk_min_tokens=int(embeddings_cfg.get("chunk", {}).get("min_tokens", defaults["chunk_min_tokens"])),
             chunk_overlap_tokens=int(embeddings_cfg.get("chunk", {}).get("overlap_tokens", defaults["chunk_overlap_tokens"])),
@@ -90,6 +107,8 @@ class VectorIndexer:
             max_preview_chars=int(embeddings_cfg.get("max_preview_chars", 320)),
             max_text_chars=int(embeddings_cfg.get("max_text_chars", 12000)),
             embedding_batch_size=int(embeddings_cfg.get("batch_size", 16)),
+            comment_group_chars=int(embeddings_cfg.get("chunk", {}).get("comment_group_chars", defaults["comment_group_chars"])),
+            comment_group_max=int(embeddings_cfg.get("chunk", {}).get("comment_group_max", defaults["comment_group_max"])),
         )
 
     def _load_embedding_config(self) -> EmbeddingConfig:
@@ -103,6 +122,9 @@ class VectorIndexer:
             batch_size=int(embeddings_cfg.get("batch_size", 16)),
             timeout=int(embeddings_cfg.get("timeout", 45)),
             base_url=embeddings_cfg.get("base_url"),
+            max_concurrency=int(embeddings_cfg.get("max_concurrency", 4)),
+            max_retries=int(embeddings_cfg.get("max_retries", 2)),
+            **cache_settings(self.config),
         )
 
     def _resolve_store_path(self) -> Path:
@@ -112,81 +134,162 @@ class VectorIndexer:
         return path / "embeddings.sqlite"
 
     # ------------------------------------------------------------------
-    def index_batch(self, batch_id: str, batch_data: Dict[str, Dict[str, Any]]) -> None:
+    def index_batch(
+        self,
+        batch_id: str,
+        batch_data: Dict[str, Dict[str, Any]],
+        *,
+        content_only: bool = False,
+    ) -> None:
+        """Embed and store the chunks of every item in ``batch_data``.
+
+        With ``content_only`` summaries are ignored: only transcript and
+        comment chunks are indexed (without marker metadata), so the pass can
+        run while Phase 0 is still summarizing. Links already indexed with the
+        current model are left for the following full pass, which adds the
+        document chunk and reuses the unchanged chunks by hash.
+        """
+
         if not self.settings.enable_indexing:
             logger.info("[PHASE0-INDEX] Embedding indexing disabled via config; skipping batch %s", batch_id)
             return
 
         t0 = time.time()
-        logger.info("[PHASE0-INDEX] Starting embedding index for batch %s (%s items)", batch_id, len(batch_data))
+        logger.info(
+            "[PHASE0-INDEX] Starting %sembedding index for batch %s (%s items)",
+            "content-only " if content_only else "",
+            batch_id,
+            len(batch_data),
+        )
+
+        if content_only:
+            batch_data = {
+                link_id: {key: value for key, value in data.items() if key != "summary"}
+                for link_id, data in batch_data.items()
+            }
 
         # Determine which items need re-indexing by comparing checksums
         content_checksums = {
-            link_id: self._compute_checksum(data)
+            link_id: self._compute_checksum(data, content_only=content_only)
             for link_id, data in batch_data.items()
         }
 
-        status_map = self.vector_store.fetch_content_status(list(batch_data.keys()))
+        status_map = self.vector_store.fetch_content_status(list(batch_data.keys()), batch_id=batch_id)
 
         to_index: Dict[str, List[ChunkCandidate]] = {}
+        reusable: List[str] = []
+        reencoded = 0
         for link_id, data in batch_data.items():
             checksum = content_checksums.get(link_id)
             status = status_map.get(link_id)
+            same_model = status is not None and status.embedding_version == self.settings.embedding_version
 
-            if status and status.checksum == checksum and status.embedding_version == self.settings.embedding_version:
+            if content_only and same_model:
+                logger.debug("[PHASE0-INDEX] Deferring %s to the full pass (already indexed)", link_id)
+                continue
+            if same_model and status.encoding != self.vector_store.quantization:
+                # Same model: convert the stored vectors instead of re-embedding.
+                self.vector_store.reencode_link(link_id, batch_id=batch_id)
+                reencoded += 1
+            if same_model and status.checksum == checksum:
                 logger.debug("[PHASE0-INDEX] Skipping %s (checksum unchanged, version %s)", link_id, status.embedding_version)
                 continue
 
-            candidates = self._build_candidates(link_id, data, batch_id=batch_id)
+            candidates = self._build_candidates(link_id, data, batch_id=batch_id, include_document=not content_only)
             if not candidates:
                 logger.debug("[PHASE0-INDEX] No chunk candidates generated for %s", link_id)
                 continue
 
             to_index[link_id] = candidates
+            if same_model:
+                reusable.append(link_id)
+
+        if reencoded:
+            logger.info(
+                "[PHASE0-INDEX] Re-encoded %s items as %s for batch %s",
+                reencoded,
+                self.vector_store.quantization,
+                batch_id,
+            )
 
         if not to_index:
             logger.info("[PHASE0-INDEX] All content already indexed; nothing to do for batch %s", batch_id)
             return
 
+        # Chunks whose text hash matches the stored row keep their vector;
+        # only new or changed chunks are embedded.
+        stored_hashes = self.vector_store.fetch_chunk_hashes(reusable, batch_id=batch_id)
+        unchanged: Dict[str, List[str]] = {}
+        all_candidates: List[ChunkCandidate] = []
+        for link_id, candidates in to_index.items():
+            link_hashes = stored_hashes.get(link_id, {})
+            for c in candidates:
+                if link_hashes.get(c.chunk_id) == c.content_hash:
+                    unchanged.setdefault(link_id, []).append(c.chunk_id)
+                else:
+                    all_candidates.append(c)
+
         # Embed candidates in batches
-        all_candidates = [c for cand_list in to_index.values() for c in cand_list]
         self._embed_candidates(all_candidates)
 
-        # Persist per content item
-        for link_id, candidates in to_index.items():
-            checksum = content_checksums[link_id]
-            records = [
-                VectorRecord(
-                    chunk_id=c.chunk_id,
-                    link_id=c.link_id,
-                    chunk_index=c.chunk_index,
-                    chunk_type=c.chunk_type,
-                    scale=c.scale,
-                    embedding=c.embedding or [],
-                    text_preview=c.text_preview,
-                    metadata=c.metadata,
-                )
-                for c in candidates
-            ]
-
-            self.vector_store.replace_content_embeddings(
+        # Persist every content item in one transaction
+        updates = [
+            ContentUpdate(
                 link_id=link_id,
-                records=records,
-                checksum=checksum,
-                embedding_version=self.settings.embedding_version,
+                records=[
+                    VectorRecord(
+                        chunk_id=c.chunk_id,
+                        link_id=c.link_id,
+                        chunk_index=c.chunk_index,
+                        chunk_type=c.chunk_type,
+                        scale=c.scale,
+                        embedding=c.embedding or [],
+                        text_preview=c.text_preview,
+                        metadata=c.metadata,
+                        content_hash=c.content_hash,
+                        text=c.text,
+                    )
+                    for c in candidates
+                ],
+                checksum=content_checksums[link_id],
+                unchanged_chunk_ids=unchanged.get(link_id, ()),
             )
+            for link_id, candidates in to_index.items()
+        ]
+        self.vector_store.bulk_replace_content_embeddings(
+            updates,
+            embedding_version=self.settings.embedding_version,
+            batch_id=batch_id,
+        )
+        if self.vector_store.segments and not content_only:
+            # Refresh the memory-mapped copy so Phase 3 processes start warm.
+            self.vector_store.export_segments([batch_id])
 
         elapsed = time.time() - t0
         logger.info(
-            "[PHASE0-INDEX] Finished embedding index for batch %s in %.2fs (indexed %s items)",
+            "[PHASE0-INDEX] Finished embedding index for batch %s in %.2fs (indexed %s items, embedded %s chunks, reused %s)",
             batch_id,
             elapsed,
             len(to_index),
+            len(all_candidates),
+            sum(len(ids) for ids in unchanged.values()),
         )
+        cache_stats = self.embedding_client.cache_stats() if hasattr(self.embedding_client, "cache_stats") else {}
+        if cache_stats:
+            logger.info(
+                "[PHASE0-INDEX] Embedding cache: hits=%s misses=%s hit_rate=%.2f entries=%s",
+                cache_stats["hits"],
+                cache_stats["misses"],
+                cache_stats["hit_rate"],
+                cache_stats["entries"],
+            )
 
     # ------------------------------------------------------------------
     def _embed_candidates(self, candidates: List[ChunkCandidate]) -> None:
+        # Hand the client enough texts per call to keep all of its concurrent
+        # sub-batch workers busy; it splits them by its own batch_size.
         batch_size = max(1, min(self.settings.embedding_batch_size, self.embedding_client.batch_size))
+        batch_size *= max(1, int(getattr(self.embedding_client, "max_concurrency", 1)))
         texts: List[str] = []
         bucket: List[ChunkCandidate] = []
 
@@ -207,7 +310,14 @@ class VectorIndexer:
                 cand.embedding = emb
 
     # ------------------------------------------------------------------
-    def _build_candidates(self, link_id: str, data: Dict[str, Any], *, batch_id: str) -> List[ChunkCandidate]:
+    def _build_candidates(
+        self,
+        link_id: str,
+        data: Dict[str, Any],
+        *,
+        batch_id: str,
+        include_document: bool = True,
+    ) -> List[ChunkCandidate]:
         candidates: List[ChunkCandidate] = []
         metadata_base = {
             "link_id": link_id,
@@ -221,7 +331,7 @@ class VectorIndexer:
         summary = data.get("summary") or {}
 
         # Document-level summary chunk (coarse)
-        document_text = self._build_document_text(transcript, summary)
+        document_text = self._build_document_text(transcript, summary) if include_document else ""
         if document_text:
             chunk_id = f"{link_id}::doc"
             candidates.append(
@@ -239,25 +349,23 @@ class VectorIndexer:
 
         # Transcript chunks (fine)
         if transcript:
-            tokens = transcript.split()
+            tokens = self.segmenter.segment(transcript)
             chunk_size = max(self.settings.chunk_min_tokens, self.settings.chunk_default_tokens)
             overlap = min(self.settings.chunk_overlap_tokens, max(1, int(chunk_size * 0.25)))
             stride = max(1, chunk_size - overlap)
 
             for idx, start in enumerate(range(0, len(tokens), stride)):
                 end = min(len(tokens), start + chunk_size)
-                chunk_tokens = tokens[start:end]
-                if len(chunk_tokens) < self.settings.chunk_min_tokens and idx != 0 and candidates:
+                if end - start < self.settings.chunk_min_tokens and idx != 0 and candidates:
                     # merge with previous chunk text to avoid tiny tail
                     previous = candidates[-1]
                     previous_span = list(previous.metadata.get("token_span", [0, start]))
-                    previous_text = f"{previous.text} {' '.join(chunk_tokens)}"
-                    previous.text = self._clip_text(previous_text)
+                    previous.text = self._clip_text(tokens.slice(previous_span[0], end))
                     previous.text_preview = previous.text[: self.settings.max_preview_chars]
                     previous.metadata["token_span"] = [previous_span[0], end]
                     break
 
-                chunk_text = " ".join(chunk_tokens)
+                chunk_text = tokens.slice(start, end)
                 chunk_id = f"{link_id}::transcript::{idx}"
                 metadata = {
                     **metadata_base,
@@ -282,24 +390,31 @@ class VectorIndexer:
                 if end >= len(tokens):
                     break
 
-        # Comments chunk (optional, treat as coarse)
+        # Comment groups (fine); consecutive comments so that appended comments
+        # only change the last group's hash
         if comments:
-            comments_text = self._build_comments_text(comments)
-            if comments_text:
-                chunk_id = f"{link_id}::comments"
+            marker_types = list(self._collect_marker_types(summary.get("comments_summary", {})))
+            for idx, group in enumerate(self._group_comments(comments)):
+                comments_text = "\n".join(line for _, line, _, _ in group)
+                likes = [like for _, _, like, _ in group]
                 candidates.append(
                     ChunkCandidate(
                         link_id=link_id,
-                        chunk_id=chunk_id,
-                        chunk_index=-1,
+                        chunk_id=f"{link_id}::comments::{idx}",
+                        chunk_index=idx,
                         chunk_type="comments",
-                        scale="coarse",
+                        scale="fine",
                         text=self._clip_text(comments_text),
                         text_preview=comments_text[: self.settings.max_preview_chars],
                         metadata={
                             **metadata_base,
                             "chunk_scope": "comments",
-                            "marker_types": list(self._collect_marker_types(summary.get("comments_summary", {}))),
+                            "comment_span": [group[0][0], group[-1][0] + 1],
+                            "comment_count": len(group),
+                            "likes": sum(likes),
+                            "max_likes": max(likes),
+                            "replies": sum(replies for _, _, _, replies in group),
+                            "marker_types": marker_types,
                         },
                     )
                 )
@@ -332,36 +447,68 @@ class VectorIndexer:
                 if isinstance(values, list) and values:
                     parts.extend(str(v) for v in values[:10])
 
-        if transcript and len(transcript.split()) < self.settings.document_chunk_tokens:
+        tokens = self.segmenter.segment(transcript) if transcript else None
+        if tokens is not None and len(tokens) < self.settings.document_chunk_tokens:
             parts.append(transcript)
-        elif transcript:
-            tokens = transcript.split()
-            head = tokens[: self.settings.document_chunk_tokens]
-            tail = tokens[-self.settings.document_chunk_tokens :]
-            parts.append(" ".join(head + ["..."] + tail))
+        elif tokens is not None:
+            size = self.settings.document_chunk_tokens
+            parts.append(f"{tokens.slice(0, size)} ... {tokens.slice(len(tokens) - size, len(tokens))}")
 
         document_text = "\n".join(parts).strip()
         return self._clip_text(document_text)
 
     @staticmethod
-    def _build_comments_text(comments: Iterable) -> str:
-        lines: List[str] = []
+    def _comment_line(idx: int, comment: Any) -> Tuple[str, int, int]:
+        """Render one comment as ``(line, likes, replies)``."""
+
+        if isinstance(comment, dict):
+            content = comment.get("content") or comment.get("text") or ""
+            likes = VectorIndexer._as_count(comment.get("likes"))
+            replies = VectorIndexer._as_count(comment.get("replies"))
+            return f"[{idx}] (likes:{likes}, replies:{replies}) {content}", likes, replies
+        return f"[{idx}] {comment}", 0, 0
+
+    @staticmethod
+    def _as_count(value: Any) -> int:
+        try:
+            return max(0, int(value or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def _group_comments(self, comments: Iterable) -> List[List[Tuple[int, str, int, int]]]:
+        """Split comments into runs of ``(index, line, likes, replies)``.
+
+        Group size adapts to comment length: short comments are packed up to
+        ``comment_group_max`` per group, long ones close a group after
+        ``comment_group_chars`` characters (a single longer comment forms its
+        own group).
+        """
+
+        groups: List[List[Tuple[int, str, int, int]]] = []
+        current: List[Tuple[int, str, int, int]] = []
+        size = 0
         for idx, comment in enumerate(comments):
-            if isinstance(comment, dict):
-                content = comment.get("content") or comment.get("text") or ""
-                likes = comment.get("likes", 0)
-                replies = comment.get("replies", 0)
-                lines.append(f"[{idx}] (likes:{likes}, replies:{replies}) {content}")
-            else:
-                lines.append(f"[{idx}] {comment}")
-        return "\n".join(lines)
-
-    def _compute_checksum(self, data: Dict[str, any]) -> str:
+            line, likes, replies = self._comment_line(idx, comment)
+            if current and (
+                size + len(line) > self.settings.comment_group_chars
+                or len(current) >= self.settings.comment_group_max
+            ):
+                groups.append(current)
+                current, size = [], 0
+            current.append((idx, line, likes, replies))
+            size += len(line) + 1
+        if current:
+            groups.append(current)
+        return groups
+
+    def _compute_checksum(self, data: Dict[str, any], *, content_only: bool = False) -> str:
         payload = {
             "transcript": data.get("transcript") or "",
             "comments": data.get("comments") or [],
             "summary": data.get("summary") or {},
         }
         serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True)
-        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        # Never equal to a full-pass checksum, so the full pass always revisits the link.
+        return f"content-only:{digest}" if content_only else digest
 
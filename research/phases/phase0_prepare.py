@@ -8,8 +8,10 @@ from research.data_loader import ResearchDataLoader
 from core.config import Config
 
 try:
+    from research.embeddings.background_indexer import BackgroundIndexJob
     from research.embeddings.vector_indexer import VectorIndexer
 except Exception:  # pragma: no cover - optional dependency during bootstrap
+    BackgroundIndexJob = None  # type: ignore
     VectorIndexer = None  # type: ignore
 
 
@@ -39,6 +41,11 @@ class Phase0Prepare(BasePhase):
             "research.summarization.reuse_existing_summaries",
             True  # Default to reusing existing summaries
         )
+        # Index content chunks on a worker thread while summarization runs
+        self.background_indexing = self.config.get(
+            "research.embeddings.background",
+            True
+        )
     
     def execute(self, batch_id: str) -> Dict[str, Any]:
         """
@@ -68,18 +75,26 @@ class Phase0Prepare(BasePhase):
             elif flag["severity"] == "error":
                 self.logger.error(f"Data quality: {flag['message']}")
         
+        # Transcript/comment chunks don't depend on summaries: start embedding them now
+        index_job = self._start_background_indexing(batch_id, batch_data)
+
         # NEW: Summarize content items using qwen-flash to create markers
-        if self.summarization_enabled:
-            try:
-                self.logger.info("Phase 0: Creating content summaries with markers (qwen-flash)")
-                batch_data = self._summarize_content_items(batch_data, batch_id)
-                
-                # Save summaries to JSON files if enabled
-                if self.save_summaries_to_files:
-                    self._save_summaries_to_files(batch_id, batch_data)
-            except Exception as e:
-                self.logger.error(f"Failed to create content summaries: {e}")
-                self.logger.warning("Continuing without summaries - markers will not be available")
+        try:
+            if self.summarization_enabled:
+                try:
+                    self.logger.info("Phase 0: Creating content summaries with markers (qwen-flash)")
+                    batch_data = self._summarize_content_items(batch_data, batch_id)
+
+                    # Save summaries to JSON files if enabled
+                    if self.save_summaries_to_files:
+                        self._save_summaries_to_files(batch_id, batch_data)
+                except Exception as e:
+                    self.logger.error(f"Failed to create content summaries: {e}")
+                    self.logger.warning("Continuing without summaries - markers will not be available")
+        finally:
+            # Always release the worker so the batch's readiness signal gets set
+            if index_job is not None:
+                index_job.submit_summaries(batch_data)
         
         # Create abstracts for each content item (enhancement #3: intelligent sampling)
         abstracts = {}
@@ -103,22 +118,20 @@ class Phase0Prepare(BasePhase):
         }
 
         # Vector indexing (Phase 0 → vector store)
-        if VectorIndexer is not None and self.config.get("research.embeddings.enable", True):
-            if self._vector_indexer is None:
-                try:
-                    self._vector_indexer = VectorIndexer(config=self.config)
-                except Exception as exc:
-                    self.logger.warning("Vector indexer initialization failed: %s", exc)
-                    self._vector_indexer = None
-
-            if self._vector_indexer:
-                try:
-                    self.logger.info("Phase 0: Indexing embeddings for batch %s", batch_id)
-                    self._vector_indexer.index_batch(batch_id, batch_data)
-                    result["vector_indexed"] = True
-                except Exception as exc:
-                    self.logger.error("Phase 0 vector indexing failed: %s", exc, exc_info=True)
-                    result["vector_indexed"] = False
+        if index_job is not None:
+            # The worker finishes the summary-dependent chunks; Phase 3 waits on
+            # background_indexer.wait_for_batch() before searching this batch.
+            self.logger.info("Phase 0: Embedding index for batch %s continues in the background", batch_id)
+            result["vector_indexed"] = False
+            result["vector_indexing"] = "background"
+        elif self._get_vector_indexer() is not None:
+            try:
+                self.logger.info("Phase 0: Indexing embeddings for batch %s", batch_id)
+                self._vector_indexer.index_batch(batch_id, batch_data)
+                result["vector_indexed"] = True
+            except Exception as exc:
+                self.logger.error("Phase 0 vector indexing failed: %s", exc, exc_info=True)
+                result["vector_indexed"] = False
         else:
             result["vector_indexed"] = False
         
@@ -128,6 +141,29 @@ class Phase0Prepare(BasePhase):
         )
         
         return result
+
+    def _get_vector_indexer(self) -> Optional[VectorIndexer]:
+        if VectorIndexer is None or not self.config.get("research.embeddings.enable", True):
+            return None
+        if self._vector_indexer is None:
+            try:
+                self._vector_indexer = VectorIndexer(config=self.config)
+            except Exception as exc:
+                self.logger.warning("Vector indexer initialization failed: %s", exc)
+                self._vector_indexer = None
+        return self._vector_indexer
+
+    def _start_background_indexing(self, batch_id: str, batch_data: Dict[str, Any]) -> Optional["BackgroundIndexJob"]:
+        if BackgroundIndexJob is None or not self.background_indexing:
+            return None
+        indexer = self._get_vector_indexer()
+        if indexer is None:
+            return None
+        try:
+            return BackgroundIndexJob(indexer, batch_id, batch_data).start()
+        except Exception as exc:
+            self.logger.warning("Background vector indexing could not start: %s", exc)
+            return None
     
     def _summarize_content_items(
         self, 
@@ -348,6 +384,14 @@ class Phase0Prepare(BasePhase):
                             message=f"摘要创建失败 [{idx}/{total_items}]: {link_id}"
                         )
         
+        # Reused summaries may predate marker anchors (or the transcript changed)
+        anchored = 0
+        for data in batch_data.values():
+            if data.get("summary") and summarizer.add_marker_anchors(data["summary"], data.get("transcript")):
+                anchored += 1
+        if anchored:
+            self.logger.info(f"[PHASE0-INDEX] Built marker anchors for {anchored} reused summaries")
+        
         # Send final completion update
         if hasattr(self, 'ui') and self.ui:
             if hasattr(self.ui, 'display_summarization_progress'):
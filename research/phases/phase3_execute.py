@@ -4,12 +4,15 @@ import json
 import re
 import time
 from collections import defaultdict
-from typing import Dict, Any, List, Optional, Set, Iterable
+from typing import Dict, Any, List, Optional, Set, Iterable, Tuple
 from research.phases.base_phase import BasePhase
 from research.data_loader import ResearchDataLoader
 from research.prompts import compose_messages, load_schema
 from research.prompts.context_formatters import format_research_role_for_context
 from research.retrieval_handler import RetrievalHandler
+from research.retrieval.comment_index import shared_comment_indexes
+from research.retrieval.transcript_index import shared_transcript_indexes, transcript_index
+from research.utils.segmentation import segmenter_from_config
 from core.config import Config
 from research.utils.marker_formatter import format_marker_overview
 from research.retrieval.vector_retrieval_service import (
@@ -17,6 +20,7 @@ from research.retrieval.vector_retrieval_service import (
     RetrievalFilters,
     VectorSearchResult,
 )
+from research.embeddings.embedding_cache import cache_settings
 from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
 from research.session import StepDigest
 
@@ -54,6 +58,13 @@ class Phase3Execute(BasePhase):
         self._min_total_followup_chars = cfg.get_int("research.retrieval.min_total_followup_chars", 1500)
         self._max_total_followup_chars = cfg.get_int("research.retrieval.max_total_followup_chars", 20000)
         self._enable_cache = bool(cfg.get("research.retrieval.enable_cache", True))
+        # Per-link word and comment indexes shared by every retrieval request, step and rerun
+        self._transcript_indexes = shared_transcript_indexes(
+            cfg.get_int("research.retrieval.transcript_index_mb", 256)
+        )
+        self._comment_indexes = shared_comment_indexes(cfg.get_int("research.retrieval.comment_index_mb", 128))
+        # Unit behind word ranges, windows and word counts (CJK-aware by default)
+        self._segmenter = segmenter_from_config(cfg)
         # Never truncate items flag (new: marker-based approach)
         self._never_truncate_items = cfg.get_bool("research.retrieval.never_truncate_items", True)
         # Max transcript chars (0 = no limit, let API handle token limits)
@@ -63,6 +74,9 @@ class Phase3Execute(BasePhase):
         self._vector_min_chars = cfg.get_int("research.retrieval.vector_first.min_appended_chars", 600)
         self._vector_window_cap = cfg.get_int("research.retrieval.vector_first.max_sequential_windows", 3)
         self._vector_block_chars = cfg.get_int("research.retrieval.vector_first.max_block_chars", 800)
+        # Semantic hits carry their full stored chunk text, up to this many chars per block
+        self._vector_full_text = cfg.get_bool("research.retrieval.vector_first.full_text", True)
+        self._vector_text_chars = cfg.get_int("research.retrieval.vector_first.max_text_chars", 4000)
         self._vector_top_k = cfg.get_int("research.retrieval.vector_first.top_k", 12)
         self._vector_max_rounds = cfg.get_int("research.retrieval.vector_first.max_rounds", 3)
         self._vector_debug_logs = bool(cfg.get("research.retrieval.vector_first.debug_logs", False))
@@ -80,7 +94,10 @@ class Phase3Execute(BasePhase):
 
         # Vector retrieval service
         try:
-            self.vector_service: Optional[VectorRetrievalService] = VectorRetrievalService(config=cfg)
+            self.vector_service: Optional[VectorRetrievalService] = VectorRetrievalService(
+                config=cfg,
+                batch_id=self.session.get_metadata("batch_id") if self.session else None,
+            )
         except Exception as exc:
             self.logger.warning("Vector retrieval service unavailable: %s", exc)
             self.vector_service = None
@@ -122,6 +139,7 @@ class Phase3Execute(BasePhase):
             batch_size=int(embedding_batch_size or 16),
             timeout=int(embedding_timeout or 45),
             base_url=embedding_base_url,
+            **cache_settings(cfg),
         )
         try:
             self._embedding_client: Optional[EmbeddingClient] = EmbeddingClient(novelty_embedding_cfg)
@@ -200,7 +218,11 @@ class Phase3Execute(BasePhase):
             # Log step configuration and batch stats for debugging
             try:
                 transcripts_count = sum(1 for d in batch_data.values() if d.get("transcript"))
-                total_words = sum(len((d.get("transcript") or "").split()) for d in batch_data.values())
+                total_words = sum(
+                    len(transcript_index(self._transcript_indexes, link_id, d["transcript"], self._segmenter))
+                    for link_id, d in batch_data.items()
+                    if d.get("transcript")
+                )
                 total_items = len(batch_data)
                 chunk_size = step.get("chunk_size", self._window_words)
                 self.logger.info(
@@ -359,7 +381,7 @@ class Phase3Execute(BasePhase):
         transcript_content, source_info = self._get_transcript_content(
             batch_data, "sequential", chunk_size
         )
-        words = transcript_content.split()
+        words = self._segmenter.segment(transcript_content)
         n = len(words)
         if n == 0:
             # Fallback to normal single-call path with whatever is available
@@ -419,7 +441,7 @@ class Phase3Execute(BasePhase):
         # Do not call progress_tracker per window; handle at the caller level
         while window_start < n and windows_processed < (max_windows or 8):
             window_end = min(n, window_start + chunk_size)
-            window_text = " ".join(words[window_start:window_end])
+            window_text = words.slice(window_start, window_end)
 
             # Progress logging per window
             try:
@@ -671,11 +693,14 @@ class Phase3Execute(BasePhase):
                 return False
         return True
 
-    def _limit_block(self, text: str, *, max_chars: Optional[int] = None) -> str:
+    def _limit_block(self, text: str, *, max_chars: Optional[int] = None, block_chars: Optional[int] = None) -> str:
+        """Truncate a retrieval block; ``block_chars`` replaces the vector_first block cap."""
         if not isinstance(text, str):
             text = str(text or "")
         configured_limit = max_chars if isinstance(max_chars, int) and max_chars > 0 else 0
-        default_block = self._vector_block_chars if isinstance(self._vector_block_chars, int) else 0
+        if block_chars is None:
+            block_chars = self._vector_block_chars
+        default_block = block_chars if isinstance(block_chars, int) else 0
         item_limit = self._max_chars_per_item if isinstance(self._max_chars_per_item, int) else 0
         total_cap = self._max_total_followup_chars if isinstance(self._max_total_followup_chars, int) else 0
         candidates = [configured_limit, default_block, item_limit, total_cap]
@@ -686,13 +711,36 @@ class Phase3Execute(BasePhase):
             return text
         return text[: limit - 20].rstrip() + "\n...[内容截断]"
 
+    def _semantic_block_chars(self, req: Dict[str, Any]) -> Optional[int]:
+        """Block cap for semantic requests answered with full chunk text (None: default cap)."""
+        request_type = req.get("request_type", req.get("method"))
+        if not self._vector_full_text or (request_type not in {"semantic", "vector"} and req.get("method") != "semantic"):
+            return None
+        return self._vector_text_chars
+
+    def _fetch_chunk_texts(self, results: List[VectorSearchResult]) -> Dict[Tuple[str, str], str]:
+        if not self._vector_full_text or not results or not hasattr(self.vector_service, "fetch_texts"):
+            return {}
+        try:
+            return self.vector_service.fetch_texts(results)
+        except Exception as exc:
+            self.logger.warning("[PHASE3-VECTOR] Falling back to previews; chunk text fetch failed: %s", exc)
+            return {}
+
     def _summarize_vector_results(
         self,
         query: str,
         results: List[VectorSearchResult],
         *,
         max_chars: Optional[int] = None,
+        texts: Optional[Dict[Tuple[str, str], str]] = None,
     ) -> str:
+        """Render hits grouped by link.
+
+        With ``texts`` (full chunk bodies keyed by ``(batch_id, chunk_id)``)
+        each hit shows its exact text; the last body that does not fit is cut
+        at the budget. Otherwise a 280-char preview snippet is shown.
+        """
         if not results:
             return "(No semantic matches found)"
         limit = max_chars or self._vector_block_chars or 1500
@@ -715,11 +763,13 @@ class Phase3Execute(BasePhase):
             used += len(link_header) + 1
 
             for res in top:
-                snippet_raw = res.text_preview or ""
-                snippet = re.sub(r"\s+", " ", snippet_raw).strip()
+                body = texts.get((res.batch_id, res.chunk_id)) if texts else None
+                if body:
+                    snippet = body.strip()
+                else:
+                    snippet = re.sub(r"\s+", " ", res.text_preview or "").strip()[:280]
                 if not snippet:
                     continue
-                snippet = snippet[:280]
                 metadata_bits: List[str] = []
                 chunk_type = res.metadata.get("chunk_type")
                 if chunk_type:
@@ -727,9 +777,16 @@ class Phase3Execute(BasePhase):
                 chunk_index = res.metadata.get("chunk_index")
                 if chunk_index is not None:
                     metadata_bits.append(f"idx={chunk_index}")
+                if res.metadata.get("comment_count"):
+                    metadata_bits.append(f"comments={res.metadata['comment_count']}")
+                    metadata_bits.append(f"likes={res.metadata.get('likes', 0)}")
                 meta_label = f"[{', '.join(metadata_bits)}]" if metadata_bits else ""
                 bullet = f"    • {meta_label} {snippet}"
                 if used + len(bullet) + 1 > limit:
+                    remaining = limit - used - 1
+                    if body and remaining >= 200:
+                        lines.append(bullet[: remaining - 6].rstrip() + " …")
+                        used = limit
                     break
                 lines.append(bullet)
                 used += len(bullet) + 1
@@ -1225,8 +1282,7 @@ class Phase3Execute(BasePhase):
         
         # Apply chunking strategy
         if chunk_strategy == "sequential":
-            words = combined.split()
-            total_words = len(words)
+            total_words = self._segmenter.count(combined)
             
             # Check if we need to chunk (only if larger than chunk_size)
             if total_words <= chunk_size:
@@ -1726,7 +1782,7 @@ class Phase3Execute(BasePhase):
         vector_round_cap: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Run up to N follow-up turns with normalized, deduped, cached retrieval and size controls."""
-        retriever = RetrievalHandler()
+        retriever = RetrievalHandler(self._transcript_indexes, self._segmenter, self._comment_indexes)
         
         # Get batch_data from session if not provided
         if batch_data is None:
@@ -1854,7 +1910,7 @@ class Phase3Execute(BasePhase):
             max_chars_override = None
             if req.get("request_type") == "full_content_item":
                 max_chars_override = self._max_total_followup_chars or max(4000, (self._vector_block_chars or 800) * 4)
-            block = self._limit_block(block, max_chars=max_chars_override)
+            block = self._limit_block(block, max_chars=max_chars_override, block_chars=self._semantic_block_chars(req))
             block = _clip(block)
             if self._enable_cache:
                 self._retrieval_cache[key] = block
@@ -1902,6 +1958,8 @@ class Phase3Execute(BasePhase):
                     pass
 
             # Fetch all blocks
+            if allow_vector:
+                self._prefetch_semantic(pending, step_id=step_id)
             blocks: List[str] = []
             total_chars = 0
             for req in pending:
@@ -2609,7 +2667,7 @@ class Phase3Execute(BasePhase):
         if not requests:
             return ""
         
-        retriever = RetrievalHandler()
+        retriever = RetrievalHandler(self._transcript_indexes, self._segmenter, self._comment_indexes)
         
         # Get batch_data from session if not provided
         if batch_data is None:
@@ -2734,7 +2792,7 @@ class Phase3Execute(BasePhase):
             max_chars_override = None
             if req.get("request_type") == "full_content_item":
                 max_chars_override = self._max_total_followup_chars or max(4000, (self._vector_block_chars or 800) * 4)
-            block = self._limit_block(block, max_chars=max_chars_override)
+            block = self._limit_block(block, max_chars=max_chars_override, block_chars=self._semantic_block_chars(req))
             block = _clip(block)
             if self._enable_cache:
                 self._retrieval_cache[key] = block
@@ -2763,6 +2821,8 @@ class Phase3Execute(BasePhase):
             normalized_requests = final_requests
         
         # Retrieve all blocks
+        if allow_vector:
+            self._prefetch_semantic(normalized_requests, step_id=step_id)
         blocks: List[str] = []
         total_chars = 0
         for req in normalized_requests:
@@ -2865,6 +2925,72 @@ class Phase3Execute(BasePhase):
             )
         return requests
 
+    def _semantic_search_args(self, req: Dict[str, Any]) -> Tuple[str, RetrievalFilters, int]:
+        """Return the (query, filters, top_k) a semantic request will search with."""
+        params = req.get("parameters") or {}
+        if not isinstance(params, dict):
+            params = {}
+        query = (
+            params.get("query")
+            or req.get("query")
+            or req.get("marker_text")
+            or req.get("topic")
+            or ""
+        )
+        link_id = req.get("source_link_id") or req.get("source")
+        link_filters = req.get("source_link_ids") or ([] if not link_id else [link_id])
+        chunk_types = req.get("chunk_types")
+        if not chunk_types and req.get("content_type") == "comments":
+            # Comments are indexed as groups: a comment request is a top-k lookup over them.
+            chunk_types = ["comments"]
+        filters = RetrievalFilters(
+            link_ids=link_filters or None,
+            chunk_types=chunk_types,
+        )
+        top_k = params.get("top_k") or self._vector_top_k
+        return str(query), filters, int(top_k)
+
+    def _prefetch_semantic(self, requests: List[Dict[str, Any]], step_id: Optional[int] = None) -> None:
+        """Run a round's semantic requests through one batched search.
+
+        Results land in the vector service cache, so the per-request handling
+        in _handle_retrieval_request is served without further embedding or
+        store passes.
+        """
+        if not self._has_vector_service() or not hasattr(self.vector_service, "search_many"):
+            return
+        by_top_k: Dict[int, List[Tuple[str, RetrievalFilters]]] = {}
+        for req in requests:
+            request_type = req.get("request_type", req.get("method"))
+            if request_type not in {"semantic", "vector"} and req.get("method") != "semantic":
+                continue
+            query, filters, top_k = self._semantic_search_args(req)
+            if query:
+                by_top_k.setdefault(top_k, []).append((query, filters))
+        for top_k, specs in by_top_k.items():
+            if len(specs) < 2:
+                continue
+            search_start = time.perf_counter()
+            try:
+                self.vector_service.search_many(
+                    [query for query, _ in specs],
+                    filters=[filters for _, filters in specs],
+                    top_k=top_k,
+                )
+            except Exception as exc:
+                self.logger.warning("[PHASE3-VECTOR] Batched semantic prefetch failed: %s", exc)
+                return
+            latency_ms = (time.perf_counter() - search_start) * 1000.0
+            self.logger.info(
+                "[PHASE3-VECTOR] step=%s batched %s semantic queries in %.1fms",
+                step_id,
+                len(specs),
+                latency_ms,
+            )
+            if step_id is not None:
+                self._increment_step_stat(step_id, "vector_batched_queries", len(specs))
+                self._increment_step_stat(step_id, "vector_latency_ms", latency_ms)
+
     def _handle_retrieval_request(
         self,
         req: Dict[str, Any],
@@ -2896,13 +3022,7 @@ class Phase3Execute(BasePhase):
         if request_type in {"semantic", "vector"} or req.get("method") == "semantic":
             if not isinstance(params, dict):
                 params = dict(params) if params else {}
-            query = (
-                params.get("query")
-                or req.get("query")
-                or req.get("marker_text")
-                or req.get("topic")
-                or ""
-            )
+            query, filters, top_k = self._semantic_search_args(req)
             if not query:
                 return "[Retrieval] Error: Missing query for semantic request"
 
@@ -2912,15 +3032,8 @@ class Phase3Execute(BasePhase):
             else:
                 fallback_keywords = [str(k) for k in fallback_keywords_raw if k]
             context_window = int(params.get("context_window", 500))
+            link_filters = filters.link_ids or []
 
-            link_filters = req.get("source_link_ids") or ([] if not link_id else [link_id])
-            filters = RetrievalFilters(
-                link_ids=link_filters or None,
-                chunk_types=req.get("chunk_types"),
-            )
-
-            top_k_param = params.get("top_k") if isinstance(params, dict) else None
-            top_k = top_k_param or self._vector_top_k
             try:
                 step_context = req.get("step_id") or req.get("source_step_id")
                 self.logger.info(
@@ -2940,7 +3053,15 @@ class Phase3Execute(BasePhase):
             latency_ms = 0.0
             if self._has_vector_service():
                 search_start = time.perf_counter()
-                vector_results = self.vector_service.search(query, filters=filters, top_k=top_k)
+                if getattr(self.vector_service, "hybrid_enabled", False):
+                    # BM25 over the FTS index rescues exact names and numbers that
+                    # cosine similarity ranks poorly; the fallback keywords
+                    # count as phrases there.
+                    vector_results = self.vector_service.search_hybrid(
+                        query, keywords=fallback_keywords, filters=filters, top_k=top_k
+                    )
+                else:
+                    vector_results = self.vector_service.search(query, filters=filters, top_k=top_k)
                 latency_ms = (time.perf_counter() - search_start) * 1000.0
                 if step_id is not None:
                     self._increment_step_stat(step_id, "vector_calls", 1)
@@ -2976,6 +3097,14 @@ class Phase3Execute(BasePhase):
                     if fresh:
                         seen_chunks.update(res.chunk_id for res in fresh)
                         filtered_results = fresh
+                texts = self._fetch_chunk_texts(filtered_results)
+                if texts:
+                    formatted = self._summarize_vector_results(
+                        query, filtered_results, max_chars=self._vector_text_chars, texts=texts
+                    )
+                    if step_id is not None:
+                        self._increment_step_stat(step_id, "vector_text_chars", len(formatted))
+                    return self._limit_block(f"{block_header}\n{formatted}", block_chars=self._vector_text_chars)
                 formatted = self._summarize_vector_results(query, filtered_results, max_chars=self._vector_block_chars)
                 return self._limit_block(f"{block_header}\n{formatted}")
 
@@ -3007,6 +3136,9 @@ class Phase3Execute(BasePhase):
             if not link_id:
                 return "[Retrieval] Error: Missing source_link_id for full_content_item"
             content = retriever.retrieve_full_content_item(link_id, content_types, batch_data)
+            if step_id is not None:
+                self._increment_step_stat(step_id, "full_content_requests", 1)
+                self._increment_step_stat(step_id, "full_content_chars", len(content))
             return f"{block_header}\n{content}"
         
         elif request_type == "by_marker":
@@ -3124,9 +3256,13 @@ class Phase3Execute(BasePhase):
                 "vector_empty": 0,
                 "vector_results_returned": 0,
                 "vector_latency_ms": 0.0,
+                "vector_batched_queries": 0,
                 "vector_best_score": 0.0,
                 "sequential_windows": 0,
                 "vector_appended_chars": 0,
+                "vector_text_chars": 0,
+                "full_content_requests": 0,
+                "full_content_chars": 0,
                 "vector_followup_turns": 0,
                 "novelty_candidates": 0,
                 "novelty_duplicates_removed": 0,
@@ -3149,17 +3285,33 @@ class Phase3Execute(BasePhase):
         if not stats:
             return
         self.logger.info(
-            "[PHASE3-STEP] step=%s vector_calls=%s hits=%s empty=%s seq_windows=%s appended_chars=%s followups=%s latency_ms=%.1f best_score=%.3f",
+            "[PHASE3-STEP] step=%s vector_calls=%s hits=%s empty=%s seq_windows=%s appended_chars=%s "
+            "chunk_text_chars=%s full_content_requests=%s full_content_chars=%s followups=%s latency_ms=%.1f best_score=%.3f",
             step_id,
             int(stats.get("vector_calls", 0)),
             int(stats.get("vector_hits", 0)),
             int(stats.get("vector_empty", 0)),
             int(stats.get("sequential_windows", 0)),
             int(stats.get("vector_appended_chars", 0)),
+            int(stats.get("vector_text_chars", 0)),
+            int(stats.get("full_content_requests", 0)),
+            int(stats.get("full_content_chars", 0)),
             int(stats.get("vector_followup_turns", 0)),
             stats.get("vector_latency_ms", 0.0),
             stats.get("vector_best_score", 0.0),
         )
+        if self._has_vector_service() and hasattr(self.vector_service, "cache_stats"):
+            try:
+                cache_stats = self.vector_service.cache_stats()
+                self.logger.info(
+                    "[PHASE3-STEP] step=%s query_cache embeddings_hit_rate=%.2f results_hit_rate=%.2f results_entries=%s",
+                    step_id,
+                    cache_stats["embeddings"]["hit_rate"],
+                    cache_stats["results"]["hit_rate"],
+                    cache_stats["results"]["entries"],
+                )
+            except Exception:
+                pass
     
     def _get_previous_chunks_context(self, step_id: int) -> Optional[str]:
         """
@@ -0,0 +1,253 @@
+"""Per-link comment index for Phase 3 comment retrieval.
+
+``retrieve_matching_comments`` used to normalize and lowercase every comment,
+test every keyword against every body and fully sort the matches on each
+call, and marker retrieval calls it once per marker. A ``CommentIndex`` is
+built once per link and holds
+
+* the normalized comments (display values kept as-is) and lowercased bodies
+* likes/replies as int arrays plus the comment order by each of them
+* posting lists from tokens to the comments containing them
+
+Tokens are those of the FTS analyzer (Latin words, CJK bigrams); the posting
+lists are built in one pass over the comments. Keywords match as substrings,
+so a keyword token's candidates are the comments holding any indexed token
+that contains it (a CJK bigram only contains itself). That expansion is a
+scan of the vocabulary, not of the comments, and is cached per token. A
+keyword's candidates are the intersection of its rarest tokens' lists, and
+only those get the exact substring check.
+
+Top-k is taken with ``heapq`` (or by walking the precomputed engagement
+order when most comments match) instead of a full sort. Ties keep comment
+order, as the previous stable sort did.
+
+Indexes share the process-wide LRU pattern of ``transcript_index``. Comments
+loaded by ``ResearchDataLoader`` carry a ``comments_version`` stamp (file
+name, size and mtime), which keys the cache in O(1), so reloading the batch
+reuses the index. Unstamped comment lists fall back to a hash of their
+content.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from research.retrieval.keyword_matcher import KeywordMatcher
+from research.retrieval.query_cache import LRUCache
+from research.retrieval.transcript_index import aligned_lower
+from research.vector_store.lexical import is_cjk_bigram, token_set
+
+# Posting lists intersected per keyword before the exact check
+MAX_INTERSECTED_POSTINGS = 3
+
+
+def _comment_signature(raw_comments: Sequence[Any]) -> Tuple[Any, ...]:
+    """The content, likes and replies of every raw comment, flattened."""
+
+    parts: List[Any] = []
+    append = parts.append
+    for c in raw_comments:
+        if isinstance(c, dict):
+            append(c.get("content"))
+            append(c.get("likes"))
+            append(c.get("replies"))
+        else:
+            append(str(c))
+    return tuple(parts)
+
+
+def _as_count(value: Any) -> int:
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass(frozen=True)
+class CommentIndex:
+    """Normalized comments of one link with posting lists and engagement order."""
+
+    # Flattened raw comment values (checked on hits of unversioned cache entries)
+    signature: Tuple[Any, ...]
+    comments: Tuple[Dict[str, Any], ...]
+    lowered: Tuple[str, ...]
+    likes: array
+    replies: array
+    # Comment positions by likes / replies, descending (stable)
+    by_likes: array
+    by_replies: array
+    # Token -> sorted comment positions, for every token of every comment
+    postings: Dict[str, array]
+    # Keyword token -> positions of comments with a token containing it; filled by ``posting``
+    expansions: Dict[str, Sequence[int]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, raw_comments: Sequence[Any], signature: Tuple[Any, ...] = ()) -> "CommentIndex":
+        comments: List[Dict[str, Any]] = []
+        for c in raw_comments:
+            if isinstance(c, dict):
+                content = c.get("content", "")
+                if not content:
+                    continue
+                comments.append(
+                    {"content": content, "likes": c.get("likes", 0), "replies": c.get("replies", 0)}
+                )
+            else:
+                comments.append({"content": str(c), "likes": 0, "replies": 0})
+
+        lowered = tuple(aligned_lower(c["content"]) for c in comments)
+        lists: Dict[str, List[int]] = {}
+        for position, text in enumerate(lowered):
+            for token in token_set(text):
+                ids = lists.get(token)
+                if ids is None:
+                    lists[token] = [position]
+                else:
+                    ids.append(position)
+        likes = array("q", (_as_count(c["likes"]) for c in comments))
+        replies = array("q", (_as_count(c["replies"]) for c in comments))
+        order = range(len(comments))
+        return cls(
+            signature=signature,
+            comments=tuple(comments),
+            lowered=lowered,
+            likes=likes,
+            replies=replies,
+            by_likes=array("q", sorted(order, key=lambda i: -likes[i])),
+            by_replies=array("q", sorted(order, key=lambda i: -replies[i])),
+            postings={token: array("q", ids) for token, ids in lists.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.comments)
+
+    @property
+    def nbytes(self) -> int:
+        # Bodies, display dicts, the four arrays, the signature and the posting lists.
+        postings = sum(100 + 8 * len(ids) for ids in self.postings.values())
+        return sum(2 * len(t) + 200 for t in self.lowered) + 4 * 8 * len(self) + 8 * len(self.signature) + postings
+
+    # ------------------------------------------------------------------
+    def posting(self, token: str) -> Sequence[int]:
+        """Sorted positions of the comments containing ``token`` (lowercased)."""
+
+        ids = self.expansions.get(token)
+        if ids is None:
+            if is_cjk_bigram(token):
+                ids = self.postings.get(token, ())
+            else:
+                # Substring semantics: union the lists of every indexed token containing it.
+                lists = [self.postings[t] for t in self.postings if token in t]
+                if len(lists) == 1:
+                    ids = lists[0]
+                else:
+                    ids = sorted(set().union(*lists))
+            # Concurrent fills compute the same list; the last write wins.
+            self.expansions[token] = ids
+        return ids
+
+    def candidates(self, keyword: str) -> Sequence[int]:
+        """Positions that may contain ``keyword``; a superset of the true matches."""
+
+        # Same tokenizer as the bodies (the keyword is lowercased like them)
+        tokens = token_set(keyword)
+        if not tokens:
+            # No word characters (e.g. punctuation): every comment is a candidate.
+            return range(len(self))
+        lists = sorted((self.posting(token) for token in tokens), key=len)
+        if not lists[0]:
+            return ()
+        if len(lists) == 1:
+            return lists[0]
+        result = set(lists[0])
+        for ids in lists[1:MAX_INTERSECTED_POSTINGS]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return sorted(result)
+
+    def relevance(self, matcher: KeywordMatcher) -> Dict[int, int]:
+        """``{position: distinct keywords contained}`` for every matching comment."""
+
+        scores: Dict[int, int] = {}
+        for keyword in matcher.keywords:
+            for position in self.candidates(keyword):
+                if keyword in self.lowered[position]:
+                    scores[position] = scores.get(position, 0) + 1
+        return scores
+
+    def top(self, scores: Dict[int, int], limit: int, sort_by: str = "relevance") -> List[int]:
+        """The ``limit`` best positions of ``scores`` under ``sort_by``."""
+
+        limit = max(1, limit)
+        if sort_by in ("likes", "replies"):
+            order = self.by_likes if sort_by == "likes" else self.by_replies
+            if 4 * len(scores) >= len(self):
+                # Most comments match: the precomputed order yields the top-k early.
+                picked: List[int] = []
+                for position in order:
+                    if position in scores:
+                        picked.append(position)
+                        if len(picked) >= limit:
+                            break
+                return picked
+            values = self.likes if sort_by == "likes" else self.replies
+            return heapq.nsmallest(limit, scores, key=lambda i: (-values[i], i))
+        likes = self.likes
+        return heapq.nsmallest(limit, scores, key=lambda i: (-scores[i], -likes[i], i))
+
+
+def _index_size(index: Any) -> int:
+    return 128 + index.nbytes
+
+
+_shared_lock = threading.Lock()
+_shared: Dict[str, LRUCache] = {}
+
+
+def shared_comment_indexes(max_mb: int = 128, max_entries: int = 512) -> LRUCache:
+    """Return the process-wide comment index cache, resized to the given caps."""
+
+    max_bytes = max(1, int(max_mb)) * 1024 * 1024
+    with _shared_lock:
+        cache = _shared.get("comments")
+        if cache is None:
+            cache = _shared["comments"] = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=_index_size)
+        else:
+            cache.resize(max_entries=max_entries, max_bytes=max_bytes)
+    return cache
+
+
+def comment_index(
+    cache: Optional[LRUCache],
+    link_id: str,
+    raw_comments: Sequence[Any],
+    version: Optional[str] = None,
+) -> CommentIndex:
+    """The cached index of ``raw_comments``, building and caching it on a miss.
+
+    ``version`` is the loader's ``comments_version`` stamp; without one the
+    key falls back to a hash of the comments, which costs O(comments) per call.
+    """
+
+    if cache is None:
+        return CommentIndex.build(raw_comments)
+    if version is not None:
+        key = (link_id, version, len(raw_comments))
+        index = cache.get(key)
+        if index is None:
+            index = CommentIndex.build(raw_comments)
+            cache.put(key, index)
+        return index
+    signature = _comment_signature(raw_comments)
+    key = (link_id, len(raw_comments), hash(signature))
+    index = cache.get(key)
+    if index is not None and index.signature == signature:
+        return index
+    index = CommentIndex.build(raw_comments, signature)
+    cache.put(key, index)
+    return index
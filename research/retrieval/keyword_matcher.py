@@ -0,0 +1,85 @@
+"""Multi-keyword matching for transcript windows and comment filtering.
+
+Testing every keyword against every word costs O(words x keywords) Python
+substring checks per request. ``KeywordMatcher`` compiles a keyword set once
+(cached per set) into a single case-insensitive alternation and scans the
+lowercased text in one pass inside the regex engine. Alternatives are
+ordered longest first, so at each position the longest keyword wins.
+
+Matches are non-overlapping. Callers that need word positions mark every
+word a match spans, which covers any keyword overlapping it. Callers that
+count distinct keywords recheck only the texts that matched at all.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+from research.retrieval.transcript_index import TranscriptIndex, aligned_lower
+
+
+class KeywordMatcher:
+    """A compiled, immutable keyword set; build it with ``KeywordMatcher.of``."""
+
+    def __init__(self, keywords: Tuple[str, ...]) -> None:
+        self.keywords = keywords
+        ordered = sorted(keywords, key=lambda kw: (-len(kw), kw))
+        self._pattern = re.compile("|".join(re.escape(kw) for kw in ordered)) if ordered else None
+
+    @classmethod
+    def of(cls, keywords: Iterable[str]) -> "KeywordMatcher":
+        """Matcher for ``keywords`` (lowercased, stripped, deduped); cached per set."""
+
+        normalized = {aligned_lower(str(kw).strip()) for kw in keywords if kw}
+        normalized.discard("")
+        return _compiled(tuple(sorted(normalized)))
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def finditer(self, lowered: str) -> Iterator[Tuple[int, int]]:
+        """``(start, end)`` char spans of the matches in already-lowercased text."""
+
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(lowered):
+            yield match.start(), match.end()
+
+    def word_hits(self, index: TranscriptIndex) -> List[int]:
+        """Sorted indices of the transcript words containing (part of) a match."""
+
+        starts = index.word_starts
+        hits: List[int] = []
+        last = -1
+        for start, end in self.finditer(index.lowered):
+            first = max(bisect_right(starts, start) - 1, last + 1)
+            final = bisect_right(starts, end - 1) - 1
+            hits.extend(range(first, final + 1))
+            last = max(last, final)
+        return hits
+
+    def windows(self, index: TranscriptIndex, context_window: int) -> List[Tuple[int, int]]:
+        """``(start, end)`` word ranges of ``context_window`` words around each hit."""
+
+        total = len(index)
+        return [(max(0, i - context_window), min(total, i + context_window)) for i in self.word_hits(index)]
+
+    def relevance(self, lowered_texts: Sequence[str]) -> List[int]:
+        """Number of distinct keywords contained in each already-lowercased text."""
+
+        counts = [0] * len(lowered_texts)
+        if self._pattern is None:
+            return counts
+        search = self._pattern.search
+        for position, text in enumerate(lowered_texts):
+            if search(text) is not None:
+                counts[position] = sum(1 for kw in self.keywords if kw in text)
+        return counts
+
+
+@lru_cache(maxsize=256)
+def _compiled(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
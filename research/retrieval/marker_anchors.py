@@ -0,0 +1,191 @@
+"""Marker -> transcript position anchors, resolved once in Phase 0.
+
+Marker retrieval (``by_marker``, ``selective_markers``) used to lowercase the
+whole transcript and ``find`` each marker on every request, then fall back
+to a keyword scan when the summary model had paraphrased it. A link with 60
+markers meant 60 full-transcript passes per request. ``build_marker_anchors``
+resolves every transcript marker of a summary once, in three stages:
+
+1. ``exact``: case-insensitive substring
+2. ``normalized``: substring after dropping whitespace and punctuation
+   (catches re-spaced or re-punctuated CJK text)
+3. ``keywords``: the densest window of the marker's tokens (Latin words,
+   CJK bigrams) found in one pass over the transcript for all remaining
+   markers; it needs at least ``MIN_KEYWORD_COVERAGE`` of the tokens
+
+The result is stored as ``summary["marker_anchors"]``:
+
+    {"segmenter": "cjk:1", "transcript_chars": 51234,
+     "markers": {"<marker>": {"char_start": .., "char_end": .., "word_start": ..,
+                              "word_end": .., "method": "exact"} | None}}
+
+``None`` records a marker that could not be placed, so retrieval goes
+straight to its keyword fallback. Anchors are only trusted while the
+transcript length matches. Word offsets are recomputed from the char
+offsets when the segmenter changed.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from research.retrieval.transcript_index import TranscriptIndex, aligned_lower
+from research.utils.segmentation import Segmenter, default_segmenter
+from research.vector_store.lexical import analyze
+
+TRANSCRIPT_MARKER_TYPES = ("key_facts", "key_opinions", "key_datapoints")
+
+# Share of a marker's tokens that must occur close together for a keyword anchor
+MIN_KEYWORD_COVERAGE = 0.5
+
+
+def transcript_markers(transcript_summary: Optional[Dict[str, Any]]) -> List[str]:
+    """Distinct non-empty transcript markers of a summary section, in order."""
+
+    markers: List[str] = []
+    seen = set()
+    for marker_type in TRANSCRIPT_MARKER_TYPES:
+        for marker in (transcript_summary or {}).get(marker_type) or []:
+            if isinstance(marker, str) and marker.strip() and marker not in seen:
+                seen.add(marker)
+                markers.append(marker)
+    return markers
+
+
+def anchors_current(anchors: Any, transcript: str, markers: Iterable[str] = ()) -> bool:
+    """True when ``anchors`` were built for this transcript and cover ``markers``."""
+
+    if not isinstance(anchors, dict) or anchors.get("transcript_chars") != len(transcript or ""):
+        return False
+    known = anchors.get("markers")
+    return isinstance(known, dict) and all(marker in known for marker in markers)
+
+
+def build_marker_anchors(
+    transcript: str,
+    markers: Iterable[str],
+    segmenter: Optional[Segmenter] = None,
+) -> Dict[str, Any]:
+    """Anchor every marker in ``transcript``; the ``summary["marker_anchors"]`` value."""
+
+    segmenter = segmenter or default_segmenter()
+    index = TranscriptIndex.build(transcript, segmenter)
+    resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+    pending: List[str] = []
+
+    for marker in markers:
+        position = index.lowered.find(aligned_lower(marker))
+        if position == -1:
+            pending.append(marker)
+        else:
+            resolved[marker] = _anchor(index, position, position + len(marker), "exact")
+
+    if pending:
+        normalized, offsets = _normalize(index.lowered)
+        still_pending = []
+        for marker in pending:
+            needle, _ = _normalize(aligned_lower(marker))
+            position = normalized.find(needle) if needle else -1
+            if position == -1:
+                still_pending.append(marker)
+            else:
+                char_end = offsets[position + len(needle) - 1] + 1
+                resolved[marker] = _anchor(index, offsets[position], char_end, "normalized")
+        resolved.update(_keyword_anchors(index, still_pending))
+
+    return {
+        "segmenter": segmenter.key,
+        "transcript_chars": len(transcript),
+        "markers": resolved,
+    }
+
+
+def anchored_span(
+    anchors: Any,
+    marker: str,
+    index: TranscriptIndex,
+    segmenter_key: str,
+) -> Tuple[bool, Optional[Tuple[int, int]]]:
+    """``(known, (word_start, word_end))`` of ``marker`` from stored anchors.
+
+    ``known`` is False when the anchors do not cover the marker (or are stale);
+    ``(True, None)`` means Phase 0 could not place the marker.
+    """
+
+    if not anchors_current(anchors, index.transcript) or marker not in anchors["markers"]:
+        return False, None
+    anchor = anchors["markers"][marker]
+    if not anchor:
+        return True, None
+    if anchors.get("segmenter") == segmenter_key:
+        return True, (int(anchor["word_start"]), int(anchor["word_end"]))
+    return True, (index.word_at(int(anchor["char_start"])), index.word_at(int(anchor["char_end"])))
+
+
+# ----------------------------------------------------------------------
+def _anchor(index: TranscriptIndex, char_start: int, char_end: int, method: str) -> Dict[str, Any]:
+    return {
+        "char_start": char_start,
+        "char_end": char_end,
+        "word_start": index.word_at(char_start),
+        # Exclusive: every word starting before char_end
+        "word_end": bisect_left(index.word_starts, char_end),
+        "method": method,
+    }
+
+
+def _normalize(text: str) -> Tuple[str, List[int]]:
+    """``text`` without whitespace/punctuation, plus each kept char's original offset."""
+
+    offsets = [i for i, ch in enumerate(text) if ch.isalnum()]
+    return "".join(text[i] for i in offsets), offsets
+
+
+def _keyword_anchors(index: TranscriptIndex, markers: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    tokens_by_marker = {marker: sorted(set(analyze(marker))) for marker in markers}
+    vocabulary = sorted({t for tokens in tokens_by_marker.values() for t in tokens}, key=lambda t: (-len(t), t))
+    if not vocabulary:
+        return {marker: None for marker in markers}
+
+    # One overlapping scan for every token; the lookahead reports the longest
+    # token at each position, shorter tokens that are its prefixes are implied.
+    prefixes = {t: [p for p in vocabulary if t.startswith(p)] for t in vocabulary}
+    pattern = re.compile("(?=(" + "|".join(re.escape(t) for t in vocabulary) + "))")
+    positions: Dict[str, List[int]] = {t: [] for t in vocabulary}
+    for match in pattern.finditer(index.lowered):
+        for token in prefixes[match.group(1)]:
+            positions[token].append(match.start())
+
+    anchors: Dict[str, Optional[Dict[str, Any]]] = {}
+    for marker, tokens in tokens_by_marker.items():
+        occurrences = sorted((pos, token) for token in tokens for pos in positions[token])
+        span = _densest_window(occurrences, max(60, 3 * len(marker)))
+        needed = max(min(2, len(tokens)), MIN_KEYWORD_COVERAGE * len(tokens))
+        if span is None or span[0] < needed:
+            anchors[marker] = None
+            continue
+        _, char_start, char_end = span
+        anchors[marker] = _anchor(index, char_start, char_end, "keywords")
+    return anchors
+
+
+def _densest_window(occurrences: List[Tuple[int, str]], width: int) -> Optional[Tuple[int, int, int]]:
+    """``(distinct tokens, char_start, char_end)`` of the best window of ``width`` chars."""
+
+    best: Optional[Tuple[int, int, int]] = None
+    counts: Counter = Counter()
+    left = 0
+    for position, token in occurrences:
+        counts[token] += 1
+        while position - occurrences[left][0] > width:
+            old = occurrences[left][1]
+            counts[old] -= 1
+            if not counts[old]:
+                del counts[old]
+            left += 1
+        if best is None or len(counts) > best[0]:
+            best = (len(counts), occurrences[left][0], position + len(token))
+    return best
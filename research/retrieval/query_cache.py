@@ -0,0 +1,149 @@
+"""Process-wide LRU caches for Phase 3 semantic retrieval.
+
+Query embeddings and result lists are cached separately: an embedding stays
+valid for as long as the embedding model is unchanged, while a result list is
+only valid for the store generation it was computed against. Both caches are
+shared by every ``VectorRetrievalService`` in the process, so a rerun of a
+Phase 3 step (which builds a new service) starts warm.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and by estimated size in bytes."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[Any], int],
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def resize(self, *, max_entries: int, max_bytes: int) -> None:
+        with self._lock:
+            self.max_entries = max(1, int(max_entries))
+            self.max_bytes = max(1, int(max_bytes))
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self) -> None:
+        # Must be called with the lock held.
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+
+@dataclass
+class QueryCacheSettings:
+    """Caps for ``research.embeddings.search.cache``."""
+
+    max_embeddings: int = 4096
+    max_result_sets: int = 2048
+    max_mb: int = 64
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "QueryCacheSettings":
+        cfg = cfg or {}
+        defaults = cls()
+        return cls(
+            max_embeddings=int(cfg.get("max_embeddings", defaults.max_embeddings)),
+            max_result_sets=int(cfg.get("max_result_sets", defaults.max_result_sets)),
+            max_mb=int(cfg.get("max_mb", defaults.max_mb)),
+        )
+
+
+def _embedding_size(vector: Any) -> int:
+    # Python floats in a list: ~8 bytes pointer + 24 bytes object each.
+    return 64 + 32 * len(vector)
+
+
+def _results_size(results: Any) -> int:
+    size = 64
+    for result in results:
+        size += 200 + 2 * len(result.text_preview or "") + 100 * len(result.metadata or {})
+    return size
+
+
+_shared_lock = threading.Lock()
+_shared: Dict[str, LRUCache] = {}
+
+
+def shared_query_caches(settings: QueryCacheSettings) -> Tuple[LRUCache, LRUCache]:
+    """Return the process-wide ``(embeddings, results)`` caches, resized to ``settings``.
+
+    The byte budget is split evenly between the two caches.
+    """
+
+    budget = max(1, settings.max_mb) * 1024 * 1024 // 2
+    with _shared_lock:
+        embeddings = _shared.get("embeddings")
+        if embeddings is None:
+            embeddings = _shared["embeddings"] = LRUCache(
+                max_entries=settings.max_embeddings, max_bytes=budget, sizeof=_embedding_size
+            )
+        else:
+            embeddings.resize(max_entries=settings.max_embeddings, max_bytes=budget)
+
+        results = _shared.get("results")
+        if results is None:
+            results = _shared["results"] = LRUCache(
+                max_entries=settings.max_result_sets, max_bytes=budget, sizeof=_results_size
+            )
+        else:
+            results.resize(max_entries=settings.max_result_sets, max_bytes=budget)
+    return embeddings, results
@@ -0,0 +1,121 @@
+"""Immutable per-link transcript index for Phase 3 retrieval.
+
+Word-range, keyword and marker retrieval all need the transcript split into
+words (the units of ``research.utils.segmentation``), and keyword/marker
+lookups need it lowercased. Rebuilding that on every call costs
+O(transcript) per request, and a follow-up round can issue dozens of
+requests against 50k-word transcripts. A ``TranscriptIndex`` is built once
+per transcript and then sliced in O(window).
+
+Indexes live in a process-wide LRU shared by every ``RetrievalHandler``, so
+later steps and reruns of a step reuse them. Entries are keyed by link id,
+segmenter and the transcript's hash, so an edited transcript gets a fresh
+index.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from research.retrieval.query_cache import LRUCache
+from research.utils.segmentation import Segmentation, Segmenter, default_segmenter
+
+
+def aligned_lower(text: str) -> str:
+    """``text.lower()``, except characters whose lowercase form is longer stay as-is."""
+
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+@dataclass(frozen=True)
+class TranscriptIndex:
+    """Word spans and lowercased text of one transcript."""
+
+    segmentation: Segmentation
+    # Same length as the transcript, so word offsets apply to both
+    lowered: str
+
+    @classmethod
+    def build(cls, transcript: str, segmenter: Optional[Segmenter] = None) -> "TranscriptIndex":
+        segmentation = (segmenter or default_segmenter()).segment(transcript)
+        return cls(segmentation=segmentation, lowered=aligned_lower(transcript))
+
+    @property
+    def transcript(self) -> str:
+        return self.segmentation.text
+
+    @property
+    def word_starts(self) -> array:
+        return self.segmentation.starts
+
+    def __len__(self) -> int:
+        return len(self.segmentation)
+
+    @property
+    def nbytes(self) -> int:
+        # Two strings plus start/end offsets.
+        return 2 * len(self.transcript) + 2 * self.word_starts.itemsize * len(self)
+
+    def text(self, start_word: int, end_word: int) -> str:
+        return self.segmentation.slice(start_word, end_word)
+
+    def word_at(self, char_offset: int) -> int:
+        """Number of words starting before ``char_offset``."""
+
+        return bisect_left(self.word_starts, char_offset)
+
+    def find(self, phrase: str) -> int:
+        """Word index of the first case-insensitive occurrence of ``phrase``, or -1."""
+
+        position = self.lowered.find(aligned_lower(phrase))
+        return -1 if position == -1 else self.word_at(position)
+
+
+def _index_size(index: Any) -> int:
+    return 128 + index.nbytes
+
+
+_shared_lock = threading.Lock()
+_shared: Dict[str, LRUCache] = {}
+
+
+def shared_transcript_indexes(max_mb: int = 256, max_entries: int = 512) -> LRUCache:
+    """Return the process-wide transcript index cache, resized to the given caps."""
+
+    max_bytes = max(1, int(max_mb)) * 1024 * 1024
+    with _shared_lock:
+        cache = _shared.get("transcripts")
+        if cache is None:
+            cache = _shared["transcripts"] = LRUCache(
+                max_entries=max_entries, max_bytes=max_bytes, sizeof=_index_size
+            )
+        else:
+            cache.resize(max_entries=max_entries, max_bytes=max_bytes)
+    return cache
+
+
+def transcript_index(
+    cache: Optional[LRUCache],
+    link_id: str,
+    transcript: str,
+    segmenter: Optional[Segmenter] = None,
+) -> TranscriptIndex:
+    """The cached index of ``transcript``, building and caching it on a miss."""
+
+    segmenter = segmenter or default_segmenter()
+    if cache is None:
+        return TranscriptIndex.build(transcript, segmenter)
+    key = (link_id, segmenter.key, len(transcript), hash(transcript))
+    index = cache.get(key)
+    if index is not None and (index.transcript is transcript or index.transcript == transcript):
+        return index
+    index = TranscriptIndex.build(transcript, segmenter)
+    cache.put(key, index)
+    return index
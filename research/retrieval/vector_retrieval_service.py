@@ -4,13 +4,19 @@ from __future__ import annotations
 
 import hashlib
 import json
-from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from loguru import logger
 
 from core.config import Config
+from research.embeddings.background_indexer import wait_for_batch
+from research.embeddings.embedding_cache import cache_settings
 from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
+from research.retrieval.query_cache import QueryCacheSettings, shared_query_caches
+from research.vector_store.coarse_to_fine import HierarchicalSettings
+from research.vector_store.ivf_index import IVFSettings
 from research.vector_store.sqlite_vector_store import SQLiteVectorStore, VectorSearchResult
 
 
@@ -18,6 +24,8 @@ from research.vector_store.sqlite_vector_store import SQLiteVectorStore, VectorS
 class RetrievalFilters:
     link_ids: Optional[List[str]] = None
     chunk_types: Optional[List[str]] = None
+    # None → the service's active batch (when search.scope is "batch")
+    batch_ids: Optional[List[str]] = None
 
 
 class VectorRetrievalService:
@@ -29,12 +37,23 @@ class VectorRetrievalService:
         config: Optional[Config] = None,
         embedding_client: Optional[EmbeddingClient] = None,
         vector_store: Optional[SQLiteVectorStore] = None,
+        batch_id: Optional[str] = None,
     ) -> None:
         self.config = config or Config()
         embeddings_cfg = self.config.get("research.embeddings", {}) or {}
         self.enabled = bool(embeddings_cfg.get("enable", True))
         self.top_k_default = int(embeddings_cfg.get("search", {}).get("top_k", 30))
         self.max_context_chars = int(embeddings_cfg.get("search", {}).get("max_context_chars", 4000))
+        # "batch" scopes searches to the active batch partition; "all" searches every batch.
+        self.scope = str(embeddings_cfg.get("search", {}).get("scope", "batch")).lower()
+        hybrid_cfg = embeddings_cfg.get("search", {}).get("hybrid", {}) or {}
+        self.hybrid_enabled = bool(hybrid_cfg.get("enable", True))
+        # Reciprocal-rank-fusion constant: larger values flatten the rank bonus.
+        self.rrf_k = int(hybrid_cfg.get("rrf_k", 60))
+        self.batch_id = batch_id
+        # Upper bound on waiting for a background Phase 0 index before searching it.
+        self.index_wait_seconds = float(embeddings_cfg.get("search", {}).get("index_wait_seconds", 120))
+        self._index_waited: set = set()
 
         embedding_cfg = EmbeddingConfig(
             provider=embeddings_cfg.get("provider", "hash"),
@@ -43,15 +62,27 @@ class VectorRetrievalService:
             batch_size=int(embeddings_cfg.get("batch_size", 16)),
             timeout=int(embeddings_cfg.get("timeout", 45)),
             base_url=embeddings_cfg.get("base_url"),
+            max_concurrency=int(embeddings_cfg.get("max_concurrency", 4)),
+            max_retries=int(embeddings_cfg.get("max_retries", 2)),
+            **cache_settings(self.config),
         )
 
         self.embedding_client = embedding_client or EmbeddingClient(embedding_cfg)
         self.vector_store = vector_store or SQLiteVectorStore(
             db_path=self._resolve_store_path(),
             embedding_dimension=embedding_cfg.dimension,
+            ivf=IVFSettings.from_config(embeddings_cfg.get("search", {}).get("ivf")),
+            quantization=str(embeddings_cfg.get("store", {}).get("quantization", "float32")),
+            rerank_factor=int(embeddings_cfg.get("search", {}).get("rerank_factor", 4)),
+            segments=bool(embeddings_cfg.get("store", {}).get("segments", True)),
+            readers=int(embeddings_cfg.get("store", {}).get("readers", 4)),
+            hierarchical=HierarchicalSettings.from_config(embeddings_cfg.get("search", {}).get("hierarchical")),
         )
 
-        self._cache: Dict[str, List[VectorSearchResult]] = {}
+        # Process-wide LRUs: query embeddings by model, result lists by store generation.
+        self._embedding_cache, self._results_cache = shared_query_caches(
+            QueryCacheSettings.from_config(embeddings_cfg.get("search", {}).get("cache"))
+        )
 
         logger.info(
             "[PHASE3-VECTOR] Vector retrieval service initialized (enabled=%s)",
@@ -66,6 +97,56 @@ class VectorRetrievalService:
         path.mkdir(parents=True, exist_ok=True)
         return path / "embeddings.sqlite"
 
+    def set_batch(self, batch_id: Optional[str]) -> None:
+        """Set the batch partition searched by default."""
+
+        self.batch_id = batch_id
+
+    def _effective_batch_ids(self, filters: Optional[RetrievalFilters]) -> Optional[List[str]]:
+        if filters and filters.batch_ids:
+            return list(filters.batch_ids)
+        if self.scope == "batch" and self.batch_id is not None:
+            return [self.batch_id]
+        return None
+
+    def wait_until_indexed(
+        self,
+        batch_ids: Optional[Sequence[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Block until background Phase 0 indexing of ``batch_ids`` has finished.
+
+        Defaults to the active batch scope (every pending batch when the scope
+        is ``all``). Returns False on timeout; searches then see a partial index.
+        """
+
+        if batch_ids is None:
+            batch_ids = self._effective_batch_ids(None)
+        timeout = self.index_wait_seconds if timeout is None else timeout
+        t0 = time.perf_counter()
+        ready = wait_for_batch(batch_ids, timeout)
+        waited = time.perf_counter() - t0
+        if not ready:
+            logger.warning(
+                "[PHASE3-VECTOR] Index for batches %s not ready after %.0fs; searching the partial index",
+                batch_ids or "all",
+                timeout,
+            )
+        elif waited > 0.05:
+            logger.info("[PHASE3-VECTOR] Waited %.2fs for background indexing of %s", waited, batch_ids or "all")
+        return ready
+
+    def _wait_for_scope(self, per_query_filters: Sequence[Optional[RetrievalFilters]]) -> None:
+        # Each scope is waited on at most once per service, so a timed-out
+        # index does not stall every later search.
+        for query_filters in per_query_filters:
+            batch_ids = self._effective_batch_ids(query_filters)
+            scope = tuple(sorted(batch_ids)) if batch_ids is not None else None
+            if scope in self._index_waited:
+                continue
+            self._index_waited.add(scope)
+            self.wait_until_indexed(list(scope) if scope is not None else None)
+
     # ------------------------------------------------------------------
     def search(
         self,
@@ -74,43 +155,186 @@ class VectorRetrievalService:
         filters: Optional[RetrievalFilters] = None,
         top_k: Optional[int] = None,
     ) -> List[VectorSearchResult]:
+        return self.search_many([query_text], filters=filters, top_k=top_k)[0]
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        *,
+        filters: Union[RetrievalFilters, Sequence[Optional[RetrievalFilters]], None] = None,
+        top_k: Optional[int] = None,
+    ) -> List[List[VectorSearchResult]]:
+        """Search several queries at once; results are returned in query order.
+
+        ``filters`` is either shared by all queries or given per query. All
+        uncached query texts are embedded in a single ``embed_texts`` call,
+        and queries with identical filters are scored in one store pass.
+        """
+
+        results: List[List[VectorSearchResult]] = [[] for _ in queries]
         if not self.enabled:
             logger.debug("[PHASE3-VECTOR] Vector retrieval disabled; returning empty result")
-            return []
+            return results
 
-        query_text = (query_text or "").strip()
-        if not query_text:
-            return []
+        texts = [(q or "").strip() for q in queries]
+        if isinstance(filters, (list, tuple)):
+            per_query_filters: List[Optional[RetrievalFilters]] = list(filters)
+        else:
+            per_query_filters = [filters] * len(texts)
 
-        cache_key = self._cache_key(query_text, filters, top_k)
-        if cache_key in self._cache:
-            logger.debug("[PHASE3-VECTOR] Cache hit for query '%s'", query_text[:50])
-            return self._cache[cache_key]
+        self._wait_for_scope(per_query_filters)
 
-        embedding = self.embedding_client.embed_texts([query_text])
-        if not embedding:
-            return []
+        # Result keys include the generation of every partition searched, so
+        # a re-index of any of them makes older entries unreachable.
+        partition_generations = self.vector_store.partition_generations()
+        global_generation = self.vector_store.generation
 
-        filter_dict = {}
-        if filters:
-            if filters.link_ids:
-                filter_dict["link_ids"] = filters.link_ids
-            if filters.chunk_types:
-                filter_dict["chunk_types"] = filters.chunk_types
+        # cache key -> indices of the queries it answers
+        pending: Dict[str, List[int]] = {}
+        for idx, text in enumerate(texts):
+            if not text:
+                continue
+            query_filters = per_query_filters[idx]
+            batch_ids = self._effective_batch_ids(query_filters)
+            generation = (
+                [partition_generations.get(batch_id, 0) for batch_id in sorted(batch_ids)]
+                if batch_ids
+                else global_generation
+            )
+            cache_key = self._cache_key(text, query_filters, top_k, batch_ids, generation)
+            cached = self._results_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("[PHASE3-VECTOR] Cache hit for query '%s'", text[:50])
+                results[idx] = cached
+                continue
+            pending.setdefault(cache_key, []).append(idx)
+
+        if not pending:
+            return results
+
+        unique_texts = list(dict.fromkeys(texts[indices[0]] for indices in pending.values()))
+        vectors: Dict[str, List[float]] = {}
+        to_embed: List[str] = []
+        for text in unique_texts:
+            vector = self._embedding_cache.get(self._embedding_key(text))
+            if vector is None:
+                to_embed.append(text)
+            else:
+                vectors[text] = vector
+        if to_embed:
+            embeddings = self.embedding_client.embed_texts(to_embed)
+            if not embeddings or len(embeddings) != len(to_embed):
+                return results
+            for text, vector in zip(to_embed, embeddings):
+                vectors[text] = vector
+                self._embedding_cache.put(self._embedding_key(text), vector)
+
+        groups: Dict[str, Tuple[Dict[str, List[str]], List[str]]] = {}
+        for cache_key, indices in pending.items():
+            query_filters = per_query_filters[indices[0]]
+            filter_dict = self._filter_dict(query_filters, self._effective_batch_ids(query_filters))
+            group_key = json.dumps(filter_dict, sort_keys=True, ensure_ascii=False)
+            groups.setdefault(group_key, (filter_dict, []))[1].append(cache_key)
 
-        results = self.vector_store.search(
-            query_vector=embedding[0],
+        for filter_dict, cache_keys in groups.values():
+            hits = self.vector_store.search_many(
+                query_vectors=[vectors[texts[pending[key][0]]] for key in cache_keys],
+                top_k=top_k or self.top_k_default,
+                filters=filter_dict,
+            )
+            for cache_key, query_hits in zip(cache_keys, hits):
+                self._results_cache.put(cache_key, query_hits)
+                for idx in pending[cache_key]:
+                    results[idx] = query_hits
+                logger.info(
+                    "[PHASE3-VECTOR] Semantic search '%s' → %s candidates",
+                    texts[pending[cache_key][0]][:60],
+                    len(query_hits),
+                )
+        return results
+
+    def search_lexical(
+        self,
+        query_text: str = "",
+        *,
+        keywords: Sequence[str] = (),
+        filters: Optional[RetrievalFilters] = None,
+        top_k: Optional[int] = None,
+    ) -> List[VectorSearchResult]:
+        """BM25 lookup in the store's FTS5 chunk index (no embedding call)."""
+
+        if not self.enabled:
+            return []
+        self._wait_for_scope([filters])
+        return self.vector_store.search_lexical(
+            query=(query_text or "").strip(),
+            keywords=[k for k in keywords if k],
             top_k=top_k or self.top_k_default,
-            filters=filter_dict,
+            filters=self._filter_dict(filters, self._effective_batch_ids(filters)),
         )
 
-        self._cache[cache_key] = results
-        logger.info(
-            "[PHASE3-VECTOR] Semantic search '%s' → %s candidates",
-            query_text[:60],
-            len(results),
-        )
-        return results
+    def search_hybrid(
+        self,
+        query_text: str,
+        *,
+        keywords: Sequence[str] = (),
+        filters: Optional[RetrievalFilters] = None,
+        top_k: Optional[int] = None,
+    ) -> List[VectorSearchResult]:
+        """Fuse cosine and BM25 rankings with reciprocal rank fusion.
+
+        Each chunk scores ``sum(1 / (rrf_k + rank))`` over the lists it
+        appears in, rescaled so that first place in both lists is 1.0. The
+        cosine and BM25 scores are kept in ``metadata["hybrid"]``.
+        """
+
+        vector_hits = self.search(query_text, filters=filters, top_k=top_k)
+        if not self.hybrid_enabled:
+            return vector_hits
+        lexical_hits = self.search_lexical(query_text, keywords=keywords, filters=filters, top_k=top_k)
+        if not lexical_hits:
+            return vector_hits
+
+        # Keyed like fetch_texts: the same link indexed in two batches repeats chunk ids.
+        fused: Dict[Tuple[str, str], float] = {}
+        components: Dict[Tuple[str, str], Dict[str, float]] = {}
+        first_seen: Dict[Tuple[str, str], VectorSearchResult] = {}
+        for source, hits in (("cosine", vector_hits), ("bm25", lexical_hits)):
+            for rank, hit in enumerate(hits, start=1):
+                key = (hit.batch_id, hit.chunk_id)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+                components.setdefault(key, {})[source] = round(hit.score, 4)
+                first_seen.setdefault(key, hit)
+
+        best = 2.0 / (self.rrf_k + 1)
+        ranked = sorted(fused, key=lambda key: fused[key], reverse=True)[: top_k or self.top_k_default]
+        return [
+            replace(
+                first_seen[key],
+                score=fused[key] / best,
+                metadata={**first_seen[key].metadata, "hybrid": components[key]},
+            )
+            for key in ranked
+        ]
+
+    def fetch_texts(self, results: Iterable[VectorSearchResult]) -> Dict[Tuple[str, str], str]:
+        """Full stored text of each hit, keyed by ``(batch_id, chunk_id)``."""
+
+        if not self.enabled or not hasattr(self.vector_store, "fetch_chunk_texts"):
+            return {}
+        return self.vector_store.fetch_chunk_texts((r.batch_id, r.chunk_id) for r in results)
+
+    @staticmethod
+    def _filter_dict(filters: Optional[RetrievalFilters], batch_ids: Optional[List[str]]) -> Dict[str, List[str]]:
+        filter_dict: Dict[str, List[str]] = {}
+        if batch_ids:
+            filter_dict["batch_ids"] = sorted(batch_ids)
+        if filters:
+            if filters.link_ids:
+                filter_dict["link_ids"] = sorted(filters.link_ids)
+            if filters.chunk_types:
+                filter_dict["chunk_types"] = sorted(filters.chunk_types)
+        return filter_dict
 
     # ------------------------------------------------------------------
     def format_results(self, results: Iterable[VectorSearchResult]) -> str:
@@ -144,10 +368,33 @@ class VectorRetrievalService:
         return "\n\n".join(parts)
 
     # ------------------------------------------------------------------
-    @staticmethod
-    def _cache_key(query_text: str, filters: Optional[RetrievalFilters], top_k: Optional[int]) -> str:
+    def cache_stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters of the shared query-embedding and result caches."""
+
+        return {"embeddings": self._embedding_cache.stats(), "results": self._results_cache.stats()}
+
+    def _embedding_key(self, query_text: str) -> tuple:
+        client = self.embedding_client
+        return (
+            getattr(client, "provider", ""),
+            getattr(client, "model", ""),
+            getattr(client, "dimension", 0),
+            query_text,
+        )
+
+    def _cache_key(
+        self,
+        query_text: str,
+        filters: Optional[RetrievalFilters],
+        top_k: Optional[int],
+        batch_ids: Optional[List[str]] = None,
+        generation: object = None,
+    ) -> str:
         payload = {
+            "store": str(getattr(self.vector_store, "db_path", "")),
+            "generation": generation,
             "q": query_text,
+            "batch_ids": batch_ids,
             "link_ids": filters.link_ids if filters else None,
             "chunk_types": filters.chunk_types if filters else None,
             "top_k": top_k,
@@ -4,18 +4,43 @@ Implements:
 - Word-range retrieval from transcripts
 - Keyword-window retrieval from transcripts (with merged windows)
 - Comment filtering by keywords (with basic sorting)
+
+Transcript and comment lookups go through per-link ``TranscriptIndex`` and
+``CommentIndex`` objects that are built once and shared by every handler in
+the process. "Words" in ranges and context windows are the units of the
+handler's segmenter, so CJK text is addressed by character rather than by
+whitespace-separated run. Keywords derived from markers are words or CJK
+bigrams (``lexical.leading_terms``).
 """
 
 from __future__ import annotations
 
 from typing import Dict, List, Tuple, Any, Optional
 
+from research.retrieval.comment_index import comment_index, shared_comment_indexes
+from research.retrieval.keyword_matcher import KeywordMatcher
+from research.retrieval.marker_anchors import anchored_span
+from research.retrieval.query_cache import LRUCache
+from research.retrieval.transcript_index import shared_transcript_indexes, transcript_index
+from research.utils.segmentation import Segmenter, default_segmenter
+from research.vector_store.lexical import leading_terms
+
 
 class RetrievalHandler:
     """Provides retrieval methods over in-memory batch data."""
 
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        transcript_indexes: Optional[LRUCache] = None,
+        segmenter: Optional[Segmenter] = None,
+        comment_indexes: Optional[LRUCache] = None,
+    ) -> None:
+        self._transcript_indexes = (
+            transcript_indexes if transcript_indexes is not None else shared_transcript_indexes()
+        )
+        self._comment_indexes = comment_indexes if comment_indexes is not None else shared_comment_indexes()
+        # Defines what a "word" is in word ranges and context windows
+        self.segmenter = segmenter or default_segmenter()
 
     # ----------------------------- Transcript Retrieval -----------------------------
     def retrieve_by_word_range(
@@ -34,14 +59,13 @@ class RetrievalHandler:
         if not transcript:
             return f"Error: link_id {link_id} has no transcript"
 
-        words = transcript.split()
-        if start_word < 0 or end_word > len(words) or start_word >= end_word:
+        index = transcript_index(self._transcript_indexes, link_id, transcript, self.segmenter)
+        if start_word < 0 or end_word > len(index) or start_word >= end_word:
             return (
-                f"Error: Range {start_word}-{end_word} out of bounds (0-{len(words)})"
+                f"Error: Range {start_word}-{end_word} out of bounds (0-{len(index)})"
             )
 
-        selected_words = words[start_word:end_word]
-        return " ".join(selected_words)
+        return index.text(start_word, end_word)
 
     def retrieve_by_keywords(
         self,
@@ -59,21 +83,13 @@ class RetrievalHandler:
         if not transcript:
             return f"Error: link_id {link_id} has no transcript"
 
-        words = transcript.split()
-        lowered_keywords = [kw.lower() for kw in keywords if kw]
-        if not lowered_keywords:
+        matcher = KeywordMatcher.of(keywords)
+        if not matcher:
             return "(No keywords provided)"
 
-        # Optimize: scan once and only create windows around matched indices
-        matches: List[Tuple[int, int]] = []
-        lowered_words = [w.lower() for w in words]
-
-        for i, w in enumerate(lowered_words):
-            # Simple containment match per word; avoids rebuilding large window strings
-            if any(kw in w for kw in lowered_keywords):
-                window_start = max(0, i - context_window)
-                window_end = min(len(words), i + context_window)
-                matches.append((window_start, window_end))
+        # One pass over the lowercased transcript; windows only around matched words
+        index = transcript_index(self._transcript_indexes, link_id, transcript, self.segmenter)
+        matches = matcher.windows(index, context_window)
 
         if not matches:
             return "(No keyword matches found in transcript)"
@@ -83,7 +99,7 @@ class RetrievalHandler:
         parts: List[str] = []
         for start, end in merged:
             parts.append(
-                f"[Words {start}-{end}]:\n" + " ".join(words[start:end])
+                f"[Words {start}-{end}]:\n" + index.text(start, end)
             )
         return "\n\n".join(parts)
 
@@ -105,41 +121,13 @@ class RetrievalHandler:
         if not isinstance(raw_comments, list) or not raw_comments:
             return "(No comments available)"
 
-        normalized: List[Dict[str, Any]] = []
-        for c in raw_comments:
-            if isinstance(c, dict):
-                content = c.get("content", "")
-                if not content:
-                    continue
-                normalized.append(
-                    {
-                        "content": content,
-                        "likes": c.get("likes", 0),
-                        "replies": c.get("replies", 0),
-                    }
-                )
-            else:
-                normalized.append({"content": str(c), "likes": 0, "replies": 0})
-
-        lowered_keywords = [kw.lower() for kw in keywords]
-        matches: List[Tuple[Dict[str, Any], int]] = []
-        for c in normalized:
-            cl = c["content"].lower()
-            relevance = sum(1 for kw in lowered_keywords if kw in cl)
-            if relevance > 0:
-                matches.append((c, relevance))
-
-        if not matches:
+        # Normalized once per link; keyword filtering runs on posting lists
+        index = comment_index(self._comment_indexes, link_id, raw_comments, data.get("comments_version"))
+        scores = index.relevance(KeywordMatcher.of(keywords))
+        if not scores:
             return "(No comments matched the given keywords)"
 
-        if sort_by == "likes":
-            matches.sort(key=lambda t: t[0].get("likes", 0), reverse=True)
-        elif sort_by == "replies":
-            matches.sort(key=lambda t: t[0].get("replies", 0), reverse=True)
-        else:
-            matches.sort(key=lambda t: (t[1], t[0].get("likes", 0)), reverse=True)
-
-        top = [m[0] for m in matches[: max(1, limit)]]
+        top = [index.comments[i] for i in index.top(scores, limit, sort_by)]
         return self._format_comments(top)
 
     # ----------------------------- Helpers -----------------------------
@@ -248,34 +236,32 @@ class RetrievalHandler:
             if not transcript:
                 return f"Error: link_id {link_id} has no transcript"
             
-            # Find marker text in transcript
-            marker_lower = marker_text.lower()
-            transcript_lower = transcript.lower()
-            
-            # Try to find marker text in transcript
-            marker_index = transcript_lower.find(marker_lower)
-            if marker_index == -1:
+            # Anchors resolved in Phase 0 make this a slice; otherwise find the marker now
+            index = transcript_index(self._transcript_indexes, link_id, transcript, self.segmenter)
+            known, span = anchored_span(
+                (data.get("summary") or {}).get("marker_anchors"), marker_text, index, self.segmenter.key
+            )
+            if not known:
+                marker_word_index = index.find(marker_text)
+                if marker_word_index != -1:
+                    span = (marker_word_index, marker_word_index + self.segmenter.count(marker_text))
+            if span is None:
                 # Try to find keywords from marker
-                marker_words = marker_text.split()
-                if marker_words:
-                    # Use first few words as keywords
-                    keywords = marker_words[:3]
+                keywords = leading_terms(marker_text)
+                if keywords:
                     return self.retrieve_by_keywords(link_id, keywords, batch_data, context_window)
                 return f"(Marker '{marker_text}' not found in transcript)"
             
             # Extract context around marker
-            words = transcript.split()
-            marker_word_index = len(transcript[:marker_index].split())
-            
-            start_word = max(0, marker_word_index - context_window)
-            end_word = min(len(words), marker_word_index + len(marker_text.split()) + context_window)
+            start_word = max(0, span[0] - context_window)
+            end_word = min(len(index), span[1] + context_window)
             
-            context = " ".join(words[start_word:end_word])
+            context = index.text(start_word, end_word)
             return f"**标记上下文** (link_id: {link_id}, marker: {marker_text[:50]}...)\n{context}"
         
         elif content_type == "comments":
             # For comments, find comments that mention the marker
-            keywords = marker_text.split()[:3]  # Use first few words as keywords
+            keywords = leading_terms(marker_text)  # First few words (CJK: bigrams) as keywords
             return self.retrieve_matching_comments(link_id, keywords, batch_data, limit=50, sort_by="relevance")
         
         return f"Error: Unknown content_type {content_type}"
@@ -392,7 +378,7 @@ class RetrievalHandler:
                 facts = comments_summary.get("key_facts_from_comments", [])
                 parts.append(f"**评论中的关键事实** ({len(facts)} 个):")
                 for fact in facts:
-                    keywords = fact.split()[:3]
+                    keywords = leading_terms(fact)
                     context = self.retrieve_matching_comments(link_id, keywords, batch_data, limit=10)
                     parts.append(f"\n标记: {fact}\n{context}\n")
             
@@ -400,7 +386,7 @@ class RetrievalHandler:
                 opinions = comments_summary.get("key_opinions_from_comments", [])
                 parts.append(f"**评论中的关键观点** ({len(opinions)} 个):")
                 for opinion in opinions:
-                    keywords = opinion.split()[:3]
+                    keywords = leading_terms(opinion)
                     context = self.retrieve_matching_comments(link_id, keywords, batch_data, limit=10)
                     parts.append(f"\n标记: {opinion}\n{context}\n")
         
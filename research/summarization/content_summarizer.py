@@ -6,6 +6,9 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 from loguru import logger
 
+from research.retrieval.marker_anchors import anchors_current, build_marker_anchors, transcript_markers
+from research.utils.segmentation import default_segmenter
+
 # Try to import Qwen client - adjust import path as needed
 try:
     from research.client import QwenStreamingClient
@@ -104,7 +107,7 @@ class ContentSummarizer:
                     "key_opinions": [],
                     "key_datapoints": [],
                     "topic_areas": [],
-                    "word_count": len(transcript.split()) if transcript else 0,
+                    "word_count": default_segmenter().count(transcript) if transcript else 0,
                     "total_markers": 0,
                     "error": str(e)
                 }
@@ -128,8 +131,32 @@ class ContentSummarizer:
                     "error": str(e)
                 }
         
+        if transcript:
+            self.add_marker_anchors(summary, transcript)
+        
         return summary
     
+    def add_marker_anchors(self, summary: Dict[str, Any], transcript: Optional[str]) -> bool:
+        """
+        Resolve transcript markers to positions and store them as summary["marker_anchors"].
+        
+        Done once here so marker retrieval in Phase 3 is a slice instead of a
+        transcript scan per marker. Skipped when the stored anchors are current.
+        
+        Returns:
+            True if anchors were (re)built
+        """
+        markers = transcript_markers(summary.get("transcript_summary"))
+        if not transcript or not markers:
+            return False
+        if anchors_current(summary.get("marker_anchors"), transcript, markers):
+            return False
+        anchors = build_marker_anchors(transcript, markers)
+        summary["marker_anchors"] = anchors
+        placed = sum(1 for anchor in anchors["markers"].values() if anchor)
+        logger.debug(f"Anchored {placed}/{len(markers)} transcript markers")
+        return True
+    
     def _summarize_transcript(self, transcript: str, link_id: str = "unknown") -> Dict[str, Any]:
         """
         Extract lists of key facts, opinions, and data points from transcript.
@@ -144,7 +171,7 @@ class ContentSummarizer:
             raise ValueError("Qwen client not available - cannot summarize transcript")
         
         # Calculate word count
-        word_count = len(transcript.split())
+        word_count = default_segmenter().count(transcript)
         
         # Prepare prompt
         full_prompt = f"{self.system_prompt}\n\n{self.transcript_instructions}\n\n## Transcript Content\n\n{transcript}"
@@ -6,6 +6,8 @@ This module provides functions to format key info markers for use in research ph
 from typing import Dict, Any, List, Optional
 from loguru import logger
 
+from research.utils.segmentation import default_segmenter
+
 
 def format_marker_overview(
     batch_data: Dict[str, Any],
@@ -78,7 +80,7 @@ def format_markers_for_content_item(link_id: str, data: Dict[str, Any]) -> str:
     transcript = data.get("transcript", "")
     comments = data.get("comments", [])
     
-    word_count = len(transcript.split()) if transcript else 0
+    word_count = default_segmenter().count(transcript) if transcript else 0
     comment_count = len(comments) if isinstance(comments, list) else 0
     
     # Build item overview
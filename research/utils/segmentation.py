@@ -0,0 +1,159 @@
+"""Text segmentation into the units behind every "word" count and range.
+
+Word ranges (``start_word``/``end_word``), context windows, chunk sizes and
+word counts used to mean ``str.split()`` words. Chinese transcripts have
+few spaces, so a whole transcript collapsed into a handful of "words" and
+a 500-word window returned the entire document. A ``Segmenter`` defines
+the unit instead:
+
+* ``whitespace``: ``str.split()`` words (the previous behaviour)
+* ``cjk`` (default): Latin/number runs stay single units and every CJK run
+  is cut into units of ``cjk_chars_per_unit`` characters
+
+A ``Segmentation`` keeps character spans into the original text, so a unit
+range is rendered from the text itself. Whitespace runs collapse to one
+space and CJK characters stay adjacent. For text without CJK characters
+both segmenters give the same units.
+
+Further segmenters (e.g. a dictionary-based word segmenter) can be added
+with ``register_segmenter`` and picked via ``research.segmentation.mode``.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+# Kana, CJK ideographs (incl. extension A and compatibility) and Hangul
+CJK_CHARS = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+
+DEFAULT_MODE = "cjk"
+
+
+@dataclass(frozen=True)
+class Segmentation:
+    """Units of one text as parallel start/end character offsets."""
+
+    text: str
+    starts: array
+    ends: array
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def slice(self, start: int, end: int) -> str:
+        """Text of units ``[start, end)`` with whitespace runs collapsed to one space."""
+
+        start, end = max(0, start), min(len(self.starts), end)
+        if start >= end:
+            return ""
+        return " ".join(self.text[self.starts[start]:self.ends[end - 1]].split())
+
+    def tokens(self, start: int = 0, end: Optional[int] = None) -> List[str]:
+        end = len(self.starts) if end is None else min(len(self.starts), end)
+        return [self.text[self.starts[i]:self.ends[i]] for i in range(max(0, start), end)]
+
+    def unit_containing(self, char_offset: int) -> int:
+        """Index of the unit a non-whitespace character belongs to."""
+
+        return bisect_right(self.starts, char_offset) - 1
+
+
+class Segmenter:
+    """Splits text into units with one regular expression."""
+
+    name = "base"
+    pattern: "re.Pattern[str]"
+
+    @property
+    def key(self) -> str:
+        """Identifies the unit definition, e.g. in cache keys."""
+        return self.name
+
+    def segment(self, text: str) -> Segmentation:
+        starts, ends = array("q"), array("q")
+        for match in self.pattern.finditer(text or ""):
+            starts.append(match.start())
+            ends.append(match.end())
+        return Segmentation(text or "", starts, ends)
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in self.pattern.finditer(text or ""))
+
+    def tokens(self, text: str) -> List[str]:
+        return self.pattern.findall(text or "")
+
+
+class WhitespaceSegmenter(Segmenter):
+    """Units are ``str.split()`` words."""
+
+    name = "whitespace"
+    pattern = re.compile(r"\S+")
+
+
+class CJKSegmenter(Segmenter):
+    """Non-CJK runs are single units; CJK runs are cut every ``chars_per_unit`` characters."""
+
+    name = "cjk"
+
+    def __init__(self, chars_per_unit: int = 1) -> None:
+        self.chars_per_unit = max(1, int(chars_per_unit))
+        self.pattern = re.compile(rf"[{CJK_CHARS}]{{1,{self.chars_per_unit}}}|[^\s{CJK_CHARS}]+")
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.chars_per_unit}"
+
+
+_registry: Dict[str, Callable[..., Segmenter]] = {
+    WhitespaceSegmenter.name: lambda **_: WhitespaceSegmenter(),
+    CJKSegmenter.name: lambda cjk_chars_per_unit=1, **_: CJKSegmenter(cjk_chars_per_unit),
+}
+
+
+def register_segmenter(name: str, factory: Callable[..., Segmenter]) -> None:
+    """Make ``factory(**research.segmentation options)`` available as mode ``name``."""
+
+    _registry[name] = factory
+
+
+def get_segmenter(mode: Optional[str] = None, **options: Any) -> Segmenter:
+    mode = mode or DEFAULT_MODE
+    factory = _registry.get(mode)
+    if factory is None:
+        logger.warning("[SEGMENTATION] Unknown mode %s; using %s", mode, DEFAULT_MODE)
+        factory = _registry[DEFAULT_MODE]
+    return factory(**options)
+
+
+def segmenter_from_config(config: Any) -> Segmenter:
+    """Segmenter configured under ``research.segmentation`` of a ``Config``."""
+
+    cfg = dict(config.get("research.segmentation", {}) or {})
+    return get_segmenter(cfg.pop("mode", None), **cfg)
+
+
+_default_lock = threading.Lock()
+_default: Dict[str, Segmenter] = {}
+
+
+def default_segmenter() -> Segmenter:
+    """The process-wide segmenter from ``config.yaml`` (built-in default without one)."""
+
+    with _default_lock:
+        segmenter = _default.get("segmenter")
+        if segmenter is None:
+            try:
+                from core.config import Config
+
+                segmenter = segmenter_from_config(Config())
+            except Exception:
+                segmenter = get_segmenter()
+            _default["segmenter"] = segmenter
+    return segmenter
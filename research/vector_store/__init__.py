@@ -1,14 +1,5 @@
 """Vector store backends for research pipeline."""
 
-from .sqlite_vector_store import SQLiteVectorStore, VectorRecord, VectorSearchResult, ContentStatus  # noqa: F401
-
-
-
-
-
-
-
-
-
-
-
+from .sqlite_vector_store import SQLiteVectorStore, VectorRecord, VectorSearchResult, ContentStatus, ContentUpdate  # noqa: F401
+from .coarse_to_fine import HierarchicalSettings  # noqa: F401
+from .ivf_index import IVFSettings  # noqa: F401
@@ -0,0 +1,68 @@
+"""Coarse-to-fine candidate selection for unscoped vector search.
+
+The indexer tags document chunks ``scale="coarse"`` and transcript windows
+and comment groups ``scale="fine"``. For a large partition the first stage
+scores only the coarse rows and keeps the ``top_links`` best links per
+query; the second stage scores every row of those links. Links without any
+coarse row (e.g. transcripts indexed before their summary exists) are
+always carried into the second stage, so they are never hidden.
+
+On partitions that also reach the IVF ``min_rows``, the second stage is
+narrowed further to the rows of those links that sit in the query's probed
+IVF lists (falling back to every row of the links when that leaves fewer
+than ``top_k``).
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+try:  # Optional dependency; coarse-to-fine search only runs on the NumPy path
+    import numpy as np
+except Exception:  # pragma: no cover - fallback when numpy unavailable
+    np = None  # type: ignore
+
+
+@dataclass
+class HierarchicalSettings:
+    """Tuning knobs for coarse-to-fine search (``research.embeddings.search.hierarchical``)."""
+
+    enable: bool = True
+    # Links kept by the coarse stage per query; raise for recall, lower for speed
+    top_links: int = 32
+    # ...but never fewer than this many links per requested result
+    links_per_result: float = 1.0
+    # Partitions smaller than this are always scanned flat
+    min_rows: int = 20000
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "HierarchicalSettings":
+        cfg = cfg or {}
+        defaults = cls()
+        return cls(
+            enable=bool(cfg.get("enable", defaults.enable)),
+            top_links=int(cfg.get("top_links", defaults.top_links)),
+            links_per_result=float(cfg.get("links_per_result", defaults.links_per_result)),
+            min_rows=int(cfg.get("min_rows", defaults.min_rows)),
+        )
+
+    def links_for(self, top_k: int) -> int:
+        return max(1, self.top_links, int(math.ceil(self.links_per_result * top_k)))
+
+
+def best_links(scores: "np.ndarray", link_ids: Sequence[str], limit: int) -> List[str]:
+    """The ``limit`` distinct links owning the highest-scoring coarse rows."""
+
+    chosen: List[str] = []
+    seen = set()
+    for position in np.argsort(-scores, kind="stable"):
+        link_id = link_ids[position]
+        if link_id in seen:
+            continue
+        seen.add(link_id)
+        chosen.append(link_id)
+        if len(chosen) >= limit:
+            break
+    return chosen
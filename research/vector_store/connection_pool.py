@@ -0,0 +1,95 @@
+"""SQLite connections for a store shared by several threads.
+
+Phases run through ``asyncio.to_thread`` and Phase 0 indexes on its own
+worker thread, so one store instance sees concurrent reads and writes. A
+single ``sqlite3`` connection shared between threads interleaves cursors
+and transactions; the pool instead hands out
+
+* one writer connection, serialized by a re-entrant lock, and
+* up to ``readers`` WAL reader connections. A thread checks one out for the
+  duration of a read and nested reads on that thread reuse it.
+
+While a thread holds the writer lock its reads go through the writer, so
+they see the thread's own uncommitted rows.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+
+class ConnectionPool:
+    """One serialized writer plus a bounded set of WAL reader connections."""
+
+    def __init__(self, db_path: Path, *, readers: int = 4, timeout: float = 30.0) -> None:
+        self.db_path = db_path
+        self.max_readers = max(1, int(readers))
+        self.timeout = timeout
+        self.writer = sqlite3.connect(db_path, check_same_thread=False, timeout=timeout)
+        self._write_lock = threading.RLock()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    @contextmanager
+    def writing(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer lock; transactions are still opened by the caller."""
+
+        with self._write_lock:
+            self._local.write_depth = getattr(self._local, "write_depth", 0) + 1
+            try:
+                yield self.writer
+            finally:
+                self._local.write_depth -= 1
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        """A connection for reads on this thread, blocking while all readers are busy."""
+
+        if getattr(self._local, "write_depth", 0):
+            yield self.writer
+            return
+        held = getattr(self._local, "reader", None)
+        if held is not None:
+            yield held
+            return
+
+        connection = self._checkout()
+        self._local.reader = connection
+        try:
+            yield connection
+        finally:
+            self._local.reader = None
+            self._idle.put(connection)
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._readers_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("connection pool is closed")
+            if len(self._readers) < self.max_readers:
+                connection = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout)
+                connection.execute("PRAGMA query_only=ON;")
+                self._readers.append(connection)
+                return connection
+        return self._idle.get()
+
+    # ------------------------------------------------------------------
+    def close(self) -> None:
+        with self._write_lock, self._readers_lock:
+            self._closed = True
+            for connection in self._readers:
+                connection.close()
+            self._readers.clear()
+            self.writer.close()
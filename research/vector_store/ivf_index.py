@@ -0,0 +1,167 @@
+"""Inverted-file (IVF) coarse quantizer for approximate vector search.
+
+Pure NumPy: spherical k-means picks ``n_lists`` centroids, every stored row
+is assigned to its nearest centroid, and a query only scores the rows in its
+``nprobe`` closest lists. Used by :class:`SQLiteVectorStore` for partitions
+large enough that an exact mat-vec over every row stops being cheap.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from loguru import logger
+
+try:  # Optional dependency; the store only builds an IVF index when NumPy is present
+    import numpy as np
+except Exception:  # pragma: no cover - fallback when numpy unavailable
+    np = None  # type: ignore
+
+
+@dataclass
+class IVFSettings:
+    """Tuning knobs for the IVF index (``research.embeddings.search.ivf``)."""
+
+    enable: bool = True
+    # 0 → derived from the partition size (~4 * sqrt(rows))
+    n_lists: int = 0
+    nprobe: int = 8
+    # Partitions smaller than this are always scanned exactly
+    min_rows: int = 50000
+    iterations: int = 10
+    train_sample: int = 65536
+    # Retrain once a partition has grown by this factor since the last training
+    retrain_growth: float = 2.0
+    seed: int = 0
+
+    @classmethod
+    def from_config(cls, cfg: Optional[dict]) -> "IVFSettings":
+        cfg = cfg or {}
+        defaults = cls()
+        return cls(
+            enable=bool(cfg.get("enable", defaults.enable)),
+            n_lists=int(cfg.get("nlist", defaults.n_lists)),
+            nprobe=int(cfg.get("nprobe", defaults.nprobe)),
+            min_rows=int(cfg.get("min_rows", defaults.min_rows)),
+            iterations=int(cfg.get("iterations", defaults.iterations)),
+            train_sample=int(cfg.get("train_sample", defaults.train_sample)),
+            retrain_growth=float(cfg.get("retrain_growth", defaults.retrain_growth)),
+            seed=int(cfg.get("seed", defaults.seed)),
+        )
+
+    def lists_for(self, rows: int) -> int:
+        if self.n_lists > 0:
+            return max(1, min(self.n_lists, rows))
+        return max(1, min(rows, int(4 * math.sqrt(rows))))
+
+
+class IVFIndex:
+    """Trained centroids plus helpers to assign rows and probe lists."""
+
+    _ASSIGN_CHUNK = 65536
+
+    def __init__(self, centroids: "np.ndarray", *, trained_rows: int) -> None:
+        self.centroids = np.ascontiguousarray(centroids, dtype="float32")
+        self.trained_rows = int(trained_rows)
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def train(cls, matrix: "np.ndarray", settings: IVFSettings) -> "IVFIndex":
+        """Spherical k-means over (a sample of) the rows.
+
+        ``matrix`` may hold float32 vectors or int8 codes; sample rows are
+        widened and re-normalized before clustering.
+        """
+
+        rows = int(matrix.shape[0])
+        rng = np.random.default_rng(settings.seed)
+        sample = matrix
+        if rows > settings.train_sample:
+            sample = matrix[np.sort(rng.choice(rows, settings.train_sample, replace=False))]
+        sample = sample.astype("float32")
+        sample_norms = np.linalg.norm(sample, axis=1, keepdims=True)
+        sample_norms[sample_norms == 0] = 1.0
+        sample /= sample_norms
+
+        n_lists = min(settings.lists_for(rows), int(sample.shape[0]))
+        centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+        for _ in range(max(1, settings.iterations)):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists from random rows so every list stays usable.
+                sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype("float32")
+
+        return cls(centroids, trained_rows=rows)
+
+    def assign(self, vectors: "np.ndarray") -> "np.ndarray":
+        """Nearest centroid for each row, computed in chunks to bound memory."""
+
+        out = np.empty(int(vectors.shape[0]), dtype="int32")
+        for start in range(0, len(out), self._ASSIGN_CHUNK):
+            block = vectors[start:start + self._ASSIGN_CHUNK]
+            # A positive per-row scale (int8 codes) does not change the argmax.
+            out[start:start + len(block)] = np.argmax(block.astype("float32") @ self.centroids.T, axis=1)
+        return out
+
+    def probe(self, query: "np.ndarray", nprobe: int) -> "np.ndarray":
+        scores = self.centroids @ query
+        nprobe = max(1, min(nprobe, self.n_lists))
+        if nprobe >= self.n_lists:
+            return np.arange(self.n_lists)
+        return np.argpartition(-scores, nprobe - 1)[:nprobe]
+
+    # ------------------------------------------------------------------
+    def save(self, path: Path, *, rowids: "np.ndarray", assignments: "np.ndarray") -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as handle:
+            np.savez(
+                handle,
+                centroids=self.centroids,
+                trained_rows=np.asarray(self.trained_rows, dtype="int64"),
+                rowids=np.asarray(rowids, dtype="int64"),
+                assignments=np.asarray(assignments, dtype="int32"),
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional[Tuple["IVFIndex", "np.ndarray", "np.ndarray"]]:
+        """Return ``(index, rowids, assignments)`` or ``None`` if missing/corrupt."""
+
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as payload:
+                index = cls(payload["centroids"], trained_rows=int(payload["trained_rows"]))
+                return index, payload["rowids"], payload["assignments"]
+        except Exception as exc:  # pragma: no cover - defensive against partial writes
+            logger.warning("[VECTOR-STORE] Ignoring unreadable IVF index %s: %s", path, exc)
+            return None
+
+
+class InvertedLists:
+    """Row positions grouped by list id, derived from a per-row assignment array."""
+
+    def __init__(self, assignments: "np.ndarray", n_lists: int) -> None:
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.searchsorted(assignments[self.order], np.arange(n_lists + 1))
+
+    def positions(self, list_ids: "np.ndarray") -> "np.ndarray":
+        spans = [self.order[self.offsets[l]:self.offsets[l + 1]] for l in list_ids]
+        if not spans:
+            return np.zeros(0, dtype="int64")
+        return np.sort(np.concatenate(spans))
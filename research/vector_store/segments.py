@@ -0,0 +1,118 @@
+"""Memory-mapped vector segment files shared across processes.
+
+A segment is one batch partition's resident matrix exported next to the
+SQLite store as an ``.npy`` file plus an ``.ids.npz`` sidecar holding the
+per-row rowids, link ids, chunk types and (int8) scales. Readers map the
+``.npy`` read-only, so every process searching the same store shares one
+page-cached copy and skips decoding blobs on cold start.
+
+File names carry the store generation they were exported at; SQLite stays
+the source of truth and a segment is only used while its generation is
+current. The sidecar is written after the matrix, so its presence means the
+pair is complete.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+try:  # Optional dependency; segments are only used when NumPy is present
+    import numpy as np
+except Exception:  # pragma: no cover - fallback when numpy unavailable
+    np = None  # type: ignore
+
+
+@dataclass
+class VectorSegment:
+    generation: int
+    matrix: "np.ndarray"
+    rowids: "np.ndarray"
+    link_ids: "np.ndarray"
+    chunk_types: "np.ndarray"
+    scales: Optional["np.ndarray"] = None
+
+    @staticmethod
+    def _paths(directory: Path, name: str, encoding: str, generation: int):
+        stem = f"{name}.{encoding}.g{generation}"
+        return directory / f"{stem}.npy", directory / f"{stem}.ids.npz"
+
+    # ------------------------------------------------------------------
+    def save(self, directory: Path, name: str, encoding: str) -> Path:
+        """Write the segment atomically and delete older generations of it."""
+
+        directory.mkdir(parents=True, exist_ok=True)
+        matrix_path, ids_path = self._paths(directory, name, encoding, self.generation)
+
+        tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+        with open(tmp_matrix, "wb") as handle:
+            np.save(handle, np.ascontiguousarray(self.matrix))
+        tmp_matrix.replace(matrix_path)
+
+        tmp_ids = ids_path.with_name(ids_path.name + ".tmp")
+        with open(tmp_ids, "wb") as handle:
+            np.savez(
+                handle,
+                generation=np.asarray(self.generation, dtype="int64"),
+                rowids=np.asarray(self.rowids, dtype="int64"),
+                link_ids=np.asarray(self.link_ids, dtype=str),
+                chunk_types=np.asarray(self.chunk_types, dtype=str),
+                scales=np.asarray(self.scales if self.scales is not None else [], dtype="float32"),
+            )
+        tmp_ids.replace(ids_path)
+
+        self.remove(directory, name, keep_generation=self.generation)
+        return matrix_path
+
+    @classmethod
+    def load(cls, directory: Path, name: str, encoding: str, generation: int) -> Optional["VectorSegment"]:
+        """Map the segment for ``generation`` read-only, or return None if absent."""
+
+        matrix_path, ids_path = cls._paths(directory, name, encoding, generation)
+        if not ids_path.exists() or not matrix_path.exists():
+            return None
+        try:
+            with np.load(ids_path) as ids:
+                rowids = ids["rowids"]
+                link_ids = ids["link_ids"].astype(object)
+                chunk_types = ids["chunk_types"].astype(object)
+                scales = ids["scales"] if encoding == "int8" else None
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except Exception as exc:  # pragma: no cover - defensive against partial or foreign files
+            logger.warning("[VECTOR-STORE] Ignoring unreadable segment %s: %s", matrix_path, exc)
+            return None
+        if matrix.ndim != 2 or matrix.shape[0] != len(rowids):
+            logger.warning("[VECTOR-STORE] Ignoring segment %s: row count does not match its sidecar", matrix_path)
+            return None
+        return cls(
+            generation=generation,
+            matrix=matrix,
+            rowids=rowids,
+            link_ids=link_ids,
+            chunk_types=chunk_types,
+            scales=scales,
+        )
+
+    @staticmethod
+    def remove(directory: Path, name: str, keep_generation: Optional[int] = None) -> None:
+        """Delete a partition's segment files, optionally keeping one generation.
+
+        Files still mapped by another process cannot be deleted on Windows;
+        they are left for a later refresh to clean up.
+        """
+
+        if not directory.exists():
+            return
+        pattern = re.compile(rf"{re.escape(name)}\.[a-z0-9]+\.g(\d+)\.(?:npy|ids\.npz)(?:\.tmp)?")
+        for path in directory.glob(f"{name}.*"):
+            match = pattern.fullmatch(path.name)
+            if match is None or (keep_generation is not None and int(match.group(1)) == keep_generation):
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                pass
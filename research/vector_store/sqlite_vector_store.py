@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import functools
 import json
+import re
 import sqlite3
+import threading
 import time
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
@@ -16,6 +20,104 @@ try:  # Optional dependency for faster math
 except Exception:  # pragma: no cover - fallback when numpy unavailable
     np = None  # type: ignore
 
+from .coarse_to_fine import HierarchicalSettings, best_links
+from .connection_pool import ConnectionPool
+from .ivf_index import InvertedLists, IVFIndex, IVFSettings
+from .lexical import fts_document, match_expression
+from .segments import VectorSegment
+from .text_codec import compress_text, decompress_text
+
+
+_CONTENT_ITEMS_DDL = """
+CREATE TABLE IF NOT EXISTS {schema}content_items (
+    batch_id TEXT NOT NULL DEFAULT '',
+    link_id TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    embedding_version INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, link_id)
+)
+"""
+
+_EMBEDDINGS_DDL = """
+CREATE TABLE IF NOT EXISTS {schema}{table} (
+    batch_id TEXT NOT NULL DEFAULT '',
+    chunk_id TEXT NOT NULL,
+    link_id TEXT NOT NULL,
+    chunk_index INTEGER,
+    chunk_type TEXT,
+    scale TEXT,
+    vector BLOB NOT NULL,
+    vector_norm REAL NOT NULL,
+    text_preview TEXT,
+    metadata_json TEXT,
+    content_hash TEXT,
+    text_blob BLOB,
+    PRIMARY KEY (batch_id, chunk_id),
+    FOREIGN KEY(batch_id, link_id) REFERENCES content_items(batch_id, link_id) ON DELETE CASCADE
+)
+"""
+
+_CONTENT_ITEM_COLUMNS = "batch_id, link_id, checksum, embedding_version, updated_at"
+
+_EMBEDDING_COLUMNS = (
+    "batch_id, chunk_id, link_id, chunk_index, chunk_type, scale, vector, vector_norm, text_preview, metadata_json, "
+    "content_hash, text_blob"
+)
+
+# On-disk vector encodings. ``content_items.embedding_version`` stores
+# ``encoding_code * _ENCODING_STRIDE + version`` so that one integer records
+# both the embedding model version and how the link's blobs are encoded.
+VECTOR_ENCODINGS = ("float32", "int8")
+_ENCODING_STRIDE = 1000
+
+# Secondary indexes on ``embeddings``; dropped and rebuilt around bulk imports.
+_EMBEDDING_INDEXES = (
+    ("idx_embeddings_link", "embeddings(link_id)"),
+    ("idx_embeddings_chunk_type", "embeddings(chunk_type)"),
+    ("idx_embeddings_link_chunk_type", "embeddings(link_id, chunk_type)"),
+    ("idx_embeddings_batch", "embeddings(batch_id, link_id, chunk_type)"),
+)
+
+# Max bound parameters per ``IN (...)`` lookup.
+_SQL_CHUNK = 500
+
+# Full-text index over chunk text (rendered by lexical.fts_document); rowid
+# is the embeddings rowid. Filter columns are stored but not tokenized.
+_CHUNK_FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+    body,
+    batch_id UNINDEXED,
+    link_id UNINDEXED,
+    chunk_type UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# One reusable encoder: json.dumps() with non-default options builds a new
+# JSONEncoder on every call.
+_METADATA_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True)
+
+
+def pack_embedding_version(version: int, encoding: str) -> int:
+    return VECTOR_ENCODINGS.index(encoding) * _ENCODING_STRIDE + int(version)
+
+
+def unpack_embedding_version(stored: int) -> Tuple[int, str]:
+    code, version = divmod(int(stored), _ENCODING_STRIDE)
+    return version, VECTOR_ENCODINGS[code] if code < len(VECTOR_ENCODINGS) else "float32"
+
+
+def _stored_text(chunk_id: str, text_blob: Optional[bytes], text_preview: Optional[str]) -> str:
+    """Full chunk text from ``text_blob``, or the preview when there is none."""
+
+    try:
+        text = decompress_text(text_blob)
+    except ValueError as exc:
+        logger.warning("[VECTOR-STORE] Unreadable text for %s: %s", chunk_id, exc)
+        text = ""
+    return text or text_preview or ""
+
 
 @dataclass
 class ContentStatus:
@@ -23,6 +125,8 @@ class ContentStatus:
     checksum: str
     embedding_version: int
     updated_at: float
+    batch_id: str = ""
+    encoding: str = "float32"
 
 
 @dataclass
@@ -35,6 +139,21 @@ class VectorRecord:
     embedding: Sequence[float]
     text_preview: str
     metadata: Dict[str, object]
+    # Hash of the embedded text; lets the indexer skip unchanged chunks.
+    content_hash: str = ""
+    # Full chunk text, stored compressed and indexed for lexical search;
+    # falls back to ``text_preview``.
+    text: str = ""
+
+
+@dataclass
+class ContentUpdate:
+    """One link's new rows for :meth:`SQLiteVectorStore.bulk_replace_content_embeddings`."""
+
+    link_id: str
+    records: List[VectorRecord]
+    checksum: str
+    unchanged_chunk_ids: Sequence[str] = ()
 
 
 @dataclass
@@ -44,84 +163,402 @@ class VectorSearchResult:
     score: float
     text_preview: str
     metadata: Dict[str, object]
+    batch_id: str = ""
+
+
+@dataclass
+class _ResidentMatrix:
+    """Contiguous copy of one batch partition used for scoring.
+
+    ``rowids`` is parallel to the matrix rows and maps each row back to the
+    SQLite rowid so that only the winning rows need to be decoded. In int8
+    mode ``matrix`` holds the quantized codes and ``scales`` the per-row
+    dequantization factors.
+    """
+
+    generation: int
+    matrix: "np.ndarray"
+    rowids: "np.ndarray"
+    link_ids: "np.ndarray"
+    chunk_types: "np.ndarray"
+    # Rows of one link are kept contiguous: link_id -> [start, end)
+    link_ranges: Dict[str, Tuple[int, int]]
+    # IVF list id per row (parallel to ``rowids``); None until the partition
+    # is large enough to be searched through the IVF index.
+    assignments: Optional["np.ndarray"] = None
+    scales: Optional["np.ndarray"] = None
+    _lists: Optional[InvertedLists] = field(default=None, repr=False, compare=False)
+    # (positions of coarse-scale rows, positions of links without any); see _coarse_rows()
+    _coarse: Optional[Tuple["np.ndarray", "np.ndarray"]] = field(default=None, repr=False, compare=False)
+
+    _SCORE_CHUNK = 65536
+
+    @property
+    def dimension(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def positions_for_links(self, link_ids: Iterable[str]) -> "np.ndarray":
+        spans = sorted(self.link_ranges[l] for l in set(link_ids) if l in self.link_ranges)
+        if not spans:
+            return np.zeros(0, dtype="int64")
+        return np.concatenate([np.arange(start, end, dtype="int64") for start, end in spans])
+
+    def scores(self, queries: "np.ndarray", positions: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Coarse cosine scores, shape (queries, rows), for ``positions`` (all rows when None)."""
+
+        rows = self.matrix if positions is None else self.matrix[positions]
+        if self.scales is None:
+            return queries @ rows.T
+        # Widen int8 codes in bounded chunks so scoring never materializes a
+        # full float32 copy of the partition.
+        out = np.empty((len(queries), len(rows)), dtype="float32")
+        for start in range(0, len(rows), self._SCORE_CHUNK):
+            block = rows[start:start + self._SCORE_CHUNK]
+            out[:, start:start + len(block)] = queries @ block.astype("float32").T
+        out *= self.scales if positions is None else self.scales[positions]
+        return out
+
+    def inverted_lists(self, n_lists: int) -> InvertedLists:
+        if self._lists is None:
+            self._lists = InvertedLists(self.assignments, n_lists)
+        return self._lists
+
+
+def _of_chunk_types(
+    resident: _ResidentMatrix, positions: Optional["np.ndarray"], allowed_chunk_types: Optional[set]
+) -> Optional["np.ndarray"]:
+    """``positions`` (every row when None) narrowed to ``allowed_chunk_types``."""
+
+    if allowed_chunk_types is None:
+        return positions
+    types = resident.chunk_types if positions is None else resident.chunk_types[positions]
+    mask = np.isin(types, list(allowed_chunk_types))
+    return np.flatnonzero(mask) if positions is None else positions[mask]
+
+
+def _serialized(method):
+    """Run a store method while holding the pool's writer lock."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._pool.writing():
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class SQLiteVectorStore:
-    """Persist embeddings in SQLite for deterministic, dependency-free ANN."""
+    """Persist embeddings in SQLite for deterministic, dependency-free ANN.
+
+    Safe to share between threads: writes are serialized on one connection
+    and reads use per-thread WAL reader connections (see ConnectionPool).
+    """
 
-    def __init__(self, *, db_path: Path, embedding_dimension: int) -> None:
+    # Bulk writes inserting more rows than this rebuild the secondary indexes
+    # once instead of updating them row by row.
+    _REBUILD_INDEX_ROWS = 50000
+
+    def __init__(
+        self,
+        *,
+        db_path: Path,
+        embedding_dimension: int,
+        ivf: Optional[IVFSettings] = None,
+        quantization: str = "float32",
+        rerank_factor: int = 4,
+        segments: bool = False,
+        hierarchical: Optional[HierarchicalSettings] = None,
+        readers: int = 4,
+    ) -> None:
+        if quantization not in VECTOR_ENCODINGS:
+            raise ValueError(f"Unsupported vector quantization: {quantization}")
         self.db_path = db_path
         self.embedding_dimension = embedding_dimension
+        # None keeps every search exact; see _ivf_candidates().
+        self.ivf_settings = ivf
+        # Encoding used for new writes; rows in other encodings stay readable
+        # and are converted by reencode_link().
+        self.quantization = quantization
+        # int8 mode re-ranks rerank_factor * top_k coarse hits against the stored vectors.
+        self.rerank_factor = max(1, int(rerank_factor))
+        # Map exported .npy segments instead of decoding blobs; see export_segments().
+        self.segments = bool(segments) and np is not None
+        # None keeps unscoped searches flat; see _coarse_to_fine_candidates().
+        self.hierarchical = hierarchical
 
-        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._pool = ConnectionPool(self.db_path, readers=readers)
+        # The writer connection; only use it while holding the writer lock.
+        self.connection = self._pool.writer
+        # Only takes effect on a fresh file; lets archive_batch() hand freed
+        # pages back without a full VACUUM.
+        self.connection.execute("PRAGMA auto_vacuum=INCREMENTAL;")
         self.connection.execute("PRAGMA journal_mode=WAL;")
         self.connection.execute("PRAGMA synchronous=NORMAL;")
         self._create_tables()
 
+        # One resident matrix per batch partition, loaded lazily on first
+        # search (NumPy only); see _ensure_resident().
+        self._residents: Dict[str, _ResidentMatrix] = {}
+        # Trained IVF centroids per partition, persisted under _ivf_path().
+        self._ivf: Dict[str, IVFIndex] = {}
+        self._ivf_dirty: set = set()
+        # Serializes cold resident loads, segment exports and IVF training.
+        self._index_lock = threading.RLock()
+
     # ------------------------------------------------------------------
     def _create_tables(self) -> None:
         with self.connection:
             self.connection.execute(
                 """
-                CREATE TABLE IF NOT EXISTS content_items (
-                    link_id TEXT PRIMARY KEY,
-                    checksum TEXT NOT NULL,
-                    embedding_version INTEGER NOT NULL,
-                    updated_at REAL NOT NULL
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
                 )
                 """
             )
-
             self.connection.execute(
-                """
-                CREATE TABLE IF NOT EXISTS embeddings (
-                    chunk_id TEXT PRIMARY KEY,
-                    link_id TEXT NOT NULL,
-                    chunk_index INTEGER,
-                    chunk_type TEXT,
-                    scale TEXT,
-                    vector BLOB NOT NULL,
-                    vector_norm REAL NOT NULL,
-                    text_preview TEXT,
-                    metadata_json TEXT,
-                    FOREIGN KEY(link_id) REFERENCES content_items(link_id) ON DELETE CASCADE
-                )
-                """
+                "INSERT OR IGNORE INTO store_meta(key, value) VALUES ('generation', '0')"
             )
 
-            self.connection.execute(
-                "CREATE INDEX IF NOT EXISTS idx_embeddings_link ON embeddings(link_id);"
+        self._migrate_unpartitioned_schema()
+
+        with self.connection:
+            self.connection.execute(_CONTENT_ITEMS_DDL.format(schema=""))
+            self.connection.execute(_EMBEDDINGS_DDL.format(schema="", table="embeddings"))
+            self._add_missing_columns("main")
+            self._create_embedding_indexes()
+
+        self.fts_enabled = self._create_fts_table()
+
+    def _create_fts_table(self) -> bool:
+        """Create the FTS5 chunk index, backfilling it for pre-existing rows.
+
+        Returns False when this SQLite build lacks FTS5; lexical search is
+        then unavailable and writes skip the index.
+        """
+
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            with self.connection:
+                self.connection.execute(_CHUNK_FTS_DDL)
+                self._backfill_fts()
+        except sqlite3.OperationalError as exc:
+            logger.warning("[VECTOR-STORE] FTS5 unavailable; lexical search disabled: %s", exc)
+            return False
+        return True
+
+    def _backfill_fts(self, batch_id: Optional[str] = None) -> None:
+        """Index rows missing from ``chunk_fts`` (must run inside a transaction).
+
+        Rows are indexed on their full stored text, like upserts; rows written
+        before full text was stored only have their preview.
+        """
+
+        clause, params = ("AND e.batch_id = ?", [batch_id]) if batch_id is not None else ("", [])
+        rows = self.connection.execute(
+            "SELECT e.rowid, e.chunk_id, e.text_blob, e.text_preview, e.batch_id, e.link_id, e.chunk_type "
+            "FROM embeddings e "
+            f"WHERE NOT EXISTS (SELECT 1 FROM chunk_fts f WHERE f.rowid = e.rowid) {clause}",
+            params,
+        ).fetchall()
+        self.connection.executemany(
+            "INSERT INTO chunk_fts(rowid, body, batch_id, link_id, chunk_type) VALUES (?, ?, ?, ?, ?)",
+            [
+                (rowid, fts_document(_stored_text(chunk_id, blob, preview)), *rest)
+                for rowid, chunk_id, blob, preview, *rest in rows
+            ],
+        )
+
+    def _create_embedding_indexes(self) -> None:
+        for name, target in _EMBEDDING_INDEXES:
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+
+
+    def _migrate_unpartitioned_schema(self) -> None:
+        """Rebuild pre-partition tables (keyed by link_id/chunk_id alone).
+
+        The batch is recovered from each chunk's ``metadata_json``; rows that
+        never recorded one land in the ``""`` partition.
+        """
+
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(embeddings)")}
+        if not columns or "batch_id" in columns:
+            return
+
+        logger.info("[VECTOR-STORE] Migrating %s to batch-partitioned schema", self.db_path)
+        with self.connection:
+            legacy_rows = self.connection.execute(
+                "SELECT chunk_id, link_id, chunk_index, chunk_type, scale, vector, vector_norm, text_preview, metadata_json "
+                "FROM embeddings"
+            ).fetchall()
+            legacy_items = self.connection.execute(
+                "SELECT link_id, checksum, embedding_version, updated_at FROM content_items"
+            ).fetchall()
+
+            self.connection.execute("DROP TABLE embeddings")
+            self.connection.execute("DROP TABLE content_items")
+            self.connection.execute(_CONTENT_ITEMS_DDL.format(schema=""))
+            self.connection.execute(_EMBEDDINGS_DDL.format(schema="", table="embeddings"))
+
+            link_batches: Dict[str, set] = {}
+            migrated = []
+            for row in legacy_rows:
+                try:
+                    batch_id = str(json.loads(row[8] or "{}").get("batch_id") or "")
+                except ValueError:
+                    batch_id = ""
+                link_batches.setdefault(row[1], set()).add(batch_id)
+                migrated.append((batch_id, *row))
+
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO embeddings({_EMBEDDING_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*row, None, None) for row in migrated],
             )
-            self.connection.execute(
-                "CREATE INDEX IF NOT EXISTS idx_embeddings_chunk_type ON embeddings(chunk_type);"
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO content_items(batch_id, link_id, checksum, embedding_version, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (batch_id, link_id, checksum, version, updated_at)
+                    for link_id, checksum, version, updated_at in legacy_items
+                    for batch_id in sorted(link_batches.get(link_id) or {""})
+                ],
             )
+            for batch_id in sorted(set().union(*link_batches.values())):
+                self._bump_generation(batch_id)
+
+    def _add_missing_columns(self, schema: str) -> None:
+        """Add columns introduced after a file was created (must run inside a transaction)."""
+
+        columns = {row[1] for row in self.connection.execute(f"PRAGMA {schema}.table_info(embeddings)")}
+        if "content_hash" not in columns:
+            self.connection.execute(f"ALTER TABLE {schema}.embeddings ADD COLUMN content_hash TEXT")
+        if "text_blob" not in columns:
+            self.connection.execute(f"ALTER TABLE {schema}.embeddings ADD COLUMN text_blob BLOB")
 
     # ------------------------------------------------------------------
     def close(self) -> None:
-        self.connection.close()
+        with self._pool.writing(), self._index_lock:
+            self._flush_ivf()
+            self._residents.clear()
+            self._ivf.clear()
+            self._pool.close()
+
+    # ------------------------------------------------------------------
+    @property
+    def generation(self) -> int:
+        """Monotonic counter bumped by every committed write to ``embeddings``.
+
+        Stored in SQLite so that separate store instances (indexer vs. retrieval
+        service) pointing at the same file can detect each other's writes.
+        """
+
+        with self._pool.reading() as connection:
+            row = connection.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def partition_generations(self) -> Dict[str, int]:
+        """Per-batch write counters; the keys double as the list of partitions."""
+
+        with self._pool.reading() as connection:
+            rows = connection.execute(
+                "SELECT substr(key, 12), value FROM store_meta WHERE key LIKE 'generation:%'"
+            ).fetchall()
+        return {row[0]: int(row[1]) for row in rows}
+
+    def _bump_generation(self, batch_id: str) -> None:
+        # Must be called inside the write transaction.
+        self.connection.execute(
+            "UPDATE store_meta SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT) WHERE key = 'generation'"
+        )
+        self.connection.execute(
+            """
+            INSERT INTO store_meta(key, value) VALUES (?, '1')
+            ON CONFLICT(key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT)
+            """,
+            (f"generation:{batch_id}",),
+        )
+
+    def _partition_generation(self, batch_id: str) -> int:
+        with self._pool.reading() as connection:
+            row = connection.execute(
+                "SELECT value FROM store_meta WHERE key = ?", (f"generation:{batch_id}",)
+            ).fetchone()
+        return int(row[0]) if row else 0
 
     # ------------------------------------------------------------------
-    def fetch_content_status(self, link_ids: Iterable[str]) -> Dict[str, ContentStatus]:
+    def fetch_content_status(self, link_ids: Iterable[str], *, batch_id: str = "") -> Dict[str, ContentStatus]:
         link_ids = list(link_ids)
         if not link_ids:
             return {}
 
         placeholders = ",".join("?" for _ in link_ids)
-        query = f"SELECT link_id, checksum, embedding_version, updated_at FROM content_items WHERE link_id IN ({placeholders})"
+        query = (
+            "SELECT link_id, checksum, embedding_version, updated_at, batch_id FROM content_items "
+            f"WHERE batch_id = ? AND link_id IN ({placeholders})"
+        )
 
-        cursor = self.connection.execute(query, link_ids)
-        rows = cursor.fetchall()
+        with self._pool.reading() as connection:
+            rows = connection.execute(query, [batch_id, *link_ids]).fetchall()
 
         result: Dict[str, ContentStatus] = {}
         for row in rows:
+            version, encoding = unpack_embedding_version(row[2])
             result[row[0]] = ContentStatus(
                 link_id=row[0],
                 checksum=row[1],
-                embedding_version=int(row[2]),
+                embedding_version=version,
                 updated_at=float(row[3]),
+                batch_id=row[4],
+                encoding=encoding,
             )
         return result
 
+    def fetch_chunk_hashes(self, link_ids: Iterable[str], *, batch_id: str = "") -> Dict[str, Dict[str, str]]:
+        """Return ``{link_id: {chunk_id: content_hash}}`` for rows that recorded a hash."""
+
+        link_ids = list(link_ids)
+        if not link_ids:
+            return {}
+
+        placeholders = ",".join("?" for _ in link_ids)
+        with self._pool.reading() as connection:
+            rows = connection.execute(
+                "SELECT link_id, chunk_id, content_hash FROM embeddings "
+                f"WHERE batch_id = ? AND link_id IN ({placeholders}) AND content_hash IS NOT NULL",
+                [batch_id, *link_ids],
+            ).fetchall()
+
+        result: Dict[str, Dict[str, str]] = {}
+        for link_id, chunk_id, content_hash in rows:
+            result.setdefault(link_id, {})[chunk_id] = content_hash
+        return result
+
+    def fetch_chunk_texts(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """Return the full text of ``(batch_id, chunk_id)`` rows.
+
+        Rows written before full text was stored yield their preview instead;
+        missing rows are left out.
+        """
+
+        keys = sorted(set(keys))
+        result: Dict[Tuple[str, str], str] = {}
+        step = _SQL_CHUNK // 2  # two parameters per key
+        for start in range(0, len(keys), step):
+            part = keys[start:start + step]
+            with self._pool.reading() as connection:
+                rows = connection.execute(
+                    "SELECT batch_id, chunk_id, text_blob, text_preview FROM embeddings WHERE "
+                    + " OR ".join("(batch_id = ? AND chunk_id = ?)" for _ in part),
+                    [value for key in part for value in key],
+                ).fetchall()
+            for batch_id, chunk_id, text_blob, text_preview in rows:
+                result[(batch_id, chunk_id)] = _stored_text(chunk_id, text_blob, text_preview)
+        return result
+
     # ------------------------------------------------------------------
     def replace_content_embeddings(
         self,
@@ -130,44 +567,257 @@ class SQLiteVectorStore:
         records: List[VectorRecord],
         checksum: str,
         embedding_version: int,
+        batch_id: str = "",
+        unchanged_chunk_ids: Iterable[str] = (),
     ) -> None:
+        """Replace a link's rows with ``records``.
+
+        Records whose chunk id is in ``unchanged_chunk_ids`` keep their stored
+        vector and rowid; only their preview, metadata and hash are refreshed,
+        and their ``embedding`` may be left empty. Every other row of the link
+        is deleted and re-inserted from ``records``.
+        """
+
+        self.bulk_replace_content_embeddings(
+            [ContentUpdate(link_id, records, checksum, tuple(unchanged_chunk_ids))],
+            embedding_version=embedding_version,
+            batch_id=batch_id,
+        )
+
+    @_serialized
+    def bulk_replace_content_embeddings(
+        self,
+        updates: Iterable[ContentUpdate],
+        *,
+        embedding_version: int,
+        batch_id: str = "",
+        rebuild_indexes: Optional[bool] = None,
+    ) -> int:
+        """Apply many link replacements in a single transaction.
+
+        Semantics per link are those of :meth:`replace_content_embeddings`.
+        New vectors are normalized and encoded from one stacked array and
+        written with ``executemany``. ``rebuild_indexes`` drops the secondary
+        indexes for the insert and recreates them afterwards; ``None`` does so
+        once more than ``_REBUILD_INDEX_ROWS`` rows are inserted. Returns the
+        number of rows inserted.
+        """
+
+        # A link listed twice is written once, from its last update.
+        updates = list({update.link_id: update for update in updates}.values())
+        if not updates:
+            return 0
+
+        generation_before = self._partition_generation(batch_id)
+        link_ids = [update.link_id for update in updates]
+        stored_version = pack_embedding_version(embedding_version, self.quantization)
+        now = time.time()
+
         with self.connection:
-            self.connection.execute(
+            self.connection.executemany(
                 """
-                INSERT INTO content_items(link_id, checksum, embedding_version, updated_at)
-                VALUES(?, ?, ?, ?)
-                ON CONFLICT(link_id) DO UPDATE SET
+                INSERT INTO content_items(batch_id, link_id, checksum, embedding_version, updated_at)
+                VALUES(?, ?, ?, ?, ?)
+                ON CONFLICT(batch_id, link_id) DO UPDATE SET
                     checksum=excluded.checksum,
                     embedding_version=excluded.embedding_version,
                     updated_at=excluded.updated_at
                 """,
-                (link_id, checksum, embedding_version, time.time()),
+                [(batch_id, update.link_id, update.checksum, stored_version, now) for update in updates],
             )
 
-            self.connection.execute("DELETE FROM embeddings WHERE link_id = ?", (link_id,))
+            existing = self._chunk_rowids(batch_id, link_ids)
+            stale: List[Tuple[int]] = []
+            refreshed: List[tuple] = []
+            inserts: List[VectorRecord] = []
+            kept_rowids: Dict[str, List[int]] = {}
+            for update in updates:
+                link_rows = existing.get(update.link_id, {})
+                unchanged = set(update.unchanged_chunk_ids)
+                kept = {
+                    record.chunk_id: link_rows[record.chunk_id]
+                    for record in update.records
+                    if record.chunk_id in unchanged and record.chunk_id in link_rows
+                }
+                stale.extend((rowid,) for chunk_id, rowid in link_rows.items() if chunk_id not in kept)
+                kept_rowids[update.link_id] = []
+                for record in update.records:
+                    if record.chunk_id in kept:
+                        kept_rowids[update.link_id].append(kept[record.chunk_id])
+                        refreshed.append(
+                            (
+                                record.chunk_index,
+                                record.scale,
+                                record.text_preview,
+                                _METADATA_ENCODER.encode(record.metadata),
+                                record.content_hash or None,
+                                compress_text(record.text),
+                                kept[record.chunk_id],
+                            )
+                        )
+                    elif record.embedding is not None and len(record.embedding):
+                        inserts.append(record)
+                    else:
+                        logger.warning(
+                            "[VECTOR-STORE] Dropping %s: marked unchanged but no stored row to keep", record.chunk_id
+                        )
 
-            insert_stmt = (
-                "INSERT INTO embeddings(chunk_id, link_id, chunk_index, chunk_type, scale, vector, vector_norm, text_preview, metadata_json) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-            )
+            self.connection.executemany("DELETE FROM embeddings WHERE rowid = ?", stale)
+            if self.fts_enabled:
+                self.connection.executemany("DELETE FROM chunk_fts WHERE rowid = ?", stale)
 
-            for record in records:
-                vector_blob, vector_norm = self._serialize_vector(record.embedding)
-                self.connection.execute(
-                    insert_stmt,
+            if rebuild_indexes is None:
+                rebuild_indexes = len(inserts) > self._REBUILD_INDEX_ROWS
+            if rebuild_indexes:
+                for name, _ in _EMBEDDING_INDEXES:
+                    self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+
+            blobs, normalized = self._encode_records(inserts)
+            self.connection.executemany(
+                f"INSERT INTO embeddings({_EMBEDDING_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
                     (
+                        batch_id,
                         record.chunk_id,
                         record.link_id,
                         record.chunk_index,
                         record.chunk_type,
                         record.scale,
-                        vector_blob,
-                        vector_norm,
+                        blob,
+                        1.0,
                         record.text_preview,
-                        json.dumps(record.metadata, ensure_ascii=False, sort_keys=True),
-                    ),
+                        _METADATA_ENCODER.encode(record.metadata),
+                        record.content_hash or None,
+                        compress_text(record.text),
+                    )
+                    for record, blob in zip(inserts, blobs)
+                ],
+            )
+            self.connection.executemany(
+                "UPDATE embeddings SET chunk_index = ?, scale = ?, text_preview = ?, metadata_json = ?, "
+                "content_hash = ?, text_blob = COALESCE(?, text_blob) WHERE rowid = ?",
+                refreshed,
+            )
+            if self.fts_enabled:
+                self.connection.executemany(
+                    "INSERT INTO chunk_fts(rowid, body, batch_id, link_id, chunk_type) "
+                    "SELECT rowid, ?, batch_id, link_id, chunk_type FROM embeddings WHERE batch_id = ? AND chunk_id = ?",
+                    [
+                        (fts_document(record.text or record.text_preview), batch_id, record.chunk_id)
+                        for record in inserts
+                    ],
                 )
 
+            if rebuild_indexes:
+                self._create_embedding_indexes()
+            self._bump_generation(batch_id)
+
+            # Rowids are only needed to patch a resident matrix that is already loaded.
+            inserted_rowids: Dict[str, Dict[str, int]] = {}
+            if batch_id in self._residents and inserts:
+                inserted_rowids = self._chunk_rowids(batch_id, link_ids)
+
+        if batch_id in self._residents:
+            self._sync_resident(
+                batch_id=batch_id,
+                inserts=inserts,
+                normalized=normalized,
+                inserted_rowids=inserted_rowids,
+                kept_rowids=kept_rowids,
+                generation_before=generation_before,
+            )
+        return len(inserts)
+
+    def _chunk_rowids(self, batch_id: str, link_ids: Sequence[str]) -> Dict[str, Dict[str, int]]:
+        """Return ``{link_id: {chunk_id: rowid}}`` for the given links."""
+
+        result: Dict[str, Dict[str, int]] = {}
+        for start in range(0, len(link_ids), _SQL_CHUNK):
+            chunk = link_ids[start:start + _SQL_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            with self._pool.reading() as connection:
+                rows = connection.execute(
+                    "SELECT link_id, chunk_id, rowid FROM embeddings "
+                    f"WHERE batch_id = ? AND link_id IN ({placeholders})",
+                    [batch_id, *chunk],
+                ).fetchall()
+            for link_id, chunk_id, rowid in rows:
+                result.setdefault(link_id, {})[chunk_id] = int(rowid)
+        return result
+
+    def _encode_records(self, records: List[VectorRecord]) -> Tuple[List[bytes], Optional["np.ndarray"]]:
+        """Serialize the records' vectors in the store's encoding.
+
+        With NumPy all vectors are normalized (and quantized) as one stacked
+        array; the normalized float32 matrix is returned alongside the blobs
+        so the resident matrix can be patched without re-reading them.
+        """
+
+        if not records:
+            return [], None
+        if np is not None:
+            try:
+                matrix = np.asarray([record.embedding for record in records], dtype="float32")
+            except ValueError:  # ragged dimensions: encode one by one
+                matrix = None
+            if matrix is not None and matrix.ndim == 2:
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                normalized = matrix / norms
+                if self.quantization == "int8":
+                    scales, codes = self._quantize_rows(normalized)
+                    blobs = [scale.tobytes() + row.tobytes() for scale, row in zip(scales, codes)]
+                else:
+                    blobs = [row.tobytes() for row in normalized]
+                return blobs, normalized
+        return [self._serialize_vector(record.embedding, self.quantization)[0] for record in records], None
+
+    @_serialized
+    def reencode_link(self, link_id: str, *, batch_id: str = "") -> int:
+        """Rewrite a link's stored vectors in the store's current encoding.
+
+        Used to migrate rows lazily (e.g. float32 → int8) without re-embedding.
+        Returns the number of rows rewritten.
+        """
+
+        generation_before = self._partition_generation(batch_id)
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT embedding_version FROM content_items WHERE batch_id = ? AND link_id = ?",
+                (batch_id, link_id),
+            ).fetchone()
+            if row is None:
+                return 0
+            version, encoding = unpack_embedding_version(row[0])
+            if encoding == self.quantization:
+                return 0
+
+            rows = self.connection.execute(
+                "SELECT rowid, vector FROM embeddings WHERE batch_id = ? AND link_id = ?",
+                (batch_id, link_id),
+            ).fetchall()
+            updates = []
+            for rowid, blob in rows:
+                vector_blob, vector_norm = self._serialize_vector(
+                    self._deserialize_vector(blob, encoding), self.quantization
+                )
+                updates.append((vector_blob, vector_norm, rowid))
+            self.connection.executemany("UPDATE embeddings SET vector = ?, vector_norm = ? WHERE rowid = ?", updates)
+            self.connection.execute(
+                "UPDATE content_items SET embedding_version = ? WHERE batch_id = ? AND link_id = ?",
+                (pack_embedding_version(version, self.quantization), batch_id, link_id),
+            )
+            self._bump_generation(batch_id)
+
+        # Resident rows are always held in the store's encoding, so an
+        # up-to-date resident matrix is unaffected by the rewrite.
+        resident = self._residents.get(batch_id)
+        if resident is not None and resident.generation == generation_before:
+            resident.generation = generation_before + 1
+        else:
+            self._residents.pop(batch_id, None)
+        return len(updates)
+
     # ------------------------------------------------------------------
     def search(
         self,
@@ -175,26 +825,280 @@ class SQLiteVectorStore:
         query_vector: Sequence[float],
         top_k: int = 20,
         filters: Optional[Dict[str, Iterable[str]]] = None,
+        exact: bool = False,
     ) -> List[VectorSearchResult]:
+        """Return the ``top_k`` chunks most similar to ``query_vector``.
+
+        ``filters`` may carry ``batch_ids``, ``link_ids`` and ``chunk_types``.
+        Without ``batch_ids`` every partition in the store is searched.
+        Large partitions are narrowed coarse-to-fine (unscoped searches)
+        and/or through the IVF index when configured. When both apply, stage
+        two scores only the selected links' rows in the probed IVF lists.
+        ``exact=True`` forces a full scan (e.g. for recall checks).
+        """
+
+        return self.search_many(query_vectors=[query_vector], top_k=top_k, filters=filters, exact=exact)[0]
+
+    def search_many(
+        self,
+        *,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 20,
+        filters: Optional[Dict[str, Iterable[str]]] = None,
+        exact: bool = False,
+    ) -> List[List[VectorSearchResult]]:
+        """Run several queries sharing the same ``filters`` in one pass.
+
+        Each partition's candidate rows are scored against all queries with a
+        single matrix-matrix product. Results are returned in query order.
+        """
+
         filters = filters or {}
+        allowed_batch_ids = set(filters.get("batch_ids", [])) if filters.get("batch_ids") else None
         allowed_link_ids = set(filters.get("link_ids", [])) if filters.get("link_ids") else None
         allowed_chunk_types = set(filters.get("chunk_types", [])) if filters.get("chunk_types") else None
 
-        cursor = self.connection.execute(
-            "SELECT chunk_id, link_id, chunk_index, chunk_type, scale, vector, text_preview, metadata_json FROM embeddings"
+        if top_k <= 0 or not query_vectors:
+            return [[] for _ in query_vectors]
+
+        if np is not None:  # pragma: no branch - depends on numpy availability
+            return self._search_resident(
+                query_vectors,
+                top_k=top_k,
+                allowed_batch_ids=allowed_batch_ids,
+                allowed_link_ids=allowed_link_ids,
+                allowed_chunk_types=allowed_chunk_types,
+                exact=exact,
+            )
+
+        return [
+            self._search_scan(
+                query_vector,
+                top_k=top_k,
+                allowed_batch_ids=allowed_batch_ids,
+                allowed_link_ids=allowed_link_ids,
+                allowed_chunk_types=allowed_chunk_types,
+            )
+            for query_vector in query_vectors
+        ]
+
+    def search_lexical(
+        self,
+        *,
+        query: str = "",
+        keywords: Iterable[str] = (),
+        top_k: int = 20,
+        filters: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> List[VectorSearchResult]:
+        """BM25 full-text search over chunk text; ``score`` is the negated BM25 rank.
+
+        ``keywords`` must each occur verbatim; words of ``query`` are matched
+        individually (see :func:`lexical.match_expression`). Filters are the
+        same as for :meth:`search`.
+        """
+
+        expression = match_expression(query, keywords)
+        if not self.fts_enabled or not expression or top_k <= 0:
+            return []
+
+        filters = filters or {}
+        clause, params = self._filter_clause(
+            set(filters["link_ids"]) if filters.get("link_ids") else None,
+            set(filters["chunk_types"]) if filters.get("chunk_types") else None,
+            set(filters["batch_ids"]) if filters.get("batch_ids") else None,
         )
+        clause = clause.replace(" WHERE ", " AND ", 1)
+        try:
+            with self._pool.reading() as connection:
+                rows = connection.execute(
+                    "SELECT rowid, bm25(chunk_fts) AS rank FROM chunk_fts "
+                    f"WHERE chunk_fts MATCH ?{clause} ORDER BY rank LIMIT ?",
+                    [expression, *params, int(top_k)],
+                ).fetchall()
+        except sqlite3.OperationalError as exc:  # malformed expression from unusual input
+            logger.warning("[VECTOR-STORE] Lexical search failed for %r: %s", expression[:80], exc)
+            return []
+        return self._materialize([row[0] for row in rows], [-float(row[1]) for row in rows])
 
-        results: List[VectorSearchResult] = []
-        for row in cursor.fetchall():
-            chunk_id, link_id, _, chunk_type, scale, vector_blob, text_preview, metadata_json = row
+    def _search_resident(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        *,
+        top_k: int,
+        allowed_batch_ids: Optional[set],
+        allowed_link_ids: Optional[set],
+        allowed_chunk_types: Optional[set],
+        exact: bool = False,
+    ) -> List[List[VectorSearchResult]]:
+        generations = self.partition_generations()
+        batch_ids = sorted(generations if allowed_batch_ids is None else allowed_batch_ids & set(generations))
+
+        queries = np.asarray(query_vectors, dtype="float32").reshape(len(query_vectors), -1)
+        query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        query_norms[query_norms == 0] = 1.0
+        queries = queries / query_norms
+
+        # int8 scores are coarse: keep a wider shortlist and re-rank it exactly.
+        shortlist = top_k * self.rerank_factor if self.quantization == "int8" else top_k
+
+        rowid_parts: List[List["np.ndarray"]] = [[] for _ in range(len(queries))]
+        score_parts: List[List["np.ndarray"]] = [[] for _ in range(len(queries))]
+        for batch_id in batch_ids:
+            resident = self._ensure_resident(batch_id, generations[batch_id])
+            if not len(resident.rowids):
+                continue
+            if queries.shape[1] != resident.dimension:
+                logger.warning(
+                    "[VECTOR-STORE] Query dimension %s does not match stored dimension %s in batch %s; skipping",
+                    queries.shape[1],
+                    resident.dimension,
+                    batch_id,
+                )
+                continue
+            partition_hits = self._score_partition(
+                batch_id,
+                resident,
+                queries,
+                top_k=shortlist,
+                allowed_link_ids=allowed_link_ids,
+                allowed_chunk_types=allowed_chunk_types,
+                exact=exact,
+            )
+            for idx, (rowids, scores) in enumerate(partition_hits):
+                rowid_parts[idx].append(rowids)
+                score_parts[idx].append(scores)
+
+        ranked: List[Tuple["np.ndarray", "np.ndarray"]] = []
+        for idx in range(len(queries)):
+            if not rowid_parts[idx]:
+                ranked.append((np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32")))
+                continue
+            rowids = np.concatenate(rowid_parts[idx])
+            scores = np.concatenate(score_parts[idx])
+            winners = self._top_k_indices(scores, shortlist)
+            ranked.append((rowids[winners], scores[winners]))
+
+        if shortlist > top_k:
+            ranked = self._rerank(ranked, queries)
+        for idx, (rowids, scores) in enumerate(ranked):
+            winners = self._top_k_indices(scores, top_k)
+            ranked[idx] = (rowids[winners], scores[winners])
+        return self._materialize_many(ranked)
 
-            if allowed_link_ids and link_id not in allowed_link_ids:
+    def _rerank(
+        self,
+        ranked: List[Tuple["np.ndarray", "np.ndarray"]],
+        queries: "np.ndarray",
+    ) -> List[Tuple["np.ndarray", "np.ndarray"]]:
+        """Exact float cosine of each query against the stored vectors of its shortlist."""
+
+        all_rowids = sorted({int(r) for rowids, _ in ranked for r in rowids})
+        if not all_rowids:
+            return ranked
+        rows = []
+        for start in range(0, len(all_rowids), _SQL_CHUNK):
+            chunk = all_rowids[start:start + _SQL_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            with self._pool.reading() as connection:
+                rows.extend(
+                    connection.execute(
+                        "SELECT e.rowid, e.vector, c.embedding_version FROM embeddings e "
+                        "JOIN content_items c ON c.batch_id = e.batch_id AND c.link_id = e.link_id "
+                        f"WHERE e.rowid IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+
+        vectors: Dict[int, "np.ndarray"] = {}
+        for rowid, blob, stored_version in rows:
+            vec = self._decode_vector_array(blob, unpack_embedding_version(stored_version)[1]).astype("float64")
+            if vec.shape[0] != queries.shape[1]:
                 continue
-            if allowed_chunk_types and chunk_type not in allowed_chunk_types:
+            vectors[rowid] = vec / (float(np.linalg.norm(vec)) or 1.0)
+
+        reranked: List[Tuple["np.ndarray", "np.ndarray"]] = []
+        for (rowids, _), query in zip(ranked, queries.astype("float64")):
+            kept = [int(r) for r in rowids if int(r) in vectors]
+            if not kept:
+                reranked.append((np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32")))
                 continue
+            scores = np.vstack([vectors[r] for r in kept]) @ query
+            reranked.append((np.asarray(kept, dtype="int64"), scores.astype("float32")))
+        return reranked
 
+    def _score_partition(
+        self,
+        batch_id: str,
+        resident: _ResidentMatrix,
+        queries: "np.ndarray",
+        *,
+        top_k: int,
+        allowed_link_ids: Optional[set],
+        allowed_chunk_types: Optional[set],
+        exact: bool = False,
+    ) -> List[Tuple["np.ndarray", "np.ndarray"]]:
+        """Return (rowids, scores) of the partition's best ``top_k`` rows for each query."""
+
+        # Narrow to the candidate rows first so filtered searches cost
+        # O(rows for those links) rather than O(entire store).
+        candidates: Optional["np.ndarray"] = None
+        if allowed_link_ids is not None:
+            candidates = _of_chunk_types(resident, resident.positions_for_links(allowed_link_ids), allowed_chunk_types)
+        elif not exact:
+            # Approximate stages filter by chunk type before checking they still hold top_k rows.
+            linked = self._coarse_to_fine_candidates(batch_id, resident, queries, top_k, allowed_chunk_types)
+            probed = self._ivf_candidates(batch_id, resident, queries, top_k, allowed_chunk_types)
+            candidates = linked if probed is None else probed
+            if linked is not None and probed is not None:
+                # Both apply: stage two scores the selected links' rows in the probed lists.
+                both = np.intersect1d(linked, probed, assume_unique=True)
+                candidates = both if len(both) >= top_k else linked
+        if candidates is None and allowed_chunk_types is not None:
+            candidates = _of_chunk_types(resident, None, allowed_chunk_types)
+
+        if candidates is not None and not len(candidates):
+            empty = (np.zeros(0, dtype="int64"), np.zeros(0, dtype="float32"))
+            return [empty for _ in range(len(queries))]
+
+        # Stored rows are unit-normalized, so one (queries x rows) product yields cosine scores.
+        score_matrix = resident.scores(queries, candidates)
+        hits: List[Tuple["np.ndarray", "np.ndarray"]] = []
+        for scores in score_matrix:
+            winners = self._top_k_indices(scores, top_k)
+            positions = candidates[winners] if candidates is not None else winners
+            hits.append((resident.rowids[positions], scores[winners]))
+        return hits
+
+    def _search_scan(
+        self,
+        query_vector: Sequence[float],
+        *,
+        top_k: int,
+        allowed_batch_ids: Optional[set],
+        allowed_link_ids: Optional[set],
+        allowed_chunk_types: Optional[set],
+    ) -> List[VectorSearchResult]:
+        """Row-by-row scan used when NumPy is unavailable."""
+
+        where, params = self._filter_clause(allowed_link_ids, allowed_chunk_types, allowed_batch_ids)
+        with self._pool.reading() as connection:
+            encodings = {
+                (row[0], row[1]): unpack_embedding_version(row[2])[1]
+                for row in connection.execute("SELECT batch_id, link_id, embedding_version FROM content_items")
+            }
+            rows = connection.execute(
+                "SELECT chunk_id, link_id, chunk_index, chunk_type, scale, vector, text_preview, metadata_json, batch_id "
+                f"FROM embeddings{where}",
+                params,
+            ).fetchall()
+
+        results: List[VectorSearchResult] = []
+        for row in rows:
+            chunk_id, link_id, _, chunk_type, scale, vector_blob, text_preview, metadata_json, batch_id = row
             metadata = json.loads(metadata_json or "{}")
-            candidate_vector = self._deserialize_vector(vector_blob)
+            candidate_vector = self._deserialize_vector(
+                vector_blob, encodings.get((batch_id, link_id), "float32")
+            )
 
             score = self._cosine_similarity(query_vector, candidate_vector)
             results.append(
@@ -204,30 +1108,731 @@ class SQLiteVectorStore:
                     score=score,
                     text_preview=text_preview or "",
                     metadata=metadata,
+                    batch_id=batch_id,
                 )
             )
 
         results.sort(key=lambda r: r.score, reverse=True)
         return results[:top_k]
 
+    @staticmethod
+    def _filter_clause(
+        allowed_link_ids: Optional[set],
+        allowed_chunk_types: Optional[set],
+        allowed_batch_ids: Optional[set] = None,
+    ) -> Tuple[str, List[str]]:
+        """Build a WHERE clause served by idx_embeddings_batch / idx_embeddings_link_chunk_type."""
+
+        clauses: List[str] = []
+        params: List[str] = []
+        if allowed_batch_ids is not None:
+            batch_ids = sorted(allowed_batch_ids)
+            clauses.append(f"batch_id IN ({','.join('?' for _ in batch_ids)})")
+            params.extend(batch_ids)
+        if allowed_link_ids is not None:
+            link_ids = sorted(allowed_link_ids)
+            clauses.append(f"link_id IN ({','.join('?' for _ in link_ids)})")
+            params.extend(link_ids)
+        if allowed_chunk_types is not None:
+            chunk_types = sorted(allowed_chunk_types)
+            clauses.append(f"chunk_type IN ({','.join('?' for _ in chunk_types)})")
+            params.extend(chunk_types)
+        if not clauses:
+            return "", params
+        return " WHERE " + " AND ".join(clauses), params
+
+    @staticmethod
+    def _top_k_indices(scores: "np.ndarray", top_k: int) -> "np.ndarray":
+        """Indices of the ``top_k`` highest scores, best first."""
+
+        if top_k >= len(scores):
+            return np.argsort(-scores, kind="stable")
+        part = np.argpartition(-scores, top_k - 1)[:top_k]
+        return part[np.argsort(-scores[part], kind="stable")]
+
+    def _materialize_many(self, ranked: List[Tuple["np.ndarray", "np.ndarray"]]) -> List[List[VectorSearchResult]]:
+        """Decode text/metadata for every query's winners with a single fetch."""
+
+        all_rowids = sorted({int(r) for rowids, _ in ranked for r in rowids})
+        by_rowid = self._fetch_result_rows(all_rowids)
+        return [
+            self._build_results(by_rowid, rowids.tolist(), scores.tolist())
+            for rowids, scores in ranked
+        ]
+
+    def _materialize(self, rowids: List[int], scores: List[float]) -> List[VectorSearchResult]:
+        """Decode text/metadata for the winning rows only, preserving score order."""
+
+        return self._build_results(self._fetch_result_rows(rowids), rowids, scores)
+
+    def _fetch_result_rows(self, rowids: List[int]) -> Dict[int, tuple]:
+        result: Dict[int, tuple] = {}
+        for start in range(0, len(rowids), _SQL_CHUNK):
+            chunk = rowids[start:start + _SQL_CHUNK]
+            placeholders = ",".join("?" for _ in chunk)
+            with self._pool.reading() as connection:
+                rows = connection.execute(
+                    f"SELECT rowid, chunk_id, link_id, text_preview, metadata_json, batch_id FROM embeddings WHERE rowid IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            result.update((row[0], row) for row in rows)
+        return result
+
+    @staticmethod
+    def _build_results(by_rowid: Dict[int, tuple], rowids: List[int], scores: List[float]) -> List[VectorSearchResult]:
+        results: List[VectorSearchResult] = []
+        for rowid, score in zip(rowids, scores):
+            row = by_rowid.get(rowid)
+            if row is None:  # deleted by a concurrent writer since the matrix was loaded
+                continue
+            _, chunk_id, link_id, text_preview, metadata_json, batch_id = row
+            results.append(
+                VectorSearchResult(
+                    chunk_id=chunk_id,
+                    link_id=link_id,
+                    score=float(score),
+                    text_preview=text_preview or "",
+                    metadata=json.loads(metadata_json or "{}"),
+                    batch_id=batch_id,
+                )
+            )
+        return results
+
+    # ------------------------------------------------------------------
+    # Resident matrix maintenance
+    # ------------------------------------------------------------------
+    def _ensure_resident(self, batch_id: str, generation: int) -> _ResidentMatrix:
+        """Return the partition's resident matrix, reloading it if another writer committed."""
+
+        resident = self._residents.get(batch_id)
+        if resident is not None and resident.generation == generation:
+            return resident
+        with self._index_lock:
+            # Another thread may have loaded it while this one waited.
+            resident = self._residents.get(batch_id)
+            if resident is None or resident.generation != generation:
+                resident = self._load_segment(batch_id, generation) if self.segments else None
+                if resident is None:
+                    resident = self._load_resident(batch_id, generation)
+                    if self.segments:
+                        self._write_segment(batch_id, resident)
+                self._residents[batch_id] = resident
+        return resident
+
+    # ------------------------------------------------------------------
+    # Memory-mapped segments
+    # ------------------------------------------------------------------
+    def export_segments(self, batch_ids: Optional[Iterable[str]] = None) -> List[Path]:
+        """Write current ``.npy`` segments for ``batch_ids`` (default: every partition).
+
+        Partitions whose segment already matches the store generation are
+        left alone. Other processes opening the store with ``segments=True``
+        then map these files instead of reading every blob from SQLite.
+        """
+
+        if np is None:
+            return []
+        with self._index_lock:
+            return self._export_segments(batch_ids)
+
+    def _export_segments(self, batch_ids: Optional[Iterable[str]]) -> List[Path]:
+        generations = self.partition_generations()
+        paths: List[Path] = []
+        for batch_id in generations if batch_ids is None else batch_ids:
+            if batch_id not in generations:
+                continue
+            generation = generations[batch_id]
+            resident = self._residents.get(batch_id)
+            if resident is None or resident.generation != generation:
+                resident = self._load_segment(batch_id, generation)
+                if resident is not None:
+                    self._residents[batch_id] = resident
+                    continue
+                resident = self._ensure_resident(batch_id, generation)
+            paths.append(self._write_segment(batch_id, resident))
+        return paths
+
+    def _segment_dir(self) -> Path:
+        db_path = Path(self.db_path)
+        return db_path.parent / f"{db_path.stem}.segments"
+
+    def _write_segment(self, batch_id: str, resident: _ResidentMatrix) -> Path:
+        t0 = time.perf_counter()
+        path = VectorSegment(
+            generation=resident.generation,
+            matrix=resident.matrix,
+            rowids=resident.rowids,
+            link_ids=resident.link_ids,
+            chunk_types=resident.chunk_types,
+            scales=resident.scales,
+        ).save(self._segment_dir(), self._safe_batch_name(batch_id), self.quantization)
+        logger.debug(
+            "[VECTOR-STORE] Exported segment for batch %s: rows=%s in %.1fms",
+            batch_id,
+            len(resident.rowids),
+            (time.perf_counter() - t0) * 1000.0,
+        )
+        return path
+
+    def _load_segment(self, batch_id: str, generation: int) -> Optional[_ResidentMatrix]:
+        segment = VectorSegment.load(
+            self._segment_dir(), self._safe_batch_name(batch_id), self.quantization, generation
+        )
+        if segment is None:
+            return None
+        if len(segment.rowids) and segment.matrix.shape[1] != self.embedding_dimension:
+            return None
+        return _ResidentMatrix(
+            generation=generation,
+            matrix=segment.matrix,
+            rowids=segment.rowids,
+            link_ids=segment.link_ids,
+            chunk_types=segment.chunk_types,
+            link_ranges=self._link_ranges(segment.link_ids),
+            scales=segment.scales,
+        )
+
+    @staticmethod
+    def _link_ranges(link_ids: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+        """``link_id -> [start, end)`` for rows already grouped by link."""
+
+        link_ranges: Dict[str, Tuple[int, int]] = {}
+        for position, link_id in enumerate(link_ids):
+            start, _ = link_ranges.get(link_id, (position, position))
+            link_ranges[link_id] = (start, position + 1)
+        return link_ranges
+
+    def _load_resident(self, batch_id: str, generation: int) -> _ResidentMatrix:
+        t0 = time.perf_counter()
+        with self._pool.reading() as connection:
+            rows = connection.execute(
+                "SELECT e.rowid, e.link_id, e.chunk_type, e.vector, c.embedding_version FROM embeddings e "
+                "JOIN content_items c ON c.batch_id = e.batch_id AND c.link_id = e.link_id "
+                "WHERE e.batch_id = ? ORDER BY e.link_id, e.rowid",
+                (batch_id,),
+            ).fetchall()
+
+        quantized = self.quantization == "int8"
+        vectors: List["np.ndarray"] = []
+        scales: List[float] = []
+        kept: List[Tuple[int, str, str]] = []
+        dimension: Optional[int] = None
+        skipped = 0
+        for rowid, link_id, chunk_type, blob, stored_version in rows:
+            encoding = unpack_embedding_version(stored_version)[1]
+            if quantized and encoding == "int8":
+                scale, vec = self._split_int8_blob(blob)
+            elif quantized:
+                # Not migrated yet: quantize in memory, exactly as reencode_link() would.
+                scale, vec = self._quantize_array(self._decode_vector_array(blob, encoding))
+            else:
+                scale, vec = 1.0, self._decode_vector_array(blob, encoding)
+            if dimension is None:
+                dimension = int(vec.shape[0])
+            if vec.shape[0] != dimension:
+                skipped += 1
+                continue
+            vectors.append(vec)
+            scales.append(scale)
+            kept.append((rowid, link_id, chunk_type or ""))
+
+        if skipped:
+            logger.warning(
+                "[VECTOR-STORE] Skipped %s rows whose dimension differs from %s while loading resident matrix",
+                skipped,
+                dimension,
+            )
+
+        link_ranges = self._link_ranges([k[1] for k in kept])
+
+        dtype = "int8" if quantized else "float32"
+        resident = _ResidentMatrix(
+            generation=generation,
+            matrix=np.vstack(vectors).astype(dtype, copy=False)
+            if vectors
+            else np.zeros((0, self.embedding_dimension), dtype=dtype),
+            rowids=np.asarray([k[0] for k in kept], dtype="int64"),
+            link_ids=np.asarray([k[1] for k in kept], dtype=object),
+            chunk_types=np.asarray([k[2] for k in kept], dtype=object),
+            link_ranges=link_ranges,
+            scales=np.asarray(scales, dtype="float32") if quantized else None,
+        )
+        logger.debug(
+            "[VECTOR-STORE] Loaded resident matrix for batch %s: rows=%s dim=%s in %.1fms",
+            batch_id,
+            len(kept),
+            resident.dimension,
+            (time.perf_counter() - t0) * 1000.0,
+        )
+        return resident
+
+    def _sync_resident(
+        self,
+        *,
+        batch_id: str,
+        inserts: List[VectorRecord],
+        normalized: Optional["np.ndarray"],
+        inserted_rowids: Dict[str, Dict[str, int]],
+        kept_rowids: Dict[str, List[int]],
+        generation_before: int,
+    ) -> None:
+        """Apply committed link replacements to the resident matrix in place.
+
+        Every link in ``kept_rowids`` was rewritten: its surviving rows are
+        carried over from the old block and followed by its ``inserts``
+        (whose unit vectors are the rows of ``normalized``). Falls back to
+        invalidation when the matrix was already stale (another writer
+        committed in between), so the next search reloads from SQLite.
+        """
+
+        resident = self._residents.get(batch_id)
+        if resident is None:
+            return
+        if resident.generation != generation_before or (inserts and normalized is None):
+            self._residents.pop(batch_id, None)
+            return
+        if inserts and normalized.shape[1] != resident.dimension:
+            self._residents.pop(batch_id, None)
+            return
+
+        new_positions: Dict[str, List[int]] = {}
+        for position, record in enumerate(inserts):
+            new_positions.setdefault(record.link_id, []).append(position)
+
+        n_rows = len(resident.rowids)
+        dropped = np.zeros(n_rows, dtype=bool)
+        for link_id in kept_rowids:
+            start, end = resident.link_ranges.get(link_id, (0, 0))
+            dropped[start:end] = True
+        removed_before = np.concatenate([[0], np.cumsum(dropped)])
+        link_ranges = {
+            other: (s - int(removed_before[s]), e - int(removed_before[s]))
+            for other, (s, e) in resident.link_ranges.items()
+            if other not in kept_rowids
+        }
+
+        # Rewritten links move to the end: surviving rows first, then new rows.
+        old_positions = [np.flatnonzero(~dropped)]
+        segments: List[Tuple[str, "np.ndarray", List[int]]] = []
+        tail = len(old_positions[0])
+        for link_id, rowids in kept_rowids.items():
+            start, end = resident.link_ranges.get(link_id, (0, 0))
+            kept = np.arange(start, end)[np.isin(resident.rowids[start:end], np.asarray(rowids, dtype="int64"))]
+            if len(kept) != len(rowids):
+                self._residents.pop(batch_id, None)
+                return
+            fresh = new_positions.get(link_id, [])
+            segments.append((link_id, kept, fresh))
+            if len(kept) or fresh:
+                link_ranges[link_id] = (tail, tail + len(kept) + len(fresh))
+                tail += len(kept) + len(fresh)
+
+        quantized = resident.scales is not None
+        new_matrix = normalized
+        new_scales = None
+        if inserts and quantized:
+            new_scales, new_matrix = self._quantize_rows(normalized)
+
+        # New rows join the nearest existing IVF list; retraining is deferred to _ensure_ivf().
+        index = self._ivf.get(batch_id)
+        track_ivf = resident.assignments is not None and index is not None
+        new_assignments = index.assign(new_matrix) if track_ivf and inserts else None
+
+        matrix_parts = [resident.matrix[old_positions[0]]]
+        rowid_parts = [resident.rowids[old_positions[0]]]
+        link_parts = [resident.link_ids[old_positions[0]]]
+        type_parts = [resident.chunk_types[old_positions[0]]]
+        scale_parts = [resident.scales[old_positions[0]]] if quantized else []
+        assignment_parts = [resident.assignments[old_positions[0]]] if track_ivf else []
+        for link_id, kept, fresh in segments:
+            link_rowids = inserted_rowids.get(link_id, {})
+            try:
+                fresh_rowids = [link_rowids[inserts[position].chunk_id] for position in fresh]
+            except KeyError:
+                self._residents.pop(batch_id, None)
+                return
+            matrix_parts += [resident.matrix[kept], new_matrix[fresh] if fresh else resident.matrix[:0]]
+            rowid_parts += [resident.rowids[kept], np.asarray(fresh_rowids, dtype="int64")]
+            link_parts += [resident.link_ids[kept], np.asarray([link_id] * len(fresh), dtype=object)]
+            type_parts += [
+                resident.chunk_types[kept],
+                np.asarray([inserts[position].chunk_type or "" for position in fresh], dtype=object),
+            ]
+            if quantized:
+                scale_parts += [resident.scales[kept], new_scales[fresh] if fresh else resident.scales[:0]]
+            if track_ivf:
+                assignment_parts += [
+                    resident.assignments[kept],
+                    new_assignments[fresh] if fresh else resident.assignments[:0],
+                ]
+        if track_ivf:
+            self._ivf_dirty.add(batch_id)
+
+        self._residents[batch_id] = _ResidentMatrix(
+            generation=generation_before + 1,
+            matrix=np.ascontiguousarray(np.concatenate(matrix_parts), dtype=resident.matrix.dtype),
+            rowids=np.concatenate(rowid_parts),
+            link_ids=np.concatenate(link_parts),
+            chunk_types=np.concatenate(type_parts),
+            link_ranges=link_ranges,
+            assignments=np.concatenate(assignment_parts) if track_ivf else None,
+            scales=np.concatenate(scale_parts).astype("float32") if quantized else None,
+        )
+
+    # ------------------------------------------------------------------
+    # Coarse-to-fine search
+    # ------------------------------------------------------------------
+    def _coarse_to_fine_candidates(
+        self,
+        batch_id: str,
+        resident: _ResidentMatrix,
+        queries: "np.ndarray",
+        top_k: int,
+        allowed_chunk_types: Optional[set] = None,
+    ) -> Optional["np.ndarray"]:
+        """Row positions of the links whose coarse rows score best, or None for a flat scan.
+
+        Multi-query searches take the union of every query's links. Only rows
+        of ``allowed_chunk_types`` are returned; if fewer than ``top_k`` remain
+        the search falls back to a flat scan.
+        """
+
+        settings = self.hierarchical
+        if settings is None or not settings.enable or len(resident.rowids) < settings.min_rows:
+            return None
+        coarse, uncovered = self._coarse_rows(batch_id, resident)
+        if not len(coarse):
+            return None
+
+        limit = settings.links_for(top_k)
+        coarse_links = resident.link_ids[coarse]
+        chosen = set()
+        for scores in resident.scores(queries, coarse):
+            chosen.update(best_links(scores, coarse_links, limit))
+        positions = resident.positions_for_links(chosen)
+        if len(uncovered):
+            positions = np.concatenate([positions, uncovered])
+        positions = _of_chunk_types(resident, positions, allowed_chunk_types)
+        if len(positions) < top_k:
+            return None
+        logger.debug(
+            "[VECTOR-STORE] Coarse-to-fine search in batch %s: links=%s rows=%s/%s",
+            batch_id,
+            len(chosen),
+            len(coarse) + len(positions),
+            len(resident.rowids),
+        )
+        return positions
+
+    def _coarse_rows(self, batch_id: str, resident: _ResidentMatrix) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Positions of ``scale='coarse'`` rows and of every row of links that have none."""
+
+        if resident._coarse is None:
+            with self._pool.reading() as connection:
+                rows = connection.execute(
+                    "SELECT rowid FROM embeddings WHERE batch_id = ? AND scale = 'coarse'", (batch_id,)
+                ).fetchall()
+            coarse_rowids = np.asarray([row[0] for row in rows], dtype="int64")
+            coarse = np.flatnonzero(np.isin(resident.rowids, coarse_rowids))
+            covered = set(resident.link_ids[coarse].tolist())
+            uncovered = resident.positions_for_links(set(resident.link_ranges) - covered)
+            resident._coarse = (coarse, uncovered)
+        return resident._coarse
+
     # ------------------------------------------------------------------
-    def _serialize_vector(self, vector: Sequence[float]) -> Tuple[bytes, float]:
+    # IVF index maintenance
+    # ------------------------------------------------------------------
+    def _ivf_candidates(
+        self,
+        batch_id: str,
+        resident: _ResidentMatrix,
+        queries: "np.ndarray",
+        top_k: int,
+        allowed_chunk_types: Optional[set] = None,
+    ) -> Optional["np.ndarray"]:
+        """Row positions in the queries' ``nprobe`` nearest lists, or None for an exact scan.
+
+        Multi-query searches score the union of every query's lists, which
+        can only improve recall relative to probing each query alone. Like
+        coarse-to-fine, the chunk-type filter applies before the top_k check.
+        """
+
+        settings = self.ivf_settings
+        if settings is None or not settings.enable or len(resident.rowids) < settings.min_rows:
+            return None
+        with self._index_lock:
+            index = self._ensure_ivf(batch_id, resident)
+        list_ids = np.unique(np.concatenate([index.probe(query, settings.nprobe) for query in queries]))
+        positions = resident.inverted_lists(index.n_lists).positions(list_ids)
+        positions = _of_chunk_types(resident, positions, allowed_chunk_types)
+        if len(positions) < top_k:
+            return None
+        return positions
+
+    def _ensure_ivf(self, batch_id: str, resident: _ResidentMatrix) -> IVFIndex:
+        """Return the partition's IVF index, training or re-assigning rows as needed.
+
+        Rows added since the index was persisted are assigned to the existing
+        centroids; a full retrain only happens once the partition has grown
+        by ``retrain_growth`` since the last training.
+        """
+
+        settings = self.ivf_settings
+        index = self._ivf.get(batch_id)
+        stored = None
+        if resident.assignments is None:
+            stored = IVFIndex.load(self._ivf_path(batch_id))
+            if stored is not None:
+                index = stored[0]
+
+        if index is not None and (
+            index.centroids.shape[1] != resident.dimension
+            or len(resident.rowids) > index.trained_rows * settings.retrain_growth
+        ):
+            index, stored = None, None
+
+        if index is None:
+            t0 = time.perf_counter()
+            index = IVFIndex.train(resident.matrix, settings)
+            resident.assignments = index.assign(resident.matrix)
+            resident._lists = None
+            self._ivf[batch_id] = index
+            self._save_ivf(batch_id, resident)
+            logger.info(
+                "[VECTOR-STORE] Trained IVF index for batch %s: rows=%s lists=%s in %.1fms",
+                batch_id,
+                len(resident.rowids),
+                index.n_lists,
+                (time.perf_counter() - t0) * 1000.0,
+            )
+            return index
+
+        self._ivf[batch_id] = index
+        if resident.assignments is None:
+            resident.assignments = self._carry_assignments(batch_id, index, resident, stored)
+            resident._lists = None
+        return index
+
+    def _carry_assignments(
+        self,
+        batch_id: str,
+        index: IVFIndex,
+        resident: _ResidentMatrix,
+        stored: Optional[Tuple[IVFIndex, "np.ndarray", "np.ndarray"]],
+    ) -> "np.ndarray":
+        """Reuse persisted list assignments by rowid and assign only unseen rows."""
+
+        assignments = np.empty(len(resident.rowids), dtype="int32")
+        missing = np.ones(len(resident.rowids), dtype=bool)
+        if stored is not None and len(stored[1]):
+            order = np.argsort(stored[1])
+            stored_rowids, stored_assignments = stored[1][order], stored[2][order]
+            slots = np.minimum(np.searchsorted(stored_rowids, resident.rowids), len(stored_rowids) - 1)
+            found = stored_rowids[slots] == resident.rowids
+            assignments[found] = stored_assignments[slots[found]]
+            missing = ~found
+        if missing.any():
+            assignments[missing] = index.assign(resident.matrix[missing])
+            self._ivf_dirty.add(batch_id)
+        return assignments
+
+    def _ivf_path(self, batch_id: str) -> Path:
+        db_path = Path(self.db_path)
+        return db_path.parent / f"{db_path.stem}.ivf" / f"{self._safe_batch_name(batch_id)}.npz"
+
+    def _save_ivf(self, batch_id: str, resident: _ResidentMatrix) -> None:
+        index = self._ivf.get(batch_id)
+        if index is None or resident.assignments is None:
+            return
+        index.save(self._ivf_path(batch_id), rowids=resident.rowids, assignments=resident.assignments)
+        self._ivf_dirty.discard(batch_id)
+
+    def _flush_ivf(self) -> None:
+        """Persist assignments added incrementally since the last save."""
+
+        for batch_id in list(self._ivf_dirty):
+            resident = self._residents.get(batch_id)
+            if resident is not None:
+                self._save_ivf(batch_id, resident)
+        self._ivf_dirty.clear()
+
+    # ------------------------------------------------------------------
+    # Partition management
+    # ------------------------------------------------------------------
+    def list_batches(self) -> Dict[str, int]:
+        """Return ``{batch_id: chunk_count}`` for every partition in the store."""
+
+        with self._pool.reading() as connection:
+            rows = connection.execute("SELECT batch_id, COUNT(*) FROM embeddings GROUP BY batch_id").fetchall()
+        return {row[0]: int(row[1]) for row in rows}
+
+    @_serialized
+    def archive_batch(self, batch_id: str, archive_path: Optional[Path] = None) -> Path:
+        """Move a batch partition into its own SQLite file.
+
+        Freed pages are reused by later inserts (and returned to the OS via
+        incremental vacuum when enabled), so no whole-store VACUUM is needed.
+        """
+
+        if archive_path is None:
+            archive_path = Path(self.db_path).parent / "archive" / f"{self._safe_batch_name(batch_id)}.sqlite"
+        archive_path = Path(archive_path)
+        archive_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+        try:
+            with self.connection:
+                self.connection.execute(_CONTENT_ITEMS_DDL.format(schema="archive."))
+                self.connection.execute(_EMBEDDINGS_DDL.format(schema="archive.", table="embeddings"))
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO archive.content_items({_CONTENT_ITEM_COLUMNS}) "
+                    f"SELECT {_CONTENT_ITEM_COLUMNS} FROM main.content_items WHERE batch_id = ?",
+                    (batch_id,),
+                )
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO archive.embeddings({_EMBEDDING_COLUMNS}) "
+                    f"SELECT {_EMBEDDING_COLUMNS} FROM main.embeddings WHERE batch_id = ?",
+                    (batch_id,),
+                )
+                self._drop_partition_rows(batch_id)
+        finally:
+            self.connection.execute("DETACH DATABASE archive")
+
+        self.connection.execute("PRAGMA incremental_vacuum;")
+        logger.info("[VECTOR-STORE] Archived batch %s to %s", batch_id, archive_path)
+        return archive_path
+
+    @_serialized
+    def restore_batch(self, archive_path: Path) -> List[str]:
+        """Re-attach every partition stored in an archive file; returns their batch ids."""
+
+        self.connection.execute("ATTACH DATABASE ? AS archive", (str(archive_path),))
+        try:
+            with self.connection:
+                self._add_missing_columns("archive")
+                batch_ids = [
+                    row[0]
+                    for row in self.connection.execute("SELECT DISTINCT batch_id FROM archive.content_items")
+                ]
+                for batch_id in batch_ids:
+                    self._drop_partition_rows(batch_id)
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO main.content_items({_CONTENT_ITEM_COLUMNS}) "
+                    f"SELECT {_CONTENT_ITEM_COLUMNS} FROM archive.content_items"
+                )
+                self.connection.execute(
+                    f"INSERT OR REPLACE INTO main.embeddings({_EMBEDDING_COLUMNS}) "
+                    f"SELECT {_EMBEDDING_COLUMNS} FROM archive.embeddings"
+                )
+                if self.fts_enabled:
+                    for batch_id in batch_ids:
+                        self._backfill_fts(batch_id)
+        finally:
+            self.connection.execute("DETACH DATABASE archive")
+        return batch_ids
+
+    @_serialized
+    def drop_batch(self, batch_id: str) -> None:
+        with self.connection:
+            self._drop_partition_rows(batch_id)
+        self.connection.execute("PRAGMA incremental_vacuum;")
+
+    def _drop_partition_rows(self, batch_id: str) -> None:
+        # Must be called inside the write transaction. The partition's
+        # generation key is kept so counters never repeat after a restore.
+        self.connection.execute("DELETE FROM main.embeddings WHERE batch_id = ?", (batch_id,))
+        if self.fts_enabled:
+            self.connection.execute("DELETE FROM main.chunk_fts WHERE batch_id = ?", (batch_id,))
+        self.connection.execute("DELETE FROM main.content_items WHERE batch_id = ?", (batch_id,))
+        self._bump_generation(batch_id)
+        self._residents.pop(batch_id, None)
+        self._ivf.pop(batch_id, None)
+        self._ivf_dirty.discard(batch_id)
+        self._ivf_path(batch_id).unlink(missing_ok=True)
+        VectorSegment.remove(self._segment_dir(), self._safe_batch_name(batch_id))
+
+    @staticmethod
+    def _safe_batch_name(batch_id: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", batch_id) or "_default"
+
+    def _serialize_vector(self, vector: Sequence[float], encoding: str = "float32") -> Tuple[bytes, float]:
+        """Encode a unit-normalized vector.
+
+        ``int8`` blobs are a float32 scale followed by one signed byte per
+        dimension (symmetric per-vector quantization).
+        """
+
         if np is not None:  # pragma: no branch - depends on numpy availability
             arr = np.asarray(vector, dtype="float32")
             norm = float(np.linalg.norm(arr)) or 1.0
             normalized = arr / norm
+            if encoding == "int8":
+                scale, codes = self._quantize_array(normalized)
+                return np.float32(scale).tobytes() + codes.tobytes(), 1.0
             return normalized.tobytes(), 1.0
 
-        # Fallback: JSON encode and compute norm manually
+        # Fallback: same layouts via the stdlib array module
         norm = (sum(float(x) ** 2 for x in vector) or 1.0) ** 0.5
         normalized = [float(x) / norm for x in vector]
-        return json.dumps(normalized).encode("utf-8"), 1.0
+        if encoding == "int8":
+            scale = (max((abs(x) for x in normalized), default=0.0) / 127.0) or 1.0
+            codes = array("b", (max(-127, min(127, int(round(x / scale)))) for x in normalized))
+            return array("f", [scale]).tobytes() + codes.tobytes(), 1.0
+        return array("f", normalized).tobytes(), 1.0
 
-    def _deserialize_vector(self, payload: bytes) -> List[float]:
+    def _deserialize_vector(self, payload: bytes, encoding: str = "float32") -> List[float]:
         if np is not None:  # pragma: no branch
-            arr = np.frombuffer(payload, dtype="float32")
-            return arr.astype(float).tolist()
-        return [float(x) for x in json.loads(payload.decode("utf-8"))]
+            return self._decode_vector_array(payload, encoding).astype(float).tolist()
+        if encoding == "int8":
+            scale = array("f", payload[:4])[0]
+            return [code * scale for code in array("b", payload[4:])]
+        legacy = self._legacy_json_vector(payload)
+        if legacy is not None:
+            return legacy
+        return array("f", payload).tolist()
+
+    @classmethod
+    def _decode_vector_array(cls, payload: bytes, encoding: str = "float32") -> "np.ndarray":
+        if encoding == "int8":
+            scale, codes = cls._split_int8_blob(payload)
+            return codes.astype("float32") * np.float32(scale)
+        legacy = cls._legacy_json_vector(payload)
+        if legacy is not None:
+            return np.asarray(legacy, dtype="float32")
+        return np.frombuffer(payload, dtype="float32")
+
+    @staticmethod
+    def _quantize_array(vector: "np.ndarray") -> Tuple[float, "np.ndarray"]:
+        peak = float(np.max(np.abs(vector))) if len(vector) else 0.0
+        scale = (peak / 127.0) or 1.0
+        codes = np.clip(np.rint(vector / scale), -127, 127).astype("int8")
+        return float(np.float32(scale)), codes
+
+    @staticmethod
+    def _quantize_rows(matrix: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """Row-wise :meth:`_quantize_array`: float32 scales and int8 codes."""
+
+        peaks = np.max(np.abs(matrix), axis=1) if matrix.shape[1] else np.zeros(len(matrix), dtype="float32")
+        scales = (peaks / 127.0).astype("float32")
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype("int8")
+        return scales, codes
+
+    @staticmethod
+    def _split_int8_blob(payload: bytes) -> Tuple[float, "np.ndarray"]:
+        scale = float(np.frombuffer(payload[:4], dtype="float32")[0])
+        return scale, np.frombuffer(payload[4:], dtype="int8")
+
+    @staticmethod
+    def _legacy_json_vector(payload: bytes) -> Optional[List[float]]:
+        """Decode rows written as JSON by older builds running without NumPy."""
+
+        if payload[:1] != b"[" or payload[-1:] != b"]":
+            return None
+        try:
+            return [float(x) for x in json.loads(payload.decode("utf-8"))]
+        except (UnicodeDecodeError, ValueError, TypeError):
+            return None
 
     def _cosine_similarity(
         self,
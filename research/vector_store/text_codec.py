@@ -0,0 +1,55 @@
+"""Compression of full chunk text stored alongside the embeddings.
+
+Each blob starts with a one-byte codec tag so that stores written with
+``zstandard`` installed stay readable without it for zlib-tagged rows, and
+vice versa. zstd is preferred when available: it is both faster and
+denser than zlib on transcript text.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Optional
+
+try:  # Optional dependency; zlib is always available
+    import zstandard
+except Exception:  # pragma: no cover - fallback when zstandard unavailable
+    zstandard = None  # type: ignore
+
+_ZLIB = b"z"
+_ZSTD = b"s"
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 6
+
+
+def compress_text(text: str) -> Optional[bytes]:
+    """Compressed, codec-tagged UTF-8 bytes of ``text``; None for empty text."""
+
+    if not text:
+        return None
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return _ZSTD + zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(raw)
+    return _ZLIB + zlib.compress(raw, _ZLIB_LEVEL)
+
+
+def decompress_text(blob: Optional[bytes]) -> str:
+    """Inverse of :func:`compress_text`; raises ValueError for unreadable blobs."""
+
+    if not blob:
+        return ""
+    blob = bytes(blob)
+    tag, payload = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        try:
+            return zlib.decompress(payload).decode("utf-8")
+        except zlib.error as exc:
+            raise ValueError(f"corrupt zlib chunk text: {exc}") from exc
+    if tag == _ZSTD:
+        if zstandard is None:
+            raise ValueError("chunk text is zstd-compressed but the zstandard package is not installed")
+        try:
+            return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+        except zstandard.ZstdError as exc:
+            raise ValueError(f"corrupt zstd chunk text: {exc}") from exc
+    raise ValueError(f"unknown chunk text codec {tag!r}")
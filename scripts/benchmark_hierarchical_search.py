@@ -0,0 +1,122 @@
+"""Benchmark coarse-to-fine search against the flat scan.
+
+Builds a synthetic partition in which every link is one topic: a coarse
+document vector at the topic centre and fine transcript vectors scattered
+around it. Queries are drawn near a random topic. For each ``top_links``
+setting the report gives the mean query latency, the share of rows scored
+and recall@k against the flat (exact) results.
+
+    python scripts/benchmark_hierarchical_search.py --links 2000 --chunks 40 --dim 768 --top-links 8 32 128
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from research.vector_store.coarse_to_fine import HierarchicalSettings  # noqa: E402
+from research.vector_store.sqlite_vector_store import ContentUpdate, SQLiteVectorStore, VectorRecord  # noqa: E402
+
+
+def populate(store: SQLiteVectorStore, links: int, chunks: int, dim: int, spread: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(links, dim)).astype("float32")
+    updates = []
+    for link_idx in range(links):
+        link_id = f"link-{link_idx}"
+        fine = topics[link_idx] + spread * rng.normal(size=(chunks, dim)).astype("float32")
+        records = [
+            VectorRecord(
+                chunk_id=f"{link_id}::transcript::{idx}",
+                link_id=link_id,
+                chunk_index=idx,
+                chunk_type="transcript",
+                scale="fine",
+                embedding=vec,
+                text_preview="",
+                metadata={},
+            )
+            for idx, vec in enumerate(fine)
+        ]
+        records.append(
+            VectorRecord(
+                chunk_id=f"{link_id}::doc",
+                link_id=link_id,
+                chunk_index=-1,
+                chunk_type="document",
+                scale="coarse",
+                embedding=topics[link_idx],
+                text_preview="",
+                metadata={},
+            )
+        )
+        updates.append(ContentUpdate(link_id, records, "bench"))
+    store.bulk_replace_content_embeddings(updates, embedding_version=1, batch_id="bench")
+    return topics
+
+
+def timed_search(store: SQLiteVectorStore, queries: np.ndarray, top_k: int, exact: bool):
+    results: List[List[str]] = []
+    t0 = time.perf_counter()
+    for query in queries:
+        hits = store.search(query_vector=query, top_k=top_k, filters={"batch_ids": ["bench"]}, exact=exact)
+        results.append([hit.chunk_id for hit in hits])
+    return results, (time.perf_counter() - t0) / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=40, help="fine chunks per link")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--spread", type=float, default=0.8, help="noise of fine chunks around their topic")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--top-links", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rows = args.links * (args.chunks + 1)
+    report = {"links": args.links, "rows": rows, "dim": args.dim, "top_k": args.top_k, "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteVectorStore(db_path=Path(tmp) / "bench.sqlite", embedding_dimension=args.dim)
+        try:
+            topics = populate(store, args.links, args.chunks, args.dim, args.spread, args.seed)
+            rng = np.random.default_rng(args.seed + 1)
+            picks = rng.integers(args.links, size=args.queries)
+            queries = topics[picks] + args.spread * rng.normal(size=(args.queries, args.dim)).astype("float32")
+
+            store.search(query_vector=queries[0], top_k=args.top_k, exact=True)  # load the resident matrix
+            flat, flat_latency = timed_search(store, queries, args.top_k, exact=True)
+            report["modes"]["flat"] = {"ms_per_query": round(flat_latency * 1000, 3), "rows_scored": 1.0, "recall": 1.0}
+
+            for top_links in args.top_links:
+                store.hierarchical = HierarchicalSettings(top_links=top_links, links_per_result=0.0, min_rows=0)
+                hierarchical, latency = timed_search(store, queries, args.top_k, exact=False)
+                recall = np.mean(
+                    [len(set(a) & set(b)) / max(1, len(b)) for a, b in zip(hierarchical, flat)]
+                )
+                scored = (args.links + min(top_links, args.links) * (args.chunks + 1)) / rows
+                report["modes"][f"top_links={top_links}"] = {
+                    "ms_per_query": round(latency * 1000, 3),
+                    "rows_scored": round(min(1.0, scored), 4),
+                    "recall": round(float(recall), 4),
+                    "speedup": round(flat_latency / latency, 2) if latency else None,
+                }
+        finally:
+            store.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Micro-benchmark: keyword windows via ``KeywordMatcher`` vs the per-word scan.
+
+Generates a transcript (default 100k words, mixed Latin and CJK tokens) and
+a keyword set (default 20), then times
+
+* ``per_word_scan``: the previous ``any(kw in w for kw in keywords)`` loop
+* ``matcher``: ``KeywordMatcher.windows`` over a prebuilt ``TranscriptIndex``
+* ``comments_*``: the same comparison for comment relevance, plus
+  ``CommentIndex`` (posting lists built once per batch) on a warm index
+
+and checks that both sides find the same words.
+
+    python scripts/benchmark_keyword_matcher.py --words 100000 --keywords 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from research.retrieval.comment_index import CommentIndex  # noqa: E402
+from research.retrieval.keyword_matcher import KeywordMatcher  # noqa: E402
+from research.retrieval.transcript_index import TranscriptIndex  # noqa: E402
+from research.utils.segmentation import WhitespaceSegmenter  # noqa: E402
+
+CJK = "数据模型训练推理向量检索评论视频用户平台内容算法"
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--keywords", type=int, default=20)
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = [f"Term{i}" for i in range(args.vocab)] + [a + b for a in CJK for b in CJK]
+    transcript = " ".join(rng.choice(vocab) for _ in range(args.words))
+    keywords = [kw.lower() for kw in rng.sample(vocab, args.keywords)]
+    comments = [" ".join(rng.choice(vocab) for _ in range(rng.randint(5, 40))) for _ in range(args.comments)]
+
+    def per_word_scan() -> List[int]:
+        lowered_words = [w.lower() for w in transcript.split()]
+        return [i for i, w in enumerate(lowered_words) if any(kw in w for kw in keywords)]
+
+    t0 = time.perf_counter()
+    # Whitespace words, so hits are comparable with the per-word scan
+    index = TranscriptIndex.build(transcript, WhitespaceSegmenter())
+    build_s = time.perf_counter() - t0
+    matcher = KeywordMatcher.of(keywords)
+
+    assert per_word_scan() == matcher.word_hits(index), "matcher and per-word scan disagree"
+    lowered_comments = [c.lower() for c in comments]
+    legacy_relevance = [sum(1 for kw in keywords if kw in c) for c in lowered_comments]
+    assert legacy_relevance == matcher.relevance(lowered_comments), "comment relevance disagrees"
+
+    scan_s = best_of(args.repeat, per_word_scan)
+    matcher_s = best_of(args.repeat, lambda: matcher.windows(index, 500))
+    comments_scan_s = best_of(
+        args.repeat, lambda: [sum(1 for kw in keywords if kw in c) for c in lowered_comments]
+    )
+    comments_matcher_s = best_of(args.repeat, lambda: matcher.relevance(lowered_comments))
+    t0 = time.perf_counter()
+    comment_idx = CommentIndex.build(comments)
+    comments_index_build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    indexed = comment_idx.relevance(matcher)  # first keyword set: expands tokens over the vocabulary
+    comments_index_first_s = time.perf_counter() - t0
+    assert indexed == {i: n for i, n in enumerate(legacy_relevance) if n}, "comment index disagrees"
+    comments_index_s = best_of(args.repeat, lambda: comment_idx.relevance(matcher))
+
+    report = {
+        "words": args.words,
+        "keywords": args.keywords,
+        "hits": len(matcher.word_hits(index)),
+        "index_build_ms": round(build_s * 1000, 2),
+        "per_word_scan_ms": round(scan_s * 1000, 2),
+        "matcher_ms": round(matcher_s * 1000, 2),
+        "speedup": round(scan_s / matcher_s, 1) if matcher_s else None,
+        "comments": args.comments,
+        "comments_scan_ms": round(comments_scan_s * 1000, 2),
+        "comments_matcher_ms": round(comments_matcher_s * 1000, 2),
+        "comments_speedup": round(comments_scan_s / comments_matcher_s, 1) if comments_matcher_s else None,
+        "comments_index_build_ms": round(comments_index_build_s * 1000, 2),
+        "comments_index_first_ms": round(comments_index_first_s * 1000, 2),
+        "comments_index_ms": round(comments_index_s * 1000, 2),
+        "comments_index_speedup": round(comments_scan_s / comments_index_s, 1) if comments_index_s else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
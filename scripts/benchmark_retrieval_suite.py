@@ -0,0 +1,318 @@
+"""Offline retrieval benchmark over synthetic batches; prints (or writes) JSON.
+
+For every corpus size a synthetic batch is generated (one topic per link,
+transcripts mixing topic words with common filler) and indexed with the
+hash embedding provider, so no network or API key is involved and runs are
+reproducible for a given ``--seed``. Each size reports:
+
+* ``index``: ``VectorIndexer.index_batch`` wall time and chunks/second
+* ``search`` / ``search_many``: ``VectorRetrievalService`` latency
+  percentiles (query embedding included, query caches cleared)
+* ``store_search``: ``SQLiteVectorStore.search`` latency on pre-embedded
+  queries (exact scan)
+* ``modes``: latency and recall@k against the exact scan for the
+  approximate modes (IVF, coarse-to-fine, int8)
+* ``memory``: resident set size after the run and its peak
+
+    python scripts/benchmark_retrieval_suite.py --sizes 1000 10000 100000 1000000 --output bench.json
+
+Compare two JSON files between releases to spot regressions in
+``research/vector_store`` and ``research/retrieval``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.config import Config  # noqa: E402
+from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig  # noqa: E402
+from research.embeddings.vector_indexer import VectorIndexer  # noqa: E402
+from research.retrieval.query_cache import QueryCacheSettings, shared_query_caches  # noqa: E402
+from research.retrieval.vector_retrieval_service import VectorRetrievalService  # noqa: E402
+from research.vector_store.coarse_to_fine import HierarchicalSettings  # noqa: E402
+from research.vector_store.ivf_index import IVFSettings  # noqa: E402
+from research.vector_store.sqlite_vector_store import SQLiteVectorStore  # noqa: E402
+
+try:  # Unix
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore
+
+try:  # Optional: more accurate RSS, and the only source on Windows
+    import psutil
+except ImportError:  # pragma: no cover - optional dependency
+    psutil = None  # type: ignore
+
+BATCH_ID = "bench"
+COMMON_WORDS = 5000
+TOPIC_WORDS = 60
+
+
+# ----------------------------------------------------------------------
+# Synthetic corpus
+# ----------------------------------------------------------------------
+class SyntheticCorpus:
+    """Links with topical transcripts sized to yield ``chunks_per_link`` chunks each."""
+
+    def __init__(self, chunks: int, *, chunks_per_link: int, chunk_words: int, topic_ratio: float, seed: int) -> None:
+        self.rng = np.random.default_rng(seed)
+        self.chunk_words = chunk_words
+        self.overlap = chunk_words // 4
+        self.links = max(1, chunks // chunks_per_link)
+        self.chunks_per_link = max(1, chunks // self.links)
+        self.topics = max(8, self.links // 10)
+        self.topic_ratio = topic_ratio
+        self.common = np.asarray([f"w{i}" for i in range(COMMON_WORDS)], dtype=object)
+        self.topic_vocab = np.asarray(
+            [[f"t{t}x{j}" for j in range(TOPIC_WORDS)] for t in range(self.topics)], dtype=object
+        )
+        self.link_topics = self.rng.integers(self.topics, size=self.links)
+
+    def _words(self, topic: int, count: int) -> np.ndarray:
+        words = self.common[self.rng.integers(COMMON_WORDS, size=count)]
+        topical = self.rng.random(count) < self.topic_ratio
+        words[topical] = self.topic_vocab[topic][self.rng.integers(TOPIC_WORDS, size=int(topical.sum()))]
+        return words
+
+    def batch(self) -> Dict[str, Dict[str, Any]]:
+        stride = self.chunk_words - self.overlap
+        words_per_link = stride * (self.chunks_per_link - 1) + self.chunk_words
+        data: Dict[str, Dict[str, Any]] = {}
+        for link in range(self.links):
+            topic = int(self.link_topics[link])
+            facts = [" ".join(self._words(topic, 12)) for _ in range(3)]
+            data[f"link-{link}"] = {
+                "source": "synthetic",
+                "transcript": " ".join(self._words(topic, words_per_link)),
+                "comments": [],
+                "summary": {"transcript_summary": {"key_facts": facts}},
+            }
+        return data
+
+    def queries(self, data: Dict[str, Dict[str, Any]], count: int, words: int = 24, noise: float = 0.3) -> List[str]:
+        link_ids = list(data)
+        queries = []
+        for _ in range(count):
+            link_id = link_ids[int(self.rng.integers(len(link_ids)))]
+            tokens = data[link_id]["transcript"].split()
+            start = int(self.rng.integers(max(1, len(tokens) - words)))
+            picked = np.asarray(tokens[start:start + words], dtype=object)
+            noisy = self.rng.random(len(picked)) < noise
+            picked[noisy] = self.common[self.rng.integers(COMMON_WORDS, size=int(noisy.sum()))]
+            queries.append(" ".join(picked))
+        return queries
+
+
+# ----------------------------------------------------------------------
+# Measurement helpers
+# ----------------------------------------------------------------------
+def percentiles(samples_s: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(samples_s, dtype="float64") * 1000.0
+    if not len(ms):
+        return {"p50_ms": None, "p95_ms": None, "mean_ms": None}
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def memory_mb() -> Dict[str, Optional[float]]:
+    rss = peak = None
+    if psutil is not None:
+        rss = psutil.Process().memory_info().rss / 2**20
+    elif Path("/proc/self/statm").exists():
+        import os
+
+        rss = int(Path("/proc/self/statm").read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    if resource is not None:
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak_kb / 2**20 if sys.platform == "darwin" else peak_kb / 2**10
+    return {
+        "rss_mb": round(rss, 1) if rss is not None else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+    }
+
+
+def clear_query_caches() -> None:
+    for cache in shared_query_caches(QueryCacheSettings()):
+        cache.clear()
+
+
+def timed_store_searches(store: SQLiteVectorStore, vectors: Sequence[Sequence[float]], top_k: int, exact: bool):
+    results: List[List[str]] = []
+    samples: List[float] = []
+    filters = {"batch_ids": [BATCH_ID]}
+    store.search(query_vector=vectors[0], top_k=top_k, filters=filters, exact=exact)  # load resident state
+    for vector in vectors:
+        t0 = time.perf_counter()
+        hits = store.search(query_vector=vector, top_k=top_k, filters=filters, exact=exact)
+        samples.append(time.perf_counter() - t0)
+        results.append([hit.chunk_id for hit in hits])
+    return results, samples
+
+
+def recall_at_k(approx: List[List[str]], exact: List[List[str]]) -> float:
+    scores = [len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact) if e]
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+# ----------------------------------------------------------------------
+def run_size(chunks: int, args: argparse.Namespace, workdir: Path) -> Dict[str, Any]:
+    corpus = SyntheticCorpus(
+        chunks,
+        chunks_per_link=args.chunks_per_link,
+        chunk_words=args.chunk_words,
+        topic_ratio=args.topic_ratio,
+        seed=args.seed,
+    )
+    data = corpus.batch()
+    queries = corpus.queries(data, args.queries)
+
+    store_dir = workdir / f"size-{chunks}"
+    config_path = workdir / f"config-{chunks}.yaml"
+    config_path.write_text(
+        yaml.safe_dump(
+            {
+                "research": {
+                    "embeddings": {
+                        "provider": "hash",
+                        "dimension": args.dim,
+                        "batch_size": 256,
+                        "background": False,
+                        "cache": {"enable": False},
+                        "store": {"path": str(store_dir), "segments": False},
+                        "chunk": {
+                            "default_tokens": corpus.chunk_words,
+                            "min_tokens": corpus.chunk_words // 2,
+                            "overlap_tokens": corpus.overlap,
+                        },
+                        # Approximate modes are measured separately below.
+                        "search": {"top_k": args.top_k, "hierarchical": {"enable": False}, "ivf": {"enable": False}},
+                    }
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    config = Config(str(config_path))
+    client = EmbeddingClient(EmbeddingConfig(provider="hash", dimension=args.dim, batch_size=256))
+
+    indexer = VectorIndexer(config=config, embedding_client=client)
+    t0 = time.perf_counter()
+    indexer.index_batch(BATCH_ID, data)
+    index_seconds = time.perf_counter() - t0
+    rows = indexer.vector_store.list_batches().get(BATCH_ID, 0)
+    indexer.vector_store.close()
+    del data
+
+    service = VectorRetrievalService(config=config, embedding_client=client, batch_id=BATCH_ID)
+    service.search(queries[0])  # load the resident matrix outside the timings
+    clear_query_caches()
+    search_samples = []
+    for query in queries:
+        t0 = time.perf_counter()
+        service.search(query, top_k=args.top_k)
+        search_samples.append(time.perf_counter() - t0)
+
+    clear_query_caches()
+    many_samples = []
+    for start in range(0, len(queries), args.group):
+        t0 = time.perf_counter()
+        service.search_many(queries[start:start + args.group], top_k=args.top_k)
+        many_samples.append(time.perf_counter() - t0)
+    service.vector_store.close()
+
+    db_path = store_dir / "embeddings.sqlite"
+    vectors = client.embed_texts(queries)
+    exact_store = SQLiteVectorStore(db_path=db_path, embedding_dimension=args.dim)
+    exact, exact_samples = timed_store_searches(exact_store, vectors, args.top_k, exact=True)
+    exact_store.close()
+
+    modes: Dict[str, Dict[str, Any]] = {}
+    mode_stores = {
+        "ivf": dict(ivf=IVFSettings(min_rows=0, nprobe=args.nprobe)),
+        "coarse_to_fine": dict(hierarchical=HierarchicalSettings(min_rows=0, top_links=args.top_links)),
+        "int8": dict(quantization="int8"),
+    }
+    for name, options in mode_stores.items():
+        store = SQLiteVectorStore(db_path=db_path, embedding_dimension=args.dim, **options)
+        try:
+            t0 = time.perf_counter()
+            store.search(query_vector=vectors[0], top_k=args.top_k, filters={"batch_ids": [BATCH_ID]})
+            warmup = time.perf_counter() - t0  # includes IVF training / int8 quantization
+            approx, samples = timed_store_searches(store, vectors, args.top_k, exact=False)
+        finally:
+            store.close()
+        modes[name] = {
+            **percentiles(samples),
+            "warmup_s": round(warmup, 3),
+            f"recall@{args.top_k}": recall_at_k(approx, exact),
+        }
+
+    return {
+        "chunks_requested": chunks,
+        "rows": rows,
+        "links": corpus.links,
+        "index": {"seconds": round(index_seconds, 3), "chunks_per_sec": round(rows / index_seconds, 1)},
+        "search": percentiles(search_samples),
+        "search_many": {**percentiles(many_samples), "queries_per_call": args.group},
+        "store_search": percentiles(exact_samples),
+        "modes": modes,
+        "memory": memory_mb(),
+        "store_mb": round(db_path.stat().st_size / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--chunks-per-link", type=int, default=50)
+    parser.add_argument("--chunk-words", type=int, default=120)
+    parser.add_argument("--topic-ratio", type=float, default=0.3, help="share of topic words in transcripts")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--group", type=int, default=8, help="queries per search_many call")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--nprobe", type=int, default=IVFSettings().nprobe)
+    parser.add_argument("--top-links", type=int, default=HierarchicalSettings().top_links)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "benchmark": "retrieval_suite",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            report["results"].append(run_size(size, args, Path(tmp)))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
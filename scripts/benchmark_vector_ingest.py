@@ -0,0 +1,93 @@
+"""Benchmark SQLiteVectorStore ingestion: per-link writes vs. the bulk path.
+
+Writes synthetic chunks into throwaway stores and reports rows/second for
+``replace_content_embeddings`` called once per link, for
+``bulk_replace_content_embeddings`` and for the bulk path with the secondary
+indexes dropped and rebuilt.
+
+    python scripts/benchmark_vector_ingest.py --links 500 --chunks 20 --dim 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from research.vector_store.sqlite_vector_store import ContentUpdate, SQLiteVectorStore, VectorRecord  # noqa: E402
+
+
+def build_records(links: int, chunks: int, dim: int, seed: int) -> Dict[str, List[VectorRecord]]:
+    rng = random.Random(seed)
+    data: Dict[str, List[VectorRecord]] = {}
+    for link_idx in range(links):
+        link_id = f"link-{link_idx}"
+        data[link_id] = [
+            VectorRecord(
+                chunk_id=f"{link_id}::transcript::{idx}",
+                link_id=link_id,
+                chunk_index=idx,
+                chunk_type="transcript",
+                scale="fine",
+                embedding=[rng.gauss(0.0, 1.0) for _ in range(dim)],
+                text_preview=f"chunk {idx} of {link_id}",
+                metadata={"link_id": link_id, "batch_id": "bench", "token_span": [idx * 600, idx * 600 + 750]},
+                content_hash=f"{link_idx:08x}{idx:08x}",
+            )
+            for idx in range(chunks)
+        ]
+    return data
+
+
+def run(mode: str, data: Dict[str, List[VectorRecord]], dim: int, quantization: str, workdir: Path) -> float:
+    store = SQLiteVectorStore(
+        db_path=workdir / f"{mode}.sqlite", embedding_dimension=dim, quantization=quantization
+    )
+    try:
+        t0 = time.perf_counter()
+        if mode == "per_link":
+            for link_id, records in data.items():
+                store.replace_content_embeddings(
+                    link_id=link_id, records=records, checksum="bench", embedding_version=1, batch_id="bench"
+                )
+        else:
+            store.bulk_replace_content_embeddings(
+                [ContentUpdate(link_id, records, "bench") for link_id, records in data.items()],
+                embedding_version=1,
+                batch_id="bench",
+                rebuild_indexes=(mode == "bulk_rebuild_indexes"),
+            )
+        return time.perf_counter() - t0
+    finally:
+        store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=300)
+    parser.add_argument("--chunks", type=int, default=20, help="chunks per link")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--quantization", choices=("float32", "int8"), default="float32")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = build_records(args.links, args.chunks, args.dim, args.seed)
+    rows = args.links * args.chunks
+    report = {"links": args.links, "rows": rows, "dim": args.dim, "quantization": args.quantization, "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("per_link", "bulk", "bulk_rebuild_indexes"):
+            elapsed = run(mode, data, args.dim, args.quantization, Path(tmp))
+            report["modes"][mode] = {"seconds": round(elapsed, 3), "rows_per_sec": round(rows / elapsed, 1)}
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
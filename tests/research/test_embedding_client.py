@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from research.embeddings.embedding_cache import EmbeddingCache
+from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
+
+DIM = 32
+
+
+class _EmbeddingServer:
+    """Local OpenAI-style /embeddings endpoint recording what it receives."""
+
+    def __init__(self, *, fail_first_for=(), always_fail_for=()):
+        self.batches = []
+        self.active = 0
+        self.peak_active = 0
+        self.fail_first_for = set(fail_first_for)
+        self.always_fail_for = set(always_fail_for)
+        self._failed = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, payload = server.handle(body["input"])
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def handle(self, inputs):
+        with self._lock:
+            self.batches.append(list(inputs))
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            first = inputs[0]
+            fail = first in self.always_fail_for or (first in self.fail_first_for and first not in self._failed)
+            self._failed.add(first)
+        try:
+            time.sleep(0.05)
+            if fail:
+                return 503, {"error": "unavailable"}
+            # Reverse the item order; the client must sort by ``index``.
+            data = [
+                {"index": idx, "embedding": _one_hot(int(text.split("-")[1]))}
+                for idx, text in enumerate(inputs)
+            ]
+            return 200, {"data": list(reversed(data))}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _one_hot(position):
+    vector = [0.0] * DIM
+    vector[position] = 1.0
+    return vector
+
+
+def _client(server, cache=None):
+    config = EmbeddingConfig(
+        provider="openai",
+        dimension=DIM,
+        batch_size=4,
+        base_url=server.url,
+        max_concurrency=3,
+        max_retries=1,
+        retry_backoff=0.0,
+    )
+    return EmbeddingClient(config, api_key="test-key", cache=cache)
+
+
+@pytest.fixture
+def texts():
+    return [f"text-{i}" for i in range(10)]
+
+
+def test_sub_batches_run_concurrently_and_keep_input_order(texts):
+    server = _EmbeddingServer()
+    client = _client(server)
+    try:
+        vectors = client.embed_texts(texts)
+    finally:
+        client.close()
+        server.close()
+
+    assert sorted(len(batch) for batch in server.batches) == [2, 4, 4]
+    assert server.peak_active > 1
+    assert vectors == [_one_hot(i) for i in range(10)]
+
+
+def test_failed_sub_batch_is_retried_alone(texts):
+    server = _EmbeddingServer(fail_first_for={"text-4"})
+    client = _client(server)
+    try:
+        vectors = client.embed_texts(texts)
+    finally:
+        client.close()
+        server.close()
+
+    firsts = [batch[0] for batch in server.batches]
+    assert firsts.count("text-4") == 2
+    assert firsts.count("text-0") == 1 and firsts.count("text-8") == 1
+    assert vectors == [_one_hot(i) for i in range(10)]
+
+
+def test_exhausted_sub_batch_falls_back_to_hash_only_for_itself(texts):
+    server = _EmbeddingServer(always_fail_for={"text-8"})
+    client = _client(server)
+    try:
+        vectors = client.embed_texts(texts)
+    finally:
+        client.close()
+        server.close()
+
+    assert vectors[:8] == [_one_hot(i) for i in range(8)]
+    assert vectors[8] == client._hash_embed("text-8")
+    assert vectors[9] == client._hash_embed("text-9")
+
+
+def test_cache_is_consulted_before_network(tmp_path, texts):
+    server = _EmbeddingServer()
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    first = _client(server, cache=cache)
+    second = _client(server, cache=cache)
+    try:
+        assert first.embed_texts(texts[:6]) == [_one_hot(i) for i in range(6)]
+        sent_before = sum(len(batch) for batch in server.batches)
+
+        vectors = second.embed_texts(texts)
+        sent = [text for batch in server.batches for text in batch][sent_before:]
+        stats = cache.stats()
+    finally:
+        first.close()
+        second.close()
+        server.close()
+        cache.close()
+
+    assert sent_before == 6
+    assert sorted(sent) == texts[6:]
+    assert vectors == [_one_hot(i) for i in range(10)]
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (6, 10, 10)
+
+
+def test_hash_fallbacks_are_not_cached(tmp_path, texts):
+    server = _EmbeddingServer(always_fail_for={"text-8"})
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    client = _client(server, cache=cache)
+    try:
+        client.embed_texts(texts)
+        assert cache.stats()["entries"] == 8
+    finally:
+        client.close()
+        server.close()
+        cache.close()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    vector_bytes = DIM * 4
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_bytes=vector_bytes * 20)
+    key = {"provider": "openai", "model": "m", "dimension": DIM}
+    try:
+        cache.put_many(texts=[f"old-{i}" for i in range(10)], vectors=[_one_hot(i) for i in range(10)], **key)
+        cache.put_many(texts=[f"new-{i}" for i in range(10)], vectors=[_one_hot(i) for i in range(10)], **key)
+        assert cache.get_many(texts=["old-0"], **key)  # refresh one old entry
+        cache.put_many(texts=[f"more-{i}" for i in range(5)], vectors=[_one_hot(i) for i in range(5)], **key)
+
+        stats = cache.stats()
+        assert stats["bytes"] <= vector_bytes * 20
+        assert stats["evictions"] >= 5
+        assert cache.get_many(texts=["old-0"], **key)
+        assert not cache.get_many(texts=["old-1"], **key)
+        assert len(cache.get_many(texts=[f"more-{i}" for i in range(5)], **key)) == 5
+    finally:
+        cache.close()
+
+
+def test_hash_embedding_is_deterministic_and_cjk_aware(monkeypatch):
+    from research.embeddings import embedding_client as client_module
+
+    client = EmbeddingClient(EmbeddingConfig(provider="hash", dimension=128))
+    texts = ["人工智能芯片产业链分析", "芯片产业链的最新进展", "Solar panels and batteries", ""]
+    vectors = client.embed_texts(texts)
+
+    def cosine(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    # Shared CJK bigrams give related Chinese texts real overlap.
+    assert cosine(vectors[0], vectors[1]) > 0.3
+    assert abs(cosine(vectors[0], vectors[2])) < 0.3
+    assert vectors[3] == [0.0] * 128
+    assert client.embed_texts(texts) == vectors
+
+    monkeypatch.setattr(client_module, "np", None)
+    fallback = [client._hash_embed(text) for text in texts]
+    for fast, slow in zip(vectors, fallback):
+        assert fast == pytest.approx(slow, abs=1e-12)
@@ -0,0 +1,67 @@
+from research.retrieval.marker_anchors import anchors_current, build_marker_anchors
+from research.retrieval.query_cache import LRUCache
+from research.retrieval.transcript_index import TranscriptIndex
+from research.retrieval_handler import RetrievalHandler
+from research.summarization.content_summarizer import ContentSummarizer
+from research.utils.segmentation import CJKSegmenter
+
+FILLER = "".join(f"第{i}段闲聊内容。" for i in range(300))
+TRANSCRIPT = (
+    FILLER
+    + "我们发现，训练数据的质量比数量更重要。"
+    + FILLER
+    + "Revenue grew 35% year over year in Q3."
+    + FILLER
+    + "另外模型参数量达到七百亿，推理成本下降一半。"
+    + FILLER
+)
+MARKERS = {
+    "key_facts": ["训练数据的质量比数量更重要", "revenue grew 35% year over year"],
+    "key_opinions": ["训练数据的质量， 比数量 更重要！"],
+    "key_datapoints": ["模型参数七百亿，推理成本降低", "完全不存在的说法"],
+}
+
+
+def _summary():
+    return {"transcript_summary": dict(MARKERS)}
+
+
+def test_markers_are_anchored_exact_normalized_or_by_keywords():
+    markers = [m for values in MARKERS.values() for m in values]
+    anchors = build_marker_anchors(TRANSCRIPT, markers, CJKSegmenter())["markers"]
+
+    exact = anchors["训练数据的质量比数量更重要"]
+    assert exact["method"] == "exact"
+    assert TRANSCRIPT[exact["char_start"]:exact["char_end"]] == "训练数据的质量比数量更重要"
+    assert exact["word_end"] - exact["word_start"] == 13
+    assert anchors["revenue grew 35% year over year"]["method"] == "exact"
+    assert anchors["训练数据的质量， 比数量 更重要！"]["method"] == "normalized"
+    assert anchors["训练数据的质量， 比数量 更重要！"]["char_start"] == exact["char_start"]
+    fuzzy = anchors["模型参数七百亿，推理成本降低"]
+    assert fuzzy["method"] == "keywords"
+    assert "七百亿" in TRANSCRIPT[fuzzy["char_start"]:fuzzy["char_end"]]
+    assert anchors["完全不存在的说法"] is None
+
+
+def test_summarizer_persists_anchors_and_retrieval_slices_them(monkeypatch):
+    summary = _summary()
+    summarizer = ContentSummarizer(client=None)
+    assert summarizer.add_marker_anchors(summary, TRANSCRIPT)
+    assert not summarizer.add_marker_anchors(summary, TRANSCRIPT)
+    assert anchors_current(summary["marker_anchors"], TRANSCRIPT)
+    assert not anchors_current(summary["marker_anchors"], TRANSCRIPT + "。")
+
+    batch = {"zh": {"transcript": TRANSCRIPT, "summary": summary}}
+    handler = RetrievalHandler(LRUCache(max_entries=4, max_bytes=1 << 24, sizeof=lambda i: i.nbytes), CJKSegmenter())
+    expected = handler.retrieve_by_marker("训练数据的质量比数量更重要", "zh", "transcript", 5, {"zh": {"transcript": TRANSCRIPT}})
+
+    def no_scan(self, phrase):
+        raise AssertionError("anchored markers must not scan the transcript")
+
+    monkeypatch.setattr(TranscriptIndex, "find", no_scan)
+    assert handler.retrieve_by_marker("训练数据的质量比数量更重要", "zh", "transcript", 5, batch) == expected
+    fuzzy = handler.retrieve_by_marker("模型参数七百亿，推理成本降低", "zh", "transcript", 3, batch)
+    assert "七百亿" in fuzzy and len(fuzzy.split("\n", 1)[1]) < 60
+    selective = handler.retrieve_by_marker_types(["key_facts", "key_datapoints"], "zh", "transcript", batch)
+    assert "Revenue grew 35% year over year" in selective
+    assert "(No keyword matches found in transcript)" in selective
@@ -0,0 +1,178 @@
+import copy
+import random
+
+from research.retrieval.comment_index import comment_index
+from research.retrieval.keyword_matcher import KeywordMatcher
+from research.retrieval.query_cache import LRUCache
+from research.retrieval.transcript_index import TranscriptIndex, transcript_index
+from research.retrieval_handler import RetrievalHandler
+from research.utils.segmentation import CJKSegmenter, WhitespaceSegmenter
+from research.vector_store.lexical import leading_terms
+
+
+TRANSCRIPT = "Intro  words here.\nThe Quick brown FOX jumps\tover the lazy dog. Ende İstanbul quick fox again and more words"
+
+
+def _cache():
+    return LRUCache(max_entries=16, max_bytes=1 << 20, sizeof=lambda index: index.nbytes)
+
+
+def test_transcript_index_matches_split_semantics():
+    index = TranscriptIndex.build(TRANSCRIPT, WhitespaceSegmenter())
+    words = TRANSCRIPT.split()
+
+    assert index.segmentation.tokens() == words
+    assert len(index.word_starts) == len(words)
+    assert index.text(2, 6) == " ".join(words[2:6])
+    for phrase in ["quick brown", "fox", "İstanbul quick", "ick bro", "words"]:
+        position = TRANSCRIPT.lower().find(phrase.lower())
+        expected = len(TRANSCRIPT.lower()[:position].split())
+        assert index.find(phrase) == expected
+    assert index.find("missing phrase") == -1
+
+
+def test_retrieval_reuses_one_index_per_transcript():
+    cache = _cache()
+    handler = RetrievalHandler(cache)
+    batch = {"a": {"transcript": TRANSCRIPT}, "b": {"transcript": "other text entirely"}}
+
+    assert handler.retrieve_by_word_range("a", 1, 4, batch) == "words here. The"
+    assert "Error" in handler.retrieve_by_word_range("a", 0, 999, batch)
+    keyword = handler.retrieve_by_keywords("a", ["LAZY"], batch, context_window=2)
+    assert keyword == "[Words 8-12]:\nover the lazy dog."
+    marker = handler.retrieve_by_marker("quick brown", "a", "transcript", 1, batch)
+    assert marker.endswith("\nThe Quick brown FOX")
+    handler.retrieve_by_keywords("b", ["text"], batch)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["hits"] >= 2
+
+    # Another handler on the same cache reuses the index; an edited transcript gets a new one.
+    first = transcript_index(cache, "a", TRANSCRIPT)
+    assert RetrievalHandler(cache).retrieve_by_word_range("a", 0, 1, batch) == "Intro"
+    assert transcript_index(cache, "a", TRANSCRIPT) is first
+    batch["a"] = {"transcript": TRANSCRIPT + " appended"}
+    assert RetrievalHandler(cache).retrieve_by_word_range("a", 20, 21, batch) == "appended"
+
+
+def test_keyword_matcher_matches_per_word_containment():
+    index = TranscriptIndex.build(TRANSCRIPT + " database data-driven")
+    words = index.transcript.lower().split()
+    keywords = ["DATA", "database", "fox", "ick", "", "fox"]
+    matcher = KeywordMatcher.of(keywords)
+
+    assert matcher.keywords == ("data", "database", "fox", "ick")
+    assert KeywordMatcher.of(["fox", "ick", "Data", "database"]) is matcher
+    expected = [i for i, w in enumerate(words) if any(kw in w for kw in matcher.keywords)]
+    assert matcher.word_hits(index) == expected
+    assert matcher.windows(index, 1)[0] == (3, 5)
+    # Overlapping keywords are all counted; a phrase marks every word it spans.
+    assert matcher.relevance(["the database", "no match", "quick fox"]) == [2, 0, 2]
+    assert KeywordMatcher.of(["lazy dog"]).word_hits(index) == [10, 11]
+    assert not KeywordMatcher.of(["", "  "])
+
+
+def test_retrieve_matching_comments_ranks_by_distinct_keywords():
+    batch = {
+        "a": {
+            "comments": [
+                {"content": "Data is everything", "likes": 5},
+                {"content": "The DATABASE index and data", "likes": 1},
+                "plain string comment about nothing",
+            ]
+        }
+    }
+    result = RetrievalHandler(_cache()).retrieve_matching_comments("a", ["data", "database"], batch)
+    assert result.splitlines() == [
+        "- [Likes:1, Replies:0] The DATABASE index and data",
+        "- [Likes:5, Replies:0] Data is everything",
+    ]
+
+
+def test_cjk_context_windows_stay_bounded():
+    transcript = "".join(f"这是第{i}段内容。" for i in range(500)) + "关键结论在这里。" + "后续内容。" * 500
+    handler = RetrievalHandler(_cache(), segmenter=CJKSegmenter())
+    batch = {"zh": {"transcript": transcript}}
+
+    marker = handler.retrieve_by_marker("关键结论", "zh", "transcript", 20, batch)
+    context = marker.split("\n", 1)[1]
+    assert "关键结论在这里" in context
+    assert CJKSegmenter().count(context) <= 20 + 4 + 20
+    keyword = handler.retrieve_by_keywords("zh", ["结论"], batch, context_window=10)
+    assert keyword.startswith("[Words ")
+    assert CJKSegmenter().count(keyword.split("\n", 1)[1]) <= 2 * 10 + 2
+    assert handler.retrieve_by_word_range("zh", 0, 5, batch) == "这是第0段"
+
+
+def _legacy_top(raw_comments, keywords, limit, sort_by):
+    normalized = [
+        {"content": c["content"], "likes": c["likes"], "replies": c["replies"]} if isinstance(c, dict)
+        else {"content": str(c), "likes": 0, "replies": 0}
+        for c in raw_comments
+        if not isinstance(c, dict) or c.get("content")
+    ]
+    keywords = sorted({kw.lower() for kw in keywords})
+    matches = [(c, sum(kw in c["content"].lower() for kw in keywords)) for c in normalized]
+    matches = [m for m in matches if m[1]]
+    if sort_by == "relevance":
+        matches.sort(key=lambda t: (t[1], t[0]["likes"]), reverse=True)
+    else:
+        matches.sort(key=lambda t: t[0][sort_by], reverse=True)
+    return [c["content"] for c, _ in matches[:limit]]
+
+
+def test_comment_index_matches_full_sort_and_is_reused():
+    rng = random.Random(3)
+    vocab = ["模型", "训练", "数据", "database", "data", "GPU", "不错", "hello world"]
+    raw = [
+        {"content": " ".join(rng.sample(vocab, 3)), "likes": rng.randint(0, 5), "replies": rng.randint(0, 3)}
+        for _ in range(300)
+    ] + [{"content": ""}, "plain 数据 string"]
+    cache = LRUCache(max_entries=4, max_bytes=1 << 24, sizeof=lambda index: index.nbytes)
+    handler = RetrievalHandler(_cache(), comment_indexes=cache)
+    batch = {"a": {"comments": raw}}
+
+    for keywords in (["数据"], ["data", "模"], ["Hello World", "gpu"], ["据模"], ["ata"], ["ld 训", "!"], ["missing"]):
+        for sort_by, limit in (("relevance", 10), ("likes", 7), ("likes", 200), ("replies", 50)):
+            expected = _legacy_top(raw, keywords, limit, sort_by)
+            result = handler.retrieve_matching_comments("a", keywords, batch, limit=limit, sort_by=sort_by)
+            if not expected:
+                assert result == "(No comments matched the given keywords)"
+                continue
+            assert [line.split("] ", 1)[1] for line in result.splitlines()] == expected
+    assert cache.stats()["entries"] == 1
+
+    index = comment_index(cache, "a", raw)
+    assert len(index) == 301
+    # Reloaded batch data (a fresh, equal list) reuses the index.
+    assert comment_index(cache, "a", copy.deepcopy(raw)) is index
+    assert set(index.candidates("data")) >= {i for i, text in enumerate(index.lowered) if "data" in text}
+    # Posting lists exist for every comment token once built.
+    assert {"数据", "database", "hello", "world"} <= set(index.postings)
+    raw.append({"content": "new data comment", "likes": 99})
+    assert handler.retrieve_matching_comments("a", ["new data"], batch).endswith("new data comment")
+    assert comment_index(cache, "a", raw) is not index
+
+    # Loader-stamped comments are keyed by their version stamp, without hashing the list.
+    stamped = comment_index(cache, "a", raw, "a_cmts.json:10:1")
+    assert comment_index(cache, "a", copy.deepcopy(raw), "a_cmts.json:10:1") is stamped
+    assert comment_index(cache, "a", raw, "a_cmts.json:10:2") is not stamped
+
+
+def test_marker_keyword_fallbacks_use_cjk_terms():
+    assert leading_terms("特斯拉公布了新的电池技术") == ["特斯", "拉公", "布了"]
+    assert leading_terms("Revenue grew 20%, revenue") == ["revenue", "grew", "20"]
+
+    batch = {
+        "zh": {
+            "transcript": "今天我们聊聊特斯拉的新闻。",
+            "comments": [{"content": "特斯拉这次很厉害", "likes": 3}, {"content": "无关的评论", "likes": 9}],
+            "summary": {"comments_summary": {"key_facts_from_comments": ["特斯拉发布会很成功"]}},
+        }
+    }
+    handler = RetrievalHandler(_cache(), segmenter=CJKSegmenter(), comment_indexes=_cache())
+    comments = handler.retrieve_by_marker("特斯拉发布会很成功", "zh", "comments", 10, batch)
+    assert comments.splitlines() == ["- [Likes:3, Replies:0] 特斯拉这次很厉害"]
+    by_type = handler.retrieve_by_marker_types(["key_facts_from_comments"], "zh", "comments", batch)
+    assert "特斯拉这次很厉害" in by_type and "无关的评论" not in by_type
+    transcript = handler.retrieve_by_marker("特斯拉发布会很成功", "zh", "transcript", 3, batch)
+    assert "特斯拉" in transcript
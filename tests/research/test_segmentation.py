@@ -0,0 +1,56 @@
+from research.data_loader import ResearchDataLoader
+from research.utils.segmentation import (
+    CJKSegmenter,
+    Segmenter,
+    WhitespaceSegmenter,
+    get_segmenter,
+    register_segmenter,
+)
+
+MIXED = "今天我们讨论 GPT-4 模型，效果很好。\n下一段  hello   world"
+
+
+def test_cjk_segmenter_counts_characters_and_keeps_latin_words():
+    segmentation = CJKSegmenter().segment(MIXED)
+
+    assert segmentation.tokens()[:8] == ["今", "天", "我", "们", "讨", "论", "GPT-4", "模"]
+    assert len(segmentation) == CJKSegmenter().count(MIXED) == 20
+    assert segmentation.slice(0, 9) == "今天我们讨论 GPT-4 模型"
+    assert segmentation.slice(15, 20) == "下一段 hello world"
+    assert segmentation.unit_containing(MIXED.index("PT-4")) == 6
+    assert CJKSegmenter(2).tokens("今天我们讨论了") == ["今天", "我们", "讨论", "了"]
+
+
+def test_whitespace_segmenter_matches_str_split():
+    segmentation = WhitespaceSegmenter().segment(MIXED)
+    words = MIXED.split()
+
+    assert segmentation.tokens() == words
+    assert segmentation.slice(1, 3) == " ".join(words[1:3])
+    assert CJKSegmenter().tokens("plain english text") == "plain english text".split()
+
+
+def test_segmenters_are_pluggable():
+    class CommaSegmenter(Segmenter):
+        name = "comma"
+
+        def __init__(self) -> None:
+            import re
+
+            self.pattern = re.compile(r"[^,]+")
+
+    register_segmenter("comma", lambda **_: CommaSegmenter())
+    assert get_segmenter("comma").tokens("a b,c") == ["a b", "c"]
+    assert get_segmenter("unknown").name == "cjk"
+
+
+def test_abstract_and_word_counts_use_segmenter(tmp_path):
+    loader = ResearchDataLoader(tmp_path, segmenter=CJKSegmenter())
+    transcript = "模型" * 600
+
+    abstract = loader.create_abstract({"transcript": transcript}, transcript_sample_words=300)
+    assert "开头（100词）" in abstract
+    assert len(abstract) < 1000
+    chunks = loader.chunk_data({"transcript": transcript}, "sequential", chunk_size=500)
+    assert [c["chunk_info"]["end_word"] for c in chunks] == [500, 1000, 1200]
+    assert chunks[0]["transcript"] == transcript[:500]
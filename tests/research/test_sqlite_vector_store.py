@@ -0,0 +1,777 @@
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from research.vector_store import sqlite_vector_store as store_module
+from research.vector_store.coarse_to_fine import HierarchicalSettings
+from research.vector_store.ivf_index import IVFSettings
+from research.vector_store.sqlite_vector_store import ContentUpdate, SQLiteVectorStore, VectorRecord
+
+np = pytest.importorskip("numpy")
+
+DIM = 16
+
+
+def _random_vector(rng: random.Random):
+    return [rng.uniform(-1.0, 1.0) for _ in range(DIM)]
+
+
+def _records(link_id: str, rng: random.Random, count: int = 4, chunk_type: str = "transcript"):
+    return [
+        VectorRecord(
+            chunk_id=f"{link_id}::{chunk_type}::{idx}",
+            link_id=link_id,
+            chunk_index=idx,
+            chunk_type=chunk_type,
+            scale="fine",
+            embedding=_random_vector(rng),
+            text_preview=f"{link_id} chunk {idx}",
+            metadata={"link_id": link_id, "idx": idx},
+        )
+        for idx in range(count)
+    ]
+
+
+def _populate(store: SQLiteVectorStore, rng: random.Random, links=("a", "b", "c"), batch_id: str = ""):
+    for link_id in links:
+        store.replace_content_embeddings(
+            link_id=link_id,
+            records=_records(link_id, rng),
+            checksum=f"sum-{link_id}",
+            embedding_version=1,
+            batch_id=batch_id,
+        )
+
+
+@pytest.fixture
+def store(tmp_path: Path):
+    instance = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM)
+    yield instance
+    instance.close()
+
+
+def test_resident_search_matches_scan(store, monkeypatch):
+    rng = random.Random(7)
+    _populate(store, rng)
+    query = _random_vector(rng)
+
+    resident_results = store.search(query_vector=query, top_k=5)
+
+    monkeypatch.setattr(store_module, "np", None)
+    scan_results = store.search(query_vector=query, top_k=5)
+
+    assert [r.chunk_id for r in resident_results] == [r.chunk_id for r in scan_results]
+    for fast, slow in zip(resident_results, scan_results):
+        assert fast.score == pytest.approx(slow.score, abs=1e-5)
+        assert fast.metadata == slow.metadata
+
+
+def test_resident_matrix_tracks_replacements(store):
+    rng = random.Random(11)
+    _populate(store, rng)
+    store.search(query_vector=_random_vector(rng), top_k=3)
+    assert "" in store._residents
+    generation = store._residents[""].generation
+
+    replacement = _records("b", rng, count=2)
+    store.replace_content_embeddings(link_id="b", records=replacement, checksum="new", embedding_version=1)
+
+    resident = store._residents[""]
+    assert resident.generation == generation + 1 == store.partition_generations()[""]
+    assert list(resident.link_ids).count("b") == 2
+    assert resident.matrix.shape == (10, DIM)
+
+    hit = store.search(query_vector=replacement[1].embedding, top_k=1)[0]
+    assert hit.chunk_id == replacement[1].chunk_id
+    assert hit.score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_resident_matrix_reloads_after_foreign_write(tmp_path: Path):
+    rng = random.Random(3)
+    path = tmp_path / "embeddings.sqlite"
+    reader = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    writer = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    try:
+        _populate(writer, rng, links=("a",))
+        assert len(reader.search(query_vector=_random_vector(rng), top_k=10)) == 4
+
+        _populate(writer, rng, links=("b",))
+        assert len(reader.search(query_vector=_random_vector(rng), top_k=10)) == 8
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_filters_restrict_candidates(store):
+    rng = random.Random(5)
+    _populate(store, rng)
+    store.replace_content_embeddings(
+        link_id="d",
+        records=_records("d", rng, count=2, chunk_type="comments"),
+        checksum="sum-d",
+        embedding_version=1,
+    )
+
+    results = store.search(query_vector=_random_vector(rng), top_k=20, filters={"link_ids": ["a", "d"]})
+    assert {r.link_id for r in results} == {"a", "d"}
+
+    results = store.search(
+        query_vector=_random_vector(rng),
+        top_k=20,
+        filters={"link_ids": ["a", "d"], "chunk_types": ["comments"]},
+    )
+    assert {r.chunk_id for r in results} == {"d::comments::0", "d::comments::1"}
+
+
+def test_link_ranges_stay_contiguous_after_replacement(store):
+    rng = random.Random(13)
+    _populate(store, rng)
+    store.search(query_vector=_random_vector(rng), top_k=1)
+
+    store.replace_content_embeddings(link_id="a", records=_records("a", rng, count=3), checksum="x", embedding_version=1)
+    resident = store._residents[""]
+    assert resident.link_ranges == {"b": (0, 4), "c": (4, 8), "a": (8, 11)}
+    for link_id, (start, end) in resident.link_ranges.items():
+        assert set(resident.link_ids[start:end]) == {link_id}
+
+
+def test_unchanged_chunks_keep_rows_and_resident_vectors(store, tmp_path: Path):
+    rng = random.Random(19)
+    _populate(store, rng)
+    store.search(query_vector=_random_vector(rng), top_k=1)
+    rowids = dict(store.connection.execute("SELECT chunk_id, rowid FROM embeddings WHERE link_id = 'b'").fetchall())
+
+    records = _records("b", rng, count=3)
+    for record in records[:2]:
+        record.embedding = []
+        record.metadata = {"refreshed": True}
+    store.replace_content_embeddings(
+        link_id="b",
+        records=records,
+        checksum="partial",
+        embedding_version=1,
+        unchanged_chunk_ids=[records[0].chunk_id, records[1].chunk_id],
+    )
+
+    after = dict(store.connection.execute("SELECT chunk_id, rowid FROM embeddings WHERE link_id = 'b'").fetchall())
+    assert set(after) == {r.chunk_id for r in records}
+    assert after["b::transcript::0"] == rowids["b::transcript::0"]
+    assert after["b::transcript::2"] != rowids["b::transcript::2"]
+    assert store._residents[""].link_ranges["b"] == (8, 11)
+
+    query = _random_vector(rng)
+    fresh = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM)
+    try:
+        expected = fresh.search(query_vector=query, top_k=12)
+    finally:
+        fresh.close()
+    results = store.search(query_vector=query, top_k=12)
+    assert [(r.chunk_id, round(r.score, 5)) for r in results] == [(r.chunk_id, round(r.score, 5)) for r in expected]
+    assert next(r for r in results if r.chunk_id == "b::transcript::1").metadata == {"refreshed": True}
+
+
+@pytest.mark.parametrize("quantization", ["float32", "int8"])
+def test_bulk_replace_matches_per_link_writes(tmp_path: Path, quantization):
+    rng = random.Random(23)
+    links = [f"l{i}" for i in range(6)]
+    records = {link_id: _records(link_id, rng, count=5) for link_id in links}
+    per_link = SQLiteVectorStore(db_path=tmp_path / "single.sqlite", embedding_dimension=DIM, quantization=quantization)
+    bulk = SQLiteVectorStore(db_path=tmp_path / "bulk.sqlite", embedding_dimension=DIM, quantization=quantization)
+    try:
+        for link_id in links[:3]:
+            per_link.replace_content_embeddings(
+                link_id=link_id, records=records[link_id], checksum="x", embedding_version=1
+            )
+        bulk.bulk_replace_content_embeddings(
+            [ContentUpdate(link_id, records[link_id], "x") for link_id in links[:3]], embedding_version=1
+        )
+        query = _random_vector(rng)
+        per_link.search(query_vector=query, top_k=1)
+        bulk.search(query_vector=query, top_k=1)  # load the resident matrix before the next bulk write
+
+        for link_id in links[1:]:
+            records[link_id] = _records(link_id, rng, count=3)
+            per_link.replace_content_embeddings(
+                link_id=link_id, records=records[link_id], checksum="y", embedding_version=1
+            )
+        inserted = bulk.bulk_replace_content_embeddings(
+            [ContentUpdate(link_id, records[link_id], "y") for link_id in links[1:]],
+            embedding_version=1,
+            rebuild_indexes=True,
+        )
+        assert inserted == 15
+        assert bulk.partition_generations()[""] == 2
+
+        blobs = "SELECT chunk_id, vector FROM embeddings ORDER BY chunk_id"
+        expected = per_link.connection.execute(blobs).fetchall()
+        actual = bulk.connection.execute(blobs).fetchall()
+        assert [row[0] for row in actual] == [row[0] for row in expected]
+        for (_, want), (_, got) in zip(expected, actual):
+            assert np.allclose(
+                store_module.SQLiteVectorStore._decode_vector_array(got, quantization),
+                store_module.SQLiteVectorStore._decode_vector_array(want, quantization),
+                atol=1e-2 if quantization == "int8" else 1e-6,
+            )
+
+        indexes = {row[1] for row in bulk.connection.execute("PRAGMA index_list(embeddings)")}
+        assert {"idx_embeddings_link", "idx_embeddings_batch"} <= indexes
+
+        resident = bulk._residents[""]
+        assert resident.generation == 2 and resident.matrix.shape[0] == 20
+        for link_id, (start, end) in resident.link_ranges.items():
+            assert set(resident.link_ids[start:end]) == {link_id}
+        query = _random_vector(rng)
+        fresh = SQLiteVectorStore(db_path=tmp_path / "bulk.sqlite", embedding_dimension=DIM, quantization=quantization)
+        try:
+            expected_hits = [(r.chunk_id, round(r.score, 4)) for r in fresh.search(query_vector=query, top_k=20)]
+        finally:
+            fresh.close()
+        assert [(r.chunk_id, round(r.score, 4)) for r in bulk.search(query_vector=query, top_k=20)] == expected_hits
+    finally:
+        per_link.close()
+        bulk.close()
+
+
+def test_scan_pushes_filters_into_sql(store, monkeypatch):
+    rng = random.Random(17)
+    _populate(store, rng)
+    where, params = store._filter_clause({"b"}, {"transcript"})
+    plan = store.connection.execute(
+        f"EXPLAIN QUERY PLAN SELECT chunk_id FROM embeddings{where}", params
+    ).fetchall()
+    assert any("idx_embeddings_link_chunk_type" in str(row) for row in plan)
+
+    monkeypatch.setattr(store_module, "np", None)
+    results = store.search(query_vector=_random_vector(rng), top_k=20, filters={"link_ids": ["b"]})
+    assert len(results) == 4
+    assert {r.link_id for r in results} == {"b"}
+
+
+def test_batches_are_isolated_partitions(store):
+    rng = random.Random(19)
+    _populate(store, rng, links=("a", "b"), batch_id="batch-1")
+    _populate(store, rng, links=("a",), batch_id="batch-2")
+
+    assert store.list_batches() == {"batch-1": 8, "batch-2": 4}
+    assert set(store.fetch_content_status(["a", "b"], batch_id="batch-2")) == {"a"}
+
+    query = _random_vector(rng)
+    scoped = store.search(query_vector=query, top_k=20, filters={"batch_ids": ["batch-2"]})
+    assert len(scoped) == 4
+    assert {r.batch_id for r in scoped} == {"batch-2"}
+    assert len(store.search(query_vector=query, top_k=20)) == 12
+
+
+def test_archive_and_restore_batch(store, tmp_path: Path):
+    rng = random.Random(23)
+    _populate(store, rng, links=("a", "b"), batch_id="old")
+    _populate(store, rng, links=("c",), batch_id="new")
+    query = _random_vector(rng)
+    assert len(store.search(query_vector=query, top_k=20, filters={"batch_ids": ["old"]})) == 8
+
+    archive_path = store.archive_batch("old")
+    assert archive_path.exists()
+    assert store.list_batches() == {"new": 4}
+    assert store.search(query_vector=query, top_k=20, filters={"batch_ids": ["old"]}) == []
+
+    assert store.restore_batch(archive_path) == ["old"]
+    assert store.list_batches() == {"old": 8, "new": 4}
+    assert len(store.search(query_vector=query, top_k=20, filters={"batch_ids": ["old"]})) == 8
+
+
+def test_unpartitioned_store_is_migrated(tmp_path: Path):
+    import json
+    import sqlite3
+
+    path = tmp_path / "embeddings.sqlite"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE content_items (link_id TEXT PRIMARY KEY, checksum TEXT NOT NULL, "
+        "embedding_version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE embeddings (chunk_id TEXT PRIMARY KEY, link_id TEXT NOT NULL, chunk_index INTEGER, "
+        "chunk_type TEXT, scale TEXT, vector BLOB NOT NULL, vector_norm REAL NOT NULL, text_preview TEXT, metadata_json TEXT)"
+    )
+    conn.execute("INSERT INTO content_items VALUES ('a', 'sum', 1, 0)")
+    vector = (np.ones(DIM) / np.sqrt(DIM)).astype("float32")
+    conn.execute(
+        "INSERT INTO embeddings VALUES ('a::doc', 'a', -1, 'document', 'coarse', ?, 1.0, 'preview', ?)",
+        (vector.tobytes(), json.dumps({"batch_id": "legacy-batch"})),
+    )
+    conn.commit()
+    conn.close()
+
+    migrated = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    try:
+        assert migrated.list_batches() == {"legacy-batch": 1}
+        assert migrated.fetch_content_status(["a"], batch_id="legacy-batch")["a"].checksum == "sum"
+        hits = migrated.search(query_vector=vector.tolist(), top_k=5)
+        assert [(h.chunk_id, h.batch_id) for h in hits] == [("a::doc", "legacy-batch")]
+    finally:
+        migrated.close()
+
+
+def _clustered_store(tmp_path: Path, settings, *, clusters: int = 8, per_link: int = 50, links: int = 12):
+    rng = np.random.default_rng(29)
+    centers = rng.normal(size=(clusters, DIM))
+    instance = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM, ivf=settings)
+    for link in range(links):
+        link_id = f"l{link}"
+        vectors = centers[rng.integers(clusters, size=per_link)] + 0.1 * rng.normal(size=(per_link, DIM))
+        records = [
+            VectorRecord(
+                chunk_id=f"{link_id}::{idx}",
+                link_id=link_id,
+                chunk_index=idx,
+                chunk_type="transcript",
+                scale="fine",
+                embedding=vec.tolist(),
+                text_preview="",
+                metadata={},
+            )
+            for idx, vec in enumerate(vectors)
+        ]
+        instance.replace_content_embeddings(link_id=link_id, records=records, checksum="x", embedding_version=1)
+    return instance, centers, rng
+
+
+def test_ivf_search_recalls_exact_neighbours(tmp_path: Path):
+    settings = IVFSettings(n_lists=8, nprobe=3, min_rows=100)
+    store, centers, rng = _clustered_store(tmp_path, settings)
+    try:
+        hits = 0
+        for _ in range(20):
+            query = (centers[rng.integers(len(centers))] + 0.1 * rng.normal(size=DIM)).tolist()
+            approx = {r.chunk_id for r in store.search(query_vector=query, top_k=10)}
+            exact = {r.chunk_id for r in store.search(query_vector=query, top_k=10, exact=True)}
+            hits += len(approx & exact)
+        assert hits / 200 >= 0.9
+        assert "" in store._ivf
+
+        # Filtered rows outside the probed lists: fall back instead of returning too few.
+        comments = [
+            VectorRecord(
+                chunk_id=f"z::comment::{idx}",
+                link_id="z",
+                chunk_index=idx,
+                chunk_type="comment",
+                scale="fine",
+                embedding=(centers[0] + 0.1 * rng.normal(size=DIM)).tolist(),
+                text_preview="",
+                metadata={},
+            )
+            for idx in range(12)
+        ]
+        store.replace_content_embeddings(link_id="z", records=comments, checksum="z", embedding_version=1)
+        far = int(np.argmin(centers @ centers[0]))
+        hits = store.search(query_vector=centers[far].tolist(), top_k=10, filters={"chunk_types": ["comment"]})
+        assert len(hits) == 10
+        assert (tmp_path / "embeddings.ivf" / "_default.npz").exists()
+    finally:
+        store.close()
+
+
+def test_ivf_assigns_new_rows_incrementally_and_reloads(tmp_path: Path):
+    settings = IVFSettings(n_lists=8, nprobe=8, min_rows=100)
+    store, _, _ = _clustered_store(tmp_path, settings)
+    try:
+        store.search(query_vector=[1.0] * DIM, top_k=5)
+        centroids = store._ivf[""].centroids.copy()
+
+        rng = random.Random(31)
+        replacement = _records("l3", rng, count=5)
+        store.replace_content_embeddings(link_id="l3", records=replacement, checksum="y", embedding_version=1)
+        resident = store._residents[""]
+        assert len(resident.assignments) == len(resident.rowids)
+        assert np.array_equal(store._ivf[""].centroids, centroids)
+
+        # nprobe == n_lists probes every list, so the IVF path must find the new row exactly.
+        hit = store.search(query_vector=replacement[2].embedding, top_k=1)[0]
+        assert hit.chunk_id == replacement[2].chunk_id
+    finally:
+        store.close()
+
+    reopened = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM, ivf=settings)
+    try:
+        hit = reopened.search(query_vector=replacement[2].embedding, top_k=1)[0]
+        assert hit.chunk_id == replacement[2].chunk_id
+        assert np.array_equal(reopened._ivf[""].centroids, centroids)
+        assert not reopened._ivf_dirty
+    finally:
+        reopened.close()
+
+
+def test_int8_store_ranks_like_float32(tmp_path: Path):
+    rng = random.Random(37)
+    float_store = SQLiteVectorStore(db_path=tmp_path / "f32.sqlite", embedding_dimension=DIM)
+    int8_store = SQLiteVectorStore(db_path=tmp_path / "i8.sqlite", embedding_dimension=DIM, quantization="int8")
+    try:
+        for link_id in ("a", "b", "c", "d"):
+            records = _records(link_id, rng, count=6)
+            for target in (float_store, int8_store):
+                target.replace_content_embeddings(link_id=link_id, records=records, checksum="x", embedding_version=3)
+
+        blob = int8_store.connection.execute("SELECT vector FROM embeddings LIMIT 1").fetchone()[0]
+        assert len(blob) == DIM + 4
+        status = int8_store.fetch_content_status(["a"])["a"]
+        assert (status.embedding_version, status.encoding) == (3, "int8")
+
+        overlap = 0
+        for _ in range(10):
+            query = _random_vector(rng)
+            exact = {r.chunk_id: r.score for r in float_store.search(query_vector=query, top_k=5)}
+            approx = {r.chunk_id: r.score for r in int8_store.search(query_vector=query, top_k=5)}
+            overlap += len(exact.keys() & approx.keys())
+            for chunk_id in exact.keys() & approx.keys():
+                assert approx[chunk_id] == pytest.approx(exact[chunk_id], abs=0.02)
+        assert overlap >= 45
+        assert int8_store._residents[""].matrix.dtype == np.int8
+    finally:
+        float_store.close()
+        int8_store.close()
+
+
+def test_float32_rows_migrate_lazily_to_int8(tmp_path: Path, monkeypatch):
+    rng = random.Random(41)
+    path = tmp_path / "embeddings.sqlite"
+    legacy = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    _populate(legacy, rng, links=("a", "b"))
+    legacy.close()
+
+    store = SQLiteVectorStore(db_path=path, embedding_dimension=DIM, quantization="int8")
+    try:
+        query = _random_vector(rng)
+        before = [r.chunk_id for r in store.search(query_vector=query, top_k=8)]
+        assert len(before) == 8
+
+        assert store.reencode_link("a") == 4
+        assert store.reencode_link("a") == 0
+        assert store.fetch_content_status(["a"])["a"].encoding == "int8"
+        assert store.fetch_content_status(["b"])["b"].encoding == "float32"
+        assert [r.chunk_id for r in store.search(query_vector=query, top_k=8)] == before
+
+        monkeypatch.setattr(store_module, "np", None)
+        assert [r.chunk_id for r in store.search(query_vector=query, top_k=8)] == before
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("quantization", ["float32", "int8"])
+def test_search_many_matches_individual_searches(tmp_path: Path, quantization):
+    rng = random.Random(43)
+    store = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM, quantization=quantization)
+    try:
+        _populate(store, rng, links=("a", "b", "c", "d"))
+        queries = [_random_vector(rng) for _ in range(5)]
+        for filters in (None, {"link_ids": ["b", "c"]}):
+            batched = store.search_many(query_vectors=queries, top_k=6, filters=filters)
+            single = [store.search(query_vector=q, top_k=6, filters=filters) for q in queries]
+            assert [[r.chunk_id for r in hits] for hits in batched] == [[r.chunk_id for r in hits] for hits in single]
+    finally:
+        store.close()
+
+
+@pytest.mark.skipif(not hasattr(sqlite3.Connection, "setlimit"), reason="needs Python 3.11+")
+@pytest.mark.parametrize("quantization", ["float32", "int8"])
+def test_search_many_looks_up_rows_in_bounded_chunks(tmp_path: Path, quantization, monkeypatch):
+    rng = random.Random(47)
+    path = tmp_path / "embeddings.sqlite"
+    store = SQLiteVectorStore(db_path=path, embedding_dimension=DIM, quantization=quantization)
+    limited = SQLiteVectorStore(db_path=path, embedding_dimension=DIM, quantization=quantization, readers=1)
+    try:
+        _populate(store, rng, links=[f"l{i}" for i in range(10)])
+        queries = [_random_vector(rng) for _ in range(8)]
+        expected = store.search_many(query_vectors=queries, top_k=10)
+
+        # 8 queries x 10 hits exceed an 8-variable limit; chunked lookups stay under it.
+        monkeypatch.setattr(store_module, "_SQL_CHUNK", 6)
+        with limited._pool.reading() as connection:
+            connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 8)
+        batched = limited.search_many(query_vectors=queries, top_k=10)
+        assert [[(r.chunk_id, r.score) for r in hits] for hits in batched] == [
+            [(r.chunk_id, r.score) for r in hits] for hits in expected
+        ]
+    finally:
+        limited.close()
+        store.close()
+
+
+@pytest.mark.parametrize("quantization", ["float32", "int8"])
+def test_segments_are_memory_mapped_and_refreshed(tmp_path: Path, quantization):
+    rng = random.Random(29)
+    path = tmp_path / "embeddings.sqlite"
+    writer = SQLiteVectorStore(db_path=path, embedding_dimension=DIM, quantization=quantization, segments=True)
+    reader = SQLiteVectorStore(db_path=path, embedding_dimension=DIM, quantization=quantization, segments=True)
+    try:
+        _populate(writer, rng, batch_id="b1")
+        [segment] = writer.export_segments()
+        assert segment.name == f"b1.{quantization}.g3.npy"
+
+        query = _random_vector(rng)
+        hits = reader.search(query_vector=query, top_k=5)
+        assert isinstance(reader._residents["b1"].matrix, np.memmap)
+        assert [r.chunk_id for r in hits] == [r.chunk_id for r in writer.search(query_vector=query, top_k=5, exact=True)]
+
+        # A write makes the segment stale: the reader reloads from SQLite and re-exports.
+        writer.replace_content_embeddings(
+            link_id="d", records=_records("d", rng), checksum="d", embedding_version=1, batch_id="b1"
+        )
+        assert len(reader.search(query_vector=query, top_k=20)) == 16
+        files = sorted(p.name for p in (tmp_path / "embeddings.segments").iterdir())
+        assert files == [f"b1.{quantization}.g4.ids.npz", f"b1.{quantization}.g4.npy"]
+
+        writer.drop_batch("b1")
+        assert not list((tmp_path / "embeddings.segments").iterdir())
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_lexical_search_matches_cjk_words_and_respects_filters(store):
+    rng = random.Random(31)
+    texts = {
+        "a": ["特斯拉公布了新的电池技术", "the model Y-2025 ships in march"],
+        "b": ["电池回收工厂在上海开工", "charging network expands"],
+    }
+    for link_id, chunks in texts.items():
+        records = _records(link_id, rng, count=len(chunks))
+        for record, text in zip(records, chunks):
+            record.text = text
+        store.replace_content_embeddings(
+            link_id=link_id, records=records, checksum=link_id, embedding_version=1, batch_id="b1"
+        )
+
+    assert {r.chunk_id for r in store.search_lexical(keywords=["电池"])} == {"a::transcript::0", "b::transcript::0"}
+    assert [r.chunk_id for r in store.search_lexical(keywords=["电池"], filters={"link_ids": ["b"]})] == [
+        "b::transcript::0"
+    ]
+    # A keyword must match contiguously: 特斯 and 斯拉 occur, 特拉 does not.
+    assert store.search_lexical(keywords=["特拉"]) == []
+    assert [r.chunk_id for r in store.search_lexical(query="Model Y-2025 release")][:1] == ["a::transcript::1"]
+    assert store.search_lexical(keywords=["电池"], filters={"batch_ids": ["other"]}) == []
+
+    # Replaced and dropped rows leave the index with them.
+    replacement = _records("a", rng, count=1)
+    replacement[0].text = "no battery here"
+    store.replace_content_embeddings(
+        link_id="a", records=replacement, checksum="a2", embedding_version=1, batch_id="b1"
+    )
+    assert [r.chunk_id for r in store.search_lexical(keywords=["电池"])] == ["b::transcript::0"]
+    store.drop_batch("b1")
+    assert store.search_lexical(keywords=["battery", "电池"]) == []
+
+
+def test_lexical_index_is_backfilled_from_full_text(tmp_path: Path):
+    rng = random.Random(37)
+    path = tmp_path / "embeddings.sqlite"
+    first = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    _populate(first, rng, links=("a", "b"))
+    records = _records("c", rng, count=1)
+    records[0].text = "filler words " * 100 + "zeppelin"
+    first.replace_content_embeddings(link_id="c", records=records, checksum="c", embedding_version=1)
+    with first.connection:
+        first.connection.execute("DROP TABLE chunk_fts")
+    first.close()
+
+    reopened = SQLiteVectorStore(db_path=path, embedding_dimension=DIM)
+    try:
+        hits = reopened.search_lexical(query="b chunk 2")
+        assert hits[0].chunk_id == "b::transcript::2"
+        # Past the preview: only the stored full text contains it.
+        assert [r.chunk_id for r in reopened.search_lexical(keywords=["zeppelin"])] == ["c::transcript::0"]
+    finally:
+        reopened.close()
+
+
+def test_full_chunk_text_is_stored_compressed(store):
+    rng = random.Random(41)
+    records = _records("a", rng, count=3)
+    bodies = ["第一段：" + "电池技术的进展。" * 200, "plain english " * 300]
+    for record, body in zip(records, bodies):
+        record.text = body
+    store.replace_content_embeddings(link_id="a", records=records, checksum="a", embedding_version=1, batch_id="b1")
+
+    stored = dict(store.connection.execute("SELECT chunk_id, length(text_blob) FROM embeddings").fetchall())
+    assert stored["a::transcript::1"] < len(bodies[1]) // 10
+    assert stored["a::transcript::2"] is None
+
+    hits = store.search(query_vector=records[0].embedding, top_k=3, filters={"batch_ids": ["b1"]})
+    texts = store.fetch_chunk_texts((hit.batch_id, hit.chunk_id) for hit in hits)
+    assert texts[("b1", "a::transcript::0")] == bodies[0]
+    assert texts[("b1", "a::transcript::1")] == bodies[1]
+    # No full text recorded: the preview stands in.
+    assert texts[("b1", "a::transcript::2")] == "a chunk 2"
+    assert store.fetch_chunk_texts([("other", "a::transcript::0")]) == {}
+
+
+def _topical_store(tmp_path: Path, settings, *, links: int = 30, per_link: int = 20, ivf=None):
+    """Each link is one topic: a coarse document row at its centre plus fine rows around it."""
+
+    rng = np.random.default_rng(43)
+    topics = rng.normal(size=(links, DIM))
+    instance = SQLiteVectorStore(
+        db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM, hierarchical=settings, ivf=ivf
+    )
+    for link in range(links):
+        link_id = f"l{link}"
+        records = [
+            VectorRecord(
+                chunk_id=f"{link_id}::transcript::{idx}",
+                link_id=link_id,
+                chunk_index=idx,
+                chunk_type="transcript",
+                scale="fine",
+                embedding=(topics[link] + 0.3 * rng.normal(size=DIM)).tolist(),
+                text_preview="",
+                metadata={},
+            )
+            for idx in range(per_link)
+        ]
+        if link != links - 1:  # the last link has not been summarized yet
+            records.append(
+                VectorRecord(
+                    chunk_id=f"{link_id}::doc",
+                    link_id=link_id,
+                    chunk_index=-1,
+                    chunk_type="document",
+                    scale="coarse",
+                    embedding=topics[link].tolist(),
+                    text_preview="",
+                    metadata={},
+                )
+            )
+        instance.replace_content_embeddings(link_id=link_id, records=records, checksum="x", embedding_version=1)
+    return instance, topics, rng
+
+
+def test_coarse_to_fine_scores_only_the_best_links(tmp_path: Path, monkeypatch):
+    settings = HierarchicalSettings(top_links=3, links_per_result=0.0, min_rows=100)
+    store, topics, rng = _topical_store(tmp_path, settings)
+    try:
+        scored = []
+        original = store_module._ResidentMatrix.scores
+
+        def counting_scores(self, queries, positions=None):
+            scored.append(len(self.rowids) if positions is None else len(positions))
+            return original(self, queries, positions)
+
+        monkeypatch.setattr(store_module._ResidentMatrix, "scores", counting_scores)
+
+        for link in (0, 7, 29):
+            query = (topics[link] + 0.1 * rng.normal(size=DIM)).tolist()
+            scored.clear()
+            hits = store.search(query_vector=query, top_k=10)
+            assert {r.link_id for r in hits} == {f"l{link}"}
+            assert [r.chunk_id for r in hits] == [r.chunk_id for r in store.search(query_vector=query, top_k=10, exact=True)]
+            # 29 coarse rows, then 3 links plus the unsummarized one.
+            assert scored[0] == 29 and scored[1] == 4 * 20 + 3
+
+        # A chunk-type filter applies before the top_k check: three best links
+        # hold only three document rows, so the search falls back to a flat scan.
+        query = topics[0].tolist()
+        documents = store.search(query_vector=query, top_k=10, filters={"chunk_types": ["document"]})
+        assert len(documents) == 10 and {r.chunk_id.endswith("::doc") for r in documents} == {True}
+
+        # Link-scoped searches and small partitions stay flat.
+        scored.clear()
+        store.search(query_vector=topics[0].tolist(), top_k=5, filters={"link_ids": ["l1", "l2"]})
+        assert scored == [42]
+        store.hierarchical = HierarchicalSettings(min_rows=10_000)
+        scored.clear()
+        store.search(query_vector=topics[0].tolist(), top_k=5)
+        assert scored == [30 * 20 + 29]
+    finally:
+        store.close()
+
+
+def test_coarse_to_fine_uses_ivf_lists_within_the_chosen_links(tmp_path: Path, monkeypatch):
+    settings = HierarchicalSettings(top_links=3, links_per_result=0.0, min_rows=100)
+    store, topics, rng = _topical_store(tmp_path, settings, ivf=IVFSettings(n_lists=16, nprobe=2, min_rows=100))
+    try:
+        scored = []
+        original = store_module._ResidentMatrix.scores
+
+        def counting_scores(self, queries, positions=None):
+            scored.append(len(self.rowids) if positions is None else len(positions))
+            return original(self, queries, positions)
+
+        monkeypatch.setattr(store_module._ResidentMatrix, "scores", counting_scores)
+
+        found = 0
+        for link in (0, 7, 29):
+            query = (topics[link] + 0.1 * rng.normal(size=DIM)).tolist()
+            scored.clear()
+            hits = store.search(query_vector=query, top_k=10)
+            exact = store.search(query_vector=query, top_k=10, exact=True)
+            found += len({r.chunk_id for r in hits} & {r.chunk_id for r in exact})
+            # Stage two: only the rows of the chosen links inside the probed lists.
+            assert 10 <= scored[1] < 4 * 20 + 3
+        assert "" in store._ivf
+        assert found / 30 >= 0.8
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("segments", [False, True])
+def test_concurrent_indexing_and_searching(tmp_path: Path, segments):
+    import threading
+
+    store = SQLiteVectorStore(
+        db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM, segments=segments, readers=3
+    )
+    errors = []
+    writers_done = threading.Event()
+
+    def writer(worker: int):
+        rng = random.Random(worker)
+        try:
+            for round_idx in range(15):
+                batch_id = f"batch-{worker % 2}"
+                links = [f"w{worker}-l{(round_idx + i) % 4}" for i in range(2)]
+                store.bulk_replace_content_embeddings(
+                    [ContentUpdate(link_id, _records(link_id, rng), f"r{round_idx}") for link_id in links],
+                    embedding_version=1,
+                    batch_id=batch_id,
+                )
+                if segments and round_idx % 5 == 0:
+                    store.export_segments([batch_id])
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    def reader(worker: int):
+        rng = random.Random(100 + worker)
+        try:
+            while not writers_done.is_set():
+                query = _random_vector(rng)
+                hits = store.search(query_vector=query, top_k=5)
+                assert all(hit.chunk_id.startswith(hit.link_id) for hit in hits)
+                store.search_many(query_vectors=[query, query], top_k=3, filters={"batch_ids": ["batch-1"]})
+                store.fetch_chunk_texts((hit.batch_id, hit.chunk_id) for hit in hits)
+                store.list_batches()
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(6)]
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(8)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+
+    try:
+        assert errors == []
+        # Every writer ends with all four of its links written (4 rows each).
+        assert store.list_batches() == {"batch-0": 3 * 4 * 4, "batch-1": 3 * 4 * 4}
+        query = _random_vector(random.Random(7))
+        assert [r.chunk_id for r in store.search(query_vector=query, top_k=10)] == [
+            r.chunk_id for r in store.search(query_vector=query, top_k=10, exact=True)
+        ]
+        assert len(store._pool._readers) <= 3
+    finally:
+        store.close()
@@ -0,0 +1,224 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+from core.config import Config
+from research.embeddings import background_indexer
+from research.embeddings.background_indexer import BackgroundIndexJob
+from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
+from research.embeddings.vector_indexer import VectorIndexer
+
+DIM = 64
+
+
+class CountingEmbeddingClient(EmbeddingClient):
+    def __init__(self) -> None:
+        super().__init__(EmbeddingConfig(provider="hash", dimension=DIM))
+        self.embedded = []
+
+    def embed_texts(self, texts):
+        texts = list(texts)
+        self.embedded.extend(texts)
+        return super().embed_texts(texts)
+
+
+@pytest.fixture
+def indexer(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        yaml.safe_dump(
+            {
+                "research": {
+                    "embeddings": {
+                        "dimension": DIM,
+                        "store": {"path": str(tmp_path)},
+                        "chunk": {"default_tokens": 20, "min_tokens": 10, "overlap_tokens": 5},
+                    }
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    instance = VectorIndexer(config=Config(str(config_path)), embedding_client=CountingEmbeddingClient())
+    yield instance
+    instance.vector_store.close()
+
+
+def _item(transcript, facts):
+    return {
+        "source": "youtube",
+        "transcript": transcript,
+        "comments": [],
+        "summary": {"transcript_summary": {"key_facts": facts}},
+    }
+
+
+def _rows(store):
+    return dict(
+        store.connection.execute("SELECT chunk_id, rowid FROM embeddings WHERE link_id = 'v1'").fetchall()
+    )
+
+
+def test_only_new_or_changed_chunks_are_embedded(indexer):
+    words = [f"word{i}" for i in range(100)]
+    client = indexer.embedding_client
+    store = indexer.vector_store
+
+    indexer.index_batch("b1", {"v1": _item(" ".join(words), ["fact one"])})
+    first_rows = _rows(store)
+    transcript_ids = sorted(cid for cid in first_rows if "::transcript::" in cid)
+    assert len(transcript_ids) > 3
+
+    # A summary-only change re-embeds the document chunk and keeps every transcript row.
+    client.embedded.clear()
+    indexer.index_batch("b1", {"v1": _item(" ".join(words), ["fact two"])})
+    assert len(client.embedded) == 1 and "fact two" in client.embedded[0]
+    rows = _rows(store)
+    assert {cid: rows[cid] for cid in transcript_ids} == {cid: first_rows[cid] for cid in transcript_ids}
+    assert rows["v1::doc"] != first_rows["v1::doc"]
+
+    # Editing the tail of the transcript re-embeds only the chunks covering it.
+    client.embedded.clear()
+    words[-1] = "changed"
+    indexer.index_batch("b1", {"v1": _item(" ".join(words), ["fact two"])})
+    rows = _rows(store)
+    changed = [cid for cid in transcript_ids if rows[cid] != first_rows[cid]]
+    assert changed == [transcript_ids[-1]]
+    assert len(client.embedded) == 2  # document + last transcript chunk
+
+    hits = store.search(query_vector=client.embed_texts(["word30 word31 word32"])[0], top_k=3, filters=None)
+    assert hits and all(hit.link_id == "v1" for hit in hits)
+
+
+def test_model_version_change_reembeds_everything(indexer):
+    transcript = " ".join(f"word{i}" for i in range(60))
+    indexer.index_batch("b1", {"v1": _item(transcript, ["fact"])})
+    total = len(_rows(indexer.vector_store))
+
+    indexer.embedding_client.embedded.clear()
+    indexer.settings.embedding_version += 1
+    indexer.index_batch("b1", {"v1": _item(transcript, ["fact"])})
+    assert len(indexer.embedding_client.embedded) == total
+
+
+def test_background_job_indexes_content_first_then_patches_summaries(indexer):
+    transcript = " ".join(f"word{i}" for i in range(60))
+    data = {"v1": _item(transcript, ["fact"])}
+    client = indexer.embedding_client
+    release = threading.Event()
+    original = indexer.index_batch
+
+    def gated_index_batch(batch_id, batch_data, *, content_only=False):
+        original(batch_id, batch_data, content_only=content_only)
+        if content_only:
+            release.wait(5)
+
+    indexer.index_batch = gated_index_batch
+    job = BackgroundIndexJob(indexer, "bg", data).start()
+    assert not background_indexer.is_ready("bg")
+    assert not background_indexer.wait_for_batch(["bg"], timeout=0.05)
+
+    # Content pass: transcript chunks only, nothing summary-derived.
+    release.set()
+    for _ in range(100):
+        if _rows(indexer.vector_store):
+            break
+        threading.Event().wait(0.01)
+    content_rows = _rows(indexer.vector_store)
+    assert content_rows and "v1::doc" not in content_rows
+    content_embedded = len(client.embedded)
+
+    job.submit_summaries(data)
+    assert background_indexer.wait_for_batch(["bg"], timeout=5)
+    assert job.join(5) and job.error is None
+
+    rows = _rows(indexer.vector_store)
+    assert "v1::doc" in rows
+    assert {cid: rows[cid] for cid in content_rows} == content_rows
+    assert len(client.embedded) == content_embedded + 1
+    metadata = indexer.vector_store.connection.execute(
+        "SELECT metadata_json FROM embeddings WHERE chunk_id = 'v1::transcript::0'"
+    ).fetchone()[0]
+    assert "key_facts" in metadata
+
+
+def test_background_job_runs_full_pass_after_content_pass_fails(indexer):
+    data = {"v1": _item(" ".join(f"word{i}" for i in range(60)), ["fact"])}
+    original = indexer.index_batch
+
+    def flaky_index_batch(batch_id, batch_data, *, content_only=False):
+        if content_only:
+            raise RuntimeError("provider down")
+        original(batch_id, batch_data, content_only=content_only)
+
+    indexer.index_batch = flaky_index_batch
+    job = BackgroundIndexJob(indexer, "bg-flaky", data).start()
+    # Summaries written after the job started never reach the content snapshot.
+    data["v1"]["summary"] = {"transcript_summary": {"key_facts": ["late fact"]}}
+    assert "summary" not in job._content_data["v1"]
+    job.submit_summaries(data)
+
+    assert background_indexer.wait_for_batch(["bg-flaky"], timeout=5)
+    assert job.join(5) and job.error is None
+    assert background_indexer.indexing_error("bg-flaky") is None
+    assert "v1::doc" in _rows(indexer.vector_store)
+
+
+def test_wait_for_batch_times_out_and_ignores_unknown_batches():
+    background_indexer.mark_pending("slow")
+    try:
+        assert not background_indexer.wait_for_batch(["slow"], timeout=0.05)
+        assert background_indexer.wait_for_batch(["never-indexed"], timeout=0.05)
+        threading.Timer(0.05, background_indexer.mark_ready, args=("slow",)).start()
+        assert background_indexer.wait_for_batch(["slow"], timeout=5)
+    finally:
+        background_indexer.mark_ready("slow")
+
+
+def test_comments_are_indexed_in_adaptive_groups(indexer):
+    indexer.settings.comment_group_chars = 200
+    indexer.settings.comment_group_max = 5
+    comments = [{"content": f"short {i}", "likes": i, "replies": 1} for i in range(12)]
+    comments.insert(6, {"content": "long " * 100, "likes": 50, "replies": 7})
+    item = {"source": "bilibili", "transcript": "", "comments": comments, "summary": {}}
+
+    indexer.index_batch("b1", {"v1": item})
+    rows = indexer.vector_store.connection.execute(
+        "SELECT chunk_id, scale, metadata_json FROM embeddings WHERE chunk_type = 'comments' ORDER BY chunk_index"
+    ).fetchall()
+    spans = [json.loads(meta)["comment_span"] for _, _, meta in rows]
+    # Five short comments fill a group; the long one stands alone.
+    assert spans == [[0, 5], [5, 6], [6, 7], [7, 12], [12, 13]]
+    assert {scale for _, scale, _ in rows} == {"fine"}
+    long_group = json.loads(rows[2][2])
+    assert (long_group["likes"], long_group["replies"], long_group["comment_count"]) == (50, 7, 1)
+    assert json.loads(rows[0][2])["max_likes"] == 4
+
+    # An appended comment only re-embeds the last group.
+    indexer.embedding_client.embedded.clear()
+    item = {**item, "comments": comments + [{"content": "new", "likes": 0, "replies": 0}]}
+    indexer.index_batch("b1", {"v1": item})
+    assert len(indexer.embedding_client.embedded) == 1
+    assert "[13]" in indexer.embedding_client.embedded[0]
+
+    hits = indexer.vector_store.search(
+        query_vector=indexer.embedding_client.embed_texts(["long " * 100])[0],
+        top_k=1,
+        filters={"chunk_types": ["comments"]},
+    )
+    assert hits[0].chunk_id == "v1::comments::2"
+
+
+def test_cjk_transcripts_are_chunked_by_character(indexer):
+    transcript = "".join(f"第{i}句话讲模型训练。" for i in range(10))  # 100 characters, no spaces
+    candidates = indexer._build_candidates("zh", {"transcript": transcript}, batch_id="b", include_document=False)
+
+    spans = [c.metadata["token_span"] for c in candidates]
+    assert spans[0] == [0, 20]
+    assert spans[-1][1] == len(transcript)
+    assert all(end - start <= 20 + 10 for start, end in spans)
+    assert candidates[0].text == transcript[:20]
+    assert all(" " not in c.text for c in candidates)
@@ -0,0 +1,196 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from core.config import Config
+from research.embeddings.embedding_client import EmbeddingClient, EmbeddingConfig
+from research.retrieval.query_cache import LRUCache, QueryCacheSettings, shared_query_caches
+from research.retrieval.vector_retrieval_service import RetrievalFilters, VectorRetrievalService
+from research.vector_store.sqlite_vector_store import SQLiteVectorStore, VectorRecord
+
+pytest.importorskip("numpy")
+
+DIM = 64
+
+
+class CountingEmbeddingClient(EmbeddingClient):
+    def __init__(self) -> None:
+        super().__init__(EmbeddingConfig(provider="hash", dimension=DIM))
+        self.calls = []
+
+    def embed_texts(self, texts):
+        texts = list(texts)
+        self.calls.append(texts)
+        return super().embed_texts(texts)
+
+
+@pytest.fixture(autouse=True)
+def clear_query_caches():
+    for cache in shared_query_caches(QueryCacheSettings()):
+        cache.clear()
+    yield
+
+
+def _records(link_id, chunks, vectors):
+    return [
+        VectorRecord(
+            chunk_id=f"{link_id}::{idx}",
+            link_id=link_id,
+            chunk_index=idx,
+            chunk_type="transcript",
+            scale="fine",
+            embedding=vector,
+            text_preview=text,
+            metadata={},
+        )
+        for idx, (text, vector) in enumerate(zip(chunks, vectors))
+    ]
+
+
+@pytest.fixture
+def service(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(
+        yaml.safe_dump({"research": {"embeddings": {"dimension": DIM, "store": {"path": str(tmp_path)}}}}),
+        encoding="utf-8",
+    )
+    client = CountingEmbeddingClient()
+    store = SQLiteVectorStore(db_path=tmp_path / "embeddings.sqlite", embedding_dimension=DIM)
+    texts = {
+        "a": ["solar panels on rooftops", "battery storage for homes", "grid frequency control"],
+        "b": ["electric buses in cities", "charging stations network", "battery recycling plants"],
+    }
+    for link_id, chunks in texts.items():
+        store.replace_content_embeddings(
+            link_id=link_id,
+            records=_records(link_id, chunks, client.embed_texts(chunks)),
+            checksum=link_id,
+            embedding_version=1,
+            batch_id="batch-1",
+        )
+    client.calls.clear()
+    instance = VectorRetrievalService(
+        config=Config(str(config_path)), embedding_client=client, vector_store=store, batch_id="batch-1"
+    )
+    instance.config_path = config_path
+    yield instance
+    store.close()
+
+
+def test_search_many_embeds_once_and_matches_search(service):
+    queries = ["battery storage for homes", "charging stations network", "solar panels on rooftops"]
+    filters = [None, RetrievalFilters(link_ids=["b"]), None]
+
+    batched = service.search_many(queries, filters=filters, top_k=2)
+    assert service.embedding_client.calls == [queries]
+    assert [hits[0].chunk_id for hits in batched] == ["a::1", "b::1", "a::0"]
+    assert {r.link_id for r in batched[1]} == {"b"}
+
+    # Per-query searches are now served from the cache without embedding again.
+    single = [service.search(q, filters=f, top_k=2) for q, f in zip(queries, filters)]
+    assert [[r.chunk_id for r in hits] for hits in single] == [[r.chunk_id for r in hits] for hits in batched]
+    assert len(service.embedding_client.calls) == 1
+
+
+def test_search_is_scoped_to_active_batch(service):
+    assert service.search("battery storage for homes", top_k=1)[0].batch_id == "batch-1"
+    service.set_batch("other-batch")
+    assert service.search("battery storage for homes", top_k=1) == []
+
+
+def test_new_service_instance_starts_warm(service):
+    service.search("grid frequency control", top_k=2)
+    result_hits = service.cache_stats()["results"]["hits"]
+    rerun = VectorRetrievalService(
+        config=Config(str(service.config_path)),
+        embedding_client=service.embedding_client,
+        vector_store=service.vector_store,
+        batch_id="batch-1",
+    )
+    hits = rerun.search("grid frequency control", top_k=2)
+    assert hits and hits[0].chunk_id == "a::2"
+    assert len(service.embedding_client.calls) == 1
+    assert rerun.cache_stats()["results"]["hits"] == result_hits + 1
+
+
+def test_store_write_invalidates_results_but_not_embeddings(service):
+    before = service.search("electric buses in cities", top_k=1)
+    assert before[0].chunk_id == "b::0"
+
+    client = service.embedding_client
+    chunks = ["electric buses in cities"]
+    service.vector_store.replace_content_embeddings(
+        link_id="c",
+        records=_records("c", chunks, client.embed_texts(chunks)),
+        checksum="c",
+        embedding_version=1,
+        batch_id="batch-1",
+    )
+    client.calls.clear()
+    embedding_hits = service.cache_stats()["embeddings"]["hits"]
+
+    after = service.search("electric buses in cities", top_k=2)
+    assert {r.link_id for r in after} == {"b", "c"}
+    assert client.calls == []
+    assert service.cache_stats()["embeddings"]["hits"] == embedding_hits + 1
+
+
+def test_lru_cache_respects_entry_and_byte_caps():
+    cache = LRUCache(max_entries=3, max_bytes=100, sizeof=len)
+    for key in "abc":
+        cache.put(key, "x" * 10)
+    assert cache.get("a") == "x" * 10  # refresh "a"
+    cache.put("d", "x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    cache.put("big", "x" * 90)
+    stats = cache.stats()
+    assert stats["bytes"] <= 100 and stats["entries"] <= 3
+    assert cache.get("big") is not None
+    cache.put("huge", "x" * 500)
+    assert cache.get("huge") is None
+    assert stats["evictions"] >= 1
+
+
+def test_hybrid_search_promotes_exact_keyword_matches(service):
+    client = service.embedding_client
+    chunks = ["quarterly report mentions part number XK-4471", "solar rooftops and home batteries"]
+    records = _records("c", chunks, client.embed_texts(["unrelated filler text", "solar panels on rooftops"]))
+    for record, text in zip(records, chunks):
+        record.text = text
+    service.vector_store.replace_content_embeddings(
+        link_id="c", records=records, checksum="c", embedding_version=1, batch_id="batch-1"
+    )
+
+    cosine = service.search("which document lists XK-4471", top_k=3)
+    assert "c::0" not in [r.chunk_id for r in cosine]
+
+    hybrid = service.search_hybrid("which document lists XK-4471", keywords=["XK-4471"], top_k=3)
+    # First place in the BM25 list ties with first place in the cosine list.
+    keyword_hit = next(r for r in hybrid[:2] if r.chunk_id == "c::0")
+    assert keyword_hit.metadata["hybrid"].keys() == {"bm25"}
+    assert all(0.0 < r.score <= 1.0 for r in hybrid)
+
+    service.hybrid_enabled = False
+    assert [r.chunk_id for r in service.search_hybrid("which document lists XK-4471", top_k=3)] == [
+        r.chunk_id for r in cosine
+    ]
+
+
+def test_hybrid_search_keeps_same_chunk_from_different_batches(service):
+    client = service.embedding_client
+    chunks = ["part number XK-4471 appears here"]
+    for batch_id in ("batch-1", "batch-2"):
+        records = _records("c", chunks, client.embed_texts(chunks))
+        records[0].text = chunks[0]
+        service.vector_store.replace_content_embeddings(
+            link_id="c", records=records, checksum="c", embedding_version=1, batch_id=batch_id
+        )
+    service.scope = "all"
+
+    hybrid = service.search_hybrid("part number XK-4471", keywords=["XK-4471"], top_k=4)
+    keyword_hits = [r for r in hybrid if r.chunk_id == "c::0"]
+    assert sorted(r.batch_id for r in keyword_hits) == ["batch-1", "batch-2"]
+    assert all(r.metadata["hybrid"].keys() == {"cosine", "bm25"} for r in keyword_hits)